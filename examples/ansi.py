@@ -0,0 +1,26 @@
+# ansi.py
+# An example of how to display a text box inline in a terminal without
+# curses.
+
+from visualdialog import AnsiBackend, DialogBox
+
+
+print("The text box is displayed below this line.")
+
+# Eight lines below the cursor are used, they remain once the backend
+# is stopped.
+with AnsiBackend(lines=8, inline=True) as backend:
+    # Color pairs are defined on the backend instead of curses.
+    backend.init_pair(1, 6, -1)
+
+    textbox = DialogBox(1, 0,  # Position 1;0 in the lines used.
+                        40, 6,  # Height and width of textbox.
+                        "Tim-ats",  # Title of textbox.
+                        backend=backend)
+
+    textbox.char_by_char("Hello world, this text box is drawn with "
+                         "ANSI escape sequences.",
+                         backend.stdscr,
+                         colors_pair_nb=1)
+
+print("The text box remains above this line.")
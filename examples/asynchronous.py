@@ -0,0 +1,49 @@
+# asynchronous.py
+# An example of how to write text while other asyncio tasks are running.
+
+import asyncio
+import curses
+import time
+
+from visualdialog import DialogBox
+
+
+replys = (
+    "While this text is written, a clock keeps ticking in the corner.",
+    "achar_by_char and aword_by_word never block the event loop.",
+)
+
+
+async def clock(win):
+    # Display current time every second.
+    while True:
+        win.addstr(0, 0, time.strftime("%H:%M:%S"))
+        win.refresh()
+        await asyncio.sleep(1)
+
+
+async def dialog(win):
+    textbox = DialogBox(1, 2,  # Position 1;2 in win.
+                        40, 6,  # Height and width of textbox.
+                        "Async")  # Title of textbox.
+    textbox.confirm_keys.append("\n")
+
+    for reply in replys:
+        await textbox.achar_by_char(reply, win)
+
+
+async def run(win):
+    clock_task = asyncio.create_task(clock(win))
+    await dialog(win)
+    clock_task.cancel()
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+
+    asyncio.run(run(win))
+
+
+# Execution of main function.
+curses.wrapper(main)
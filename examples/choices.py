@@ -0,0 +1,39 @@
+# choices.py
+# An example of how to let the user choose between several propositions.
+
+import curses
+
+from visualdialog import ChoiceBox, DialogBox
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+    # Arrow keys are returned as "KEY_UP", "KEY_DOWN"...
+    win.keypad(True)
+
+    textbox = DialogBox(1, 1,  # Position 1;1 in win.
+                        40, 6,  # Height and width of textbox.
+                        "Merchant")  # Title of textbox.
+
+    choicebox = ChoiceBox(1, 9,
+                          40, 8,
+                          "Your answer")
+
+    textbox.char_by_char("What do you want to buy ?", win)
+
+    # Propositions are mapped to the value returned when chosen.
+    # Use arrow keys or type the number of a proposition to select it,
+    # then space or enter to confirm.
+    price = choicebox.chain({"A sword": 120,
+                             "A shield": 80,
+                             "A potion": 15,
+                             "A map": 5,
+                             "Nothing": 0},
+                            win)
+
+    textbox.char_by_char(f"That will be {price} gold coins.", win)
+
+
+# Execution of main function.
+curses.wrapper(main)
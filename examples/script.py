@@ -0,0 +1,49 @@
+# script.py
+# An example of how to display a dialogue written in a script file.
+
+import curses
+import os
+
+from visualdialog import DialogBox, DialogueScript
+
+
+height, width = 35, 5
+script_path = os.path.join(os.path.dirname(__file__), "confrontation.jsonl")
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+
+    curses.init_pair(1, curses.COLOR_BLUE, 0)
+    curses.init_pair(2, curses.COLOR_MAGENTA, 0)
+    curses.init_pair(3, curses.COLOR_RED, 0)
+
+    max_y, max_x = win.getmaxyx()  # Get height and width of the window.
+    bottom_y = max_y - width - 4  # Calculation of bottom alignment.
+
+    # Entries of the script are displayed by the text box of their
+    # style, which is the name of the speaker if not specified.
+    boxes = {
+        "Phoenix": DialogBox(2, bottom_y,
+                             height, width,
+                             "Phoenix", 1,
+                             global_win=win),
+        "April": DialogBox(max_x//2 - height//2, bottom_y,
+                           height, width,
+                           "April", 2,
+                           global_win=win),
+        "Edgeworth": DialogBox(max_x - height - 4, bottom_y,
+                               height, width,
+                               "Edgeworth", 3,
+                               global_win=win),
+    }
+
+    # Entries are read from the file as they are displayed. An index
+    # of the script is written next to it the first time it is opened.
+    with DialogueScript(script_path) as script:
+        script.play(boxes)
+
+
+# Execution of main function.
+curses.wrapper(main)
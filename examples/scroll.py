@@ -0,0 +1,36 @@
+# scroll.py
+# An example of how to display a long text in a viewport scrolled line
+# by line.
+
+import curses
+
+from visualdialog import DialogBox
+
+
+rules = " ".join(
+    f"Article {number}. The defense may call any witness it deems "
+    "useful, provided the witness has been declared to the court "
+    "before the trial."
+    for number in range(1, 101))
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+    # Arrow keys are returned as "KEY_UP", "KEY_DOWN"...
+    win.keypad(True)
+
+    textbox = DialogBox(1, 1,  # Position 1;1 in win.
+                        50, 8,  # Height and width of textbox.
+                        "Court rules")  # Title of textbox.
+
+    # The whole text is written once, then arrow keys, page up/down,
+    # home and end move the viewport. Space closes it.
+    line = textbox.scroll(rules, win)
+
+    # Open it again where the user stopped reading.
+    textbox.scroll(rules, win, start=line)
+
+
+# Execution of main function.
+curses.wrapper(main)
@@ -0,0 +1,44 @@
+# simultaneous.py
+# An example of several text boxes animated at the same time.
+
+import curses
+
+from visualdialog import DialogBox, Scheduler
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+
+    max_y, max_x = win.getmaxyx()  # Get height and width of the window.
+
+    phoenix = DialogBox(2, 1,  # Position 2;1 in win.
+                        35, 6,  # Height and width of textbox.
+                        "Phoenix")  # Title of textbox.
+    edgeworth = DialogBox(max_x - 39, 1,
+                          35, 6,
+                          "Edgeworth")
+    status = DialogBox(2, max_y - 6,
+                       max_x - 4, 5)
+
+    scheduler = Scheduler(win)
+
+    # Texts are written at the same time, each at its own speed.
+    scheduler.add(phoenix,
+                  "The defendant could not have been at the crime scene !",
+                  delay=40)
+    scheduler.add(edgeworth,
+                  "Hmph. Your logic is as thin as ever.",
+                  delay=70)
+    # The status box does not wait for a key to go on but 2 seconds.
+    scheduler.add(status,
+                  "Court is in session... Witness testimony in progress.",
+                  method="word_by_word",
+                  page_delay=2000)
+
+    # Press space to confirm each dialog box.
+    scheduler.run()
+
+
+# Execution of main function.
+curses.wrapper(main)
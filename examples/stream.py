@@ -0,0 +1,31 @@
+# stream.py
+# An example of how to display the output of a command while it runs.
+
+import curses
+import subprocess
+
+from visualdialog import DialogBox
+
+
+def main(win):
+    # Make the cursor invisible.
+    curses.curs_set(False)
+
+    textbox = DialogBox(1, 1,  # Position 1;1 in win.
+                        60, 10,  # Height and width of textbox.
+                        "ping")  # Title of textbox.
+
+    process = subprocess.Popen(["ping", "-c", "5", "localhost"],
+                               stdout=subprocess.PIPE,
+                               text=True)
+
+    # Lines are written as soon as the command outputs them.
+    textbox.stream(process.stdout,
+                   win,
+                   delay=5)
+
+    process.wait()
+
+
+# Execution of main function.
+curses.wrapper(main)
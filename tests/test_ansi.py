@@ -0,0 +1,96 @@
+# test_ansi.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import curses
+import io
+import os
+
+import pytest
+
+from visualdialog import AnsiBackend, DialogBox, InputExhausted
+
+
+@pytest.fixture
+def keyboard():
+    """Return the input file of a pipe and the file descriptor on which
+    keys are typed.
+    """
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd) as input:
+        yield input, write_fd
+        try:
+            os.close(write_fd)
+        except OSError:
+            # Closed by the test.
+            pass
+
+
+def test_update_writes_only_changes(keyboard):
+    output = io.BytesIO()
+    backend = AnsiBackend(lines=3, cols=10, inline=True,
+                          input=keyboard[0], output=output)
+
+    backend.start()
+    assert output.getvalue() == b"\n\n\x1b[2A\r\x1b[J\x1b[?25l"
+
+    start = len(output.getvalue())
+    backend.stdscr.addstr(0, 0, "Hi", curses.A_BOLD)
+    backend.stdscr.addstr(1, 0, "yo")
+    backend.stdscr.refresh()
+    assert output.getvalue()[start:] == b"\x1b[1mHi\x1b[B\r\x1b[0myo"
+
+    start = len(output.getvalue())
+    backend.stdscr.addstr(1, 1, "a")
+    backend.stdscr.refresh()
+    assert output.getvalue()[start:] == b"\ba"
+
+    start = len(output.getvalue())
+    backend.stop()
+    # The cursor is left below the lines used.
+    assert output.getvalue()[start:] == b"\x1b[B\r\n\x1b[?25h"
+    assert backend.bytes_written == len(output.getvalue())
+
+
+def test_keys_are_decoded(keyboard):
+    input, keys = keyboard
+    backend = AnsiBackend(lines=3, cols=10, input=input,
+                          output=io.BytesIO())
+
+    os.write(keys, b"\x1b[B\x1b[1;5A\r a")
+    assert backend.stdscr.getch() == curses.KEY_DOWN
+    # Modifiers are ignored.
+    assert backend.stdscr.getkey() == "KEY_UP"
+    assert backend.stdscr.getkey() == "\n"
+    assert backend.stdscr.getkey() == " "
+    assert backend.stdscr.getkey() == "a"
+
+
+def test_end_of_input_raises(keyboard):
+    input, keys = keyboard
+    backend = AnsiBackend(lines=3, cols=10, input=input,
+                          output=io.BytesIO())
+
+    os.close(keys)
+    with pytest.raises(InputExhausted):
+        backend.stdscr.getkey()
+
+
+def test_dialog_box_is_displayed(keyboard):
+    input, keys = keyboard
+    output = io.BytesIO()
+
+    os.write(keys, b" ")
+    with AnsiBackend(lines=8, cols=40, inline=True,
+                     input=input, output=output) as backend:
+        box = DialogBox(1, 0, 30, 6, "Tim", backend=backend)
+        box.char_by_char("Hello", backend.stdscr, delay=0)
+
+    assert b"Tim" in output.getvalue()
+    assert backend.display()[3].startswith(" │ Hello ")
+
+
+def test_negative_waits_are_ignored():
+    backend = AnsiBackend(lines=3, cols=10, output=io.BytesIO())
+
+    # curses.napms accepts negative times.
+    backend.napms(-5)
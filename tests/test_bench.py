@@ -0,0 +1,41 @@
+# test_bench.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import json
+
+from visualdialog.bench import SCENARIOS, STAGES, main, run_scenario
+
+
+def scenario(name):
+    """Return the scenario named ``name``."""
+    return next(scenario for scenario in SCENARIOS
+                if scenario.name == name)
+
+
+def test_run_scenario_counts_refreshes():
+    delayed = run_scenario(scenario("delayed"), repeat=2)
+    framed = run_scenario(scenario("framed"), repeat=2)
+
+    assert delayed["refresh_calls"] > 0
+    assert delayed["noutrefresh_calls"] == 0
+    # Frames only mark windows and update the screen once by frame.
+    assert framed["refresh_calls"] == 0
+    assert framed["noutrefresh_calls"] == delayed["refresh_calls"]
+    assert framed["updates"] < delayed["updates"]
+    assert framed["virtual_time"] == delayed["virtual_time"]
+
+
+def test_run_scenario_measures_stages():
+    result = run_scenario(scenario("callbacks"), repeat=1)
+
+    assert set(result["stages"]) == set(STAGES)
+    for stage in STAGES:
+        assert result["stages"][stage] > 0
+    assert result["chars_per_sec"] > 0
+
+
+def test_main_prints_json(capsys):
+    assert main(["--repeat", "1", "--json", "short"]) == 0
+
+    results = json.loads(capsys.readouterr().out)
+    assert [result["name"] for result in results] == ["short"]
@@ -0,0 +1,95 @@
+# test_choices.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import asyncio
+import curses
+import io
+
+import pytest
+
+from visualdialog import (ChoiceBox, RenderStats, SessionRecorder,
+                          SessionReplayer, VirtualBackend)
+
+
+def rows(backend, start, stop):
+    """Return displayed lines ``start`` to ``stop`` without trailing
+    spaces.
+    """
+    return [line.rstrip() for line in backend.display()[start:stop]]
+
+
+def test_chain_returns_selected_proposition():
+    backend = VirtualBackend(lines=9, cols=40,
+                             keys=("KEY_DOWN", "KEY_DOWN", "KEY_UP", " "))
+    menu = ChoiceBox(0, 0, 30, 7, "Pick", backend=backend)
+
+    assert menu.chain({"a": 1, "b": 2, "c": 3}, backend.stdscr) == 2
+    assert rows(backend, 3, 6) == [
+        "│ 1. a                       │",
+        "│ 2. b                       │",
+        "│ 3. c                       │",
+    ]
+    # The chosen proposition is still highlighted.
+    assert backend.stdscr.inch(4, 2) & curses.A_REVERSE
+
+
+def test_chain_only_redraws_changed_rows():
+    backend = VirtualBackend(lines=9, cols=40, keys=("KEY_DOWN", " "))
+    menu = ChoiceBox(0, 0, 30, 7, backend=backend)
+    menu.stats = RenderStats()
+
+    assert menu.chain(["a", "b", "c"], backend.stdscr) == "b"
+    # Three propositions and two scroll marks, then the two rows whose
+    # highlight changed.
+    assert menu.stats.addstr_calls == 5 + 2
+
+
+def test_chain_scrolls_long_lists():
+    backend = VirtualBackend(lines=9, cols=40,
+                             keys=("KEY_END", "1", "2", " "))
+    menu = ChoiceBox(0, 0, 30, 6, "Pick", backend=backend)
+
+    # Digits typed select a proposition by its number.
+    assert menu.chain([f"item {i}" for i in range(15)],
+                      backend.stdscr) == "item 11"
+    assert rows(backend, 3, 6) == [
+        "│ 10. item 9               ▲ │",
+        "│ 11. item 10                │",
+        "│ 12. item 11              ▼ │",
+    ]
+
+
+def test_achain_returns_selected_proposition():
+    backend = VirtualBackend(lines=9, cols=40, keys=("KEY_DOWN", " "))
+    menu = ChoiceBox(0, 0, 30, 7, backend=backend)
+
+    assert asyncio.run(menu.achain(["a", "b", "c"], backend.stdscr)) == "b"
+
+
+def test_chain_rejects_window_first():
+    backend = VirtualBackend(lines=9, cols=40)
+    menu = ChoiceBox(0, 0, 30, 7, backend=backend)
+
+    with pytest.raises(TypeError):
+        menu.chain(backend.stdscr, "a", "b")
+
+
+def test_replay_of_chain_reproduces_screen():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys("KEY_DOWN", at=500)
+    backend.push_keys("KEY_DOWN", at=800)
+    backend.push_keys(" ", at=1500)
+    menu = ChoiceBox(0, 0, 30, 7, "Pick", backend=backend)
+
+    session = io.BytesIO()
+    with SessionRecorder(session) as recorder:
+        recorder.attach(menu)
+        menu.chain({"a": 1, "b": 2, "c": 3}, backend.stdscr)
+
+    replayer = SessionReplayer(io.BytesIO(session.getvalue()))
+    other = VirtualBackend(lines=9, cols=40)
+    replayed = ChoiceBox(0, 0, 30, 7, "Pick", backend=other)
+    replayer.replay(replayed, win=other.stdscr)
+
+    assert other.display() == backend.display()
+    assert other.clock.now == backend.clock.now
@@ -0,0 +1,416 @@
+# test_dialog.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import asyncio
+import curses
+import io
+
+import pytest
+
+from visualdialog import (ChoiceBox, DialogBox, RenderStats,
+                          SessionRecorder, SessionReplayer, VirtualBackend)
+from visualdialog.layout import LayoutCache, PageHistory
+
+
+WORDS = " ".join(f"word{i:02}" for i in range(40))
+
+
+def rows(backend, start, stop):
+    """Return displayed lines ``start`` to ``stop`` without trailing
+    spaces.
+    """
+    return [line.rstrip() for line in backend.display()[start:stop]]
+
+
+def attrs(backend, y, start, stop):
+    """Return the attributes of the cells ``start`` to ``stop`` of row
+    ``y`` of the screen.
+    """
+    return [backend.stdscr.attr_at(y, x) for x in range(start, stop)]
+
+
+@pytest.mark.parametrize("text_attr", [curses.A_UNDERLINE,
+                                       curses.A_REVERSE])
+def test_word_by_word_blanks_do_not_depend_on_delay(text_attr):
+    screens = []
+    for delay in (0, 10):
+        backend = VirtualBackend(lines=9, cols=40, keys=" ")
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+        box.word_by_word("one two three", backend.stdscr,
+                         text_attr=text_attr, delay=delay)
+        screens.append(attrs(backend, 1, 2, 16))
+
+    assert screens[0] == screens[1]
+    assert screens[0][3] == 0
+
+
+def test_word_by_word_coalesces_words_without_delay():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.stats = RenderStats()
+
+    box.word_by_word("one two three", backend.stdscr,
+                     text_attr=curses.A_BOLD, delay=0)
+
+    assert rows(backend, 1, 2) == ["│ one two three              │"]
+    assert box.stats.addstr_calls == 1
+
+
+def test_char_by_char_does_not_drift():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    log = []
+
+    def slow_write(box, win, char, index):
+        log.append((backend.clock.now, box.typing_lag))
+        backend.clock.advance(7)
+
+    box.char_by_char("abcd", backend.stdscr, delay=100,
+                     callbacks=[slow_write])
+
+    # Time spent writing is taken from the next wait.
+    assert log == [(100, 0), (200, 0), (300, 0), (400, 0)]
+
+
+def test_scroll_moves_viewport():
+    backend = VirtualBackend(lines=9, cols=40,
+                             keys=("KEY_DOWN", "KEY_NPAGE", " "))
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    assert box.scroll(WORDS, backend.stdscr) == 4
+    assert rows(backend, 1, 4) == [
+        "│ word12 word13 word14     ▲ │",
+        "│ word15 word16 word17       │",
+        "│ word18 word19 word20     ▼ │",
+    ]
+
+
+def test_scroll_stops_at_end():
+    backend = VirtualBackend(lines=9, cols=40, keys=("KEY_END", " "))
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    assert box.scroll(WORDS, backend.stdscr) == 11
+    assert rows(backend, 1, 4) == [
+        "│ word33 word34 word35     ▲ │",
+        "│ word36 word37 word38       │",
+        "│ word39                     │",
+    ]
+
+
+@pytest.mark.parametrize("method, args", [
+    ("scroll", (WORDS,)),
+])
+def test_replay_reproduces_screen(method, args):
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys("KEY_DOWN", at=500)
+    backend.push_keys("KEY_DOWN", at=800)
+    backend.push_keys(" ", at=1500)
+    box = ChoiceBox(0, 0, 30, 7, "Pick", backend=backend)
+
+    session = io.BytesIO()
+    with SessionRecorder(session) as recorder:
+        recorder.attach(box)
+        getattr(box, method)(*args, backend.stdscr)
+
+    replayer = SessionReplayer(io.BytesIO(session.getvalue()))
+    other = VirtualBackend(lines=9, cols=40)
+    replayed = ChoiceBox(0, 0, 30, 7, "Pick", backend=other)
+    replayer.replay(replayed, win=other.stdscr)
+
+    assert other.display() == backend.display()
+    assert other.clock.now == backend.clock.now
+
+
+def test_frames_group_writes():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=1000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.frame_interval = 50
+
+    screens = []
+
+    def watch(box, win, char, index):
+        screens.append((backend.clock.now,
+                        backend.display()[1][2:12].rstrip()))
+
+    box.char_by_char("abcdefghij", backend.stdscr, delay=10,
+                     callbacks=[watch])
+
+    # Five characters are displayed at once every 50 ms.
+    assert screens[4:6] == [(50, "abcde"), (50, "abcde")]
+    assert screens[9] == (100, "abcdefghij")
+    assert backend.refresh_calls == 0
+    assert backend.noutrefresh_calls == 10
+    assert backend.doupdate_calls < 10
+
+
+@pytest.mark.parametrize("method", ["char_by_char", "word_by_word"])
+def test_async_methods_write_like_blocking_ones(method):
+    results = []
+    for asynchronous in (False, True):
+        backend = VirtualBackend(lines=9, cols=40)
+        backend.push_keys(" ", at=1000)
+        backend.push_keys(" ", at=2000)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+
+        times = []
+        args = (" ".join(WORDS.split()[:12]), backend.stdscr)
+        kwargs = dict(delay=10, callbacks=[
+            lambda box, *args: times.append(backend.clock.now)])
+        if asynchronous:
+            asyncio.run(getattr(box, f"a{method}")(*args, **kwargs))
+        else:
+            getattr(box, method)(*args, **kwargs)
+        results.append((backend.display(), times, backend.clock.now))
+
+    assert results[0] == results[1]
+
+
+def typing_times(box, backend, text):
+    """Return the times at which ``box`` writes the characters of
+    ``text``.
+    """
+    times = []
+    box.char_by_char(text, backend.stdscr, delay=100, callbacks=[
+        lambda box, win, char, index: times.append(backend.clock.now)])
+    return times
+
+
+@pytest.mark.parametrize("allow_skip", [False, True])
+def test_confirmation_skips_to_end_of_page(allow_skip):
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=150)
+    backend.push_keys(" ", at=2000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.allow_skip = allow_skip
+
+    times = typing_times(box, backend, "abcdef")
+
+    if allow_skip:
+        assert times == [100, 200, 200, 200, 200, 200]
+    else:
+        assert times == [100, 200, 300, 400, 500, 600]
+    # Keys pressed while writing do not confirm the page.
+    assert backend.clock.now == 2000
+    assert rows(backend, 1, 2) == ["│ abcdef                     │"]
+
+
+def test_held_key_fast_forwards():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys("f", "f")
+    backend.push_keys(" ", at=2000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.fast_forward_keys = ["f"]
+
+    # Acceleration lasts until the next repetition of the key is
+    # expected.
+    assert typing_times(box, backend, "abcdef") == [25, 50, 75, 100, 125,
+                                                    225]
+
+
+def test_stream_writes_lines_as_received():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    screens = []
+
+    def fragments():
+        for fragment in ("Hel", "lo wor", "ld\n", "\nnext"):
+            yield fragment
+            screens.append(rows(backend, 1, 4))
+
+    box.stream(fragments(), backend.stdscr, delay=0)
+
+    # Lines are written as soon as they are complete.
+    assert "Hello" not in "".join(screens[1])
+    assert screens[2][0] == "│ Hello world                │"
+    # Line breaks are kept.
+    assert rows(backend, 1, 4) == [
+        "│ Hello world                │",
+        "│                            │",
+        "│ next                       │",
+    ]
+
+
+@pytest.mark.parametrize("method", ["char_by_char", "word_by_word"])
+def test_astream_writes_like_stream(method):
+    texts = ("first line\n", "\n", "third ", "line, ", "fourth line\n",
+             "fifth line")
+
+    async def afragments():
+        for fragment in texts:
+            yield fragment
+
+    results = []
+    for asynchronous in (False, True):
+        backend = VirtualBackend(lines=9, cols=40)
+        backend.push_keys(" ", at=1000)
+        backend.push_keys(" ", at=2000)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+
+        if asynchronous:
+            asyncio.run(box.astream(afragments(), backend.stdscr,
+                                    delay=10, method=method))
+        else:
+            box.stream(texts, backend.stdscr, delay=10, method=method)
+        results.append((backend.display(), backend.clock.now))
+
+    assert results[0] == results[1]
+    assert rows(backend, 1, 2) == ["│ fifth line                 │"]
+
+
+@pytest.mark.parametrize("method", ["char_by_char", "word_by_word"])
+def test_lazy_layout_matches_eager_layout(method):
+    text = " ".join(f"{word}," for word in WORDS.split())
+    screens = []
+    for threshold in (None, 10):
+        backend = VirtualBackend(lines=9, cols=40, keys=" " * 5)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+        box.layout_cache = LayoutCache()
+        box.lazy_layout_threshold = threshold
+
+        pages = []
+        getattr(box, method)(text, backend.stdscr, delay=0, callbacks=[
+            lambda box, *args: pages.append(rows(backend, 1, 4))])
+        screens.append((pages, backend.clock.now))
+        # Long texts are not cached.
+        assert len(box.layout_cache) == (threshold is None)
+
+    assert screens[0] == screens[1]
+    assert screens[0][0][-1] == ["│ word36, word37, word38,    │",
+                                 "│ word39,                    │",
+                                 "│                            │"]
+
+
+def test_attributes_are_combined():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    box.char_by_char("Hello world", backend.stdscr, colors_pair_nb=2,
+                     text_attr=(curses.A_BOLD, curses.A_UNDERLINE),
+                     words_attr={"world": (curses.A_REVERSE,
+                                           curses.A_DIM)},
+                     delay=0)
+
+    text_attr = backend.color_pair(2) | curses.A_BOLD | curses.A_UNDERLINE
+    assert attrs(backend, 1, 2, 8) == [text_attr] * 5 + [0]
+    assert attrs(backend, 1, 8, 14) == [curses.A_REVERSE
+                                        | curses.A_DIM] * 5 + [0]
+
+
+class FrameCountingBackend(VirtualBackend):
+    """A virtual backend counting off-screen windows, on which frames
+    are drawn.
+    """
+    newwin_calls = 0
+
+    def newwin(self, *args):
+        self.newwin_calls += 1
+        return super().newwin(*args)
+
+
+def test_frame_is_drawn_once():
+    backend = FrameCountingBackend(lines=9, cols=40, keys=" " * 3)
+    box = DialogBox(0, 0, 30, 6, "Timothy", backend=backend)
+    # Without the standard screen.
+    backend.newwin_calls = 0
+
+    box.char_by_char("first", backend.stdscr, delay=0)
+    box.word_by_word("second", backend.stdscr, delay=0)
+    assert backend.newwin_calls == 1
+
+    box.title = "Tim"
+    box.char_by_char("third", backend.stdscr, delay=0)
+    assert backend.newwin_calls == 2
+    assert rows(backend, 0, 4) == [
+        " ┌─────┐",
+        " │ Tim │",
+        "┌────────────────────────────┐",
+        "│ third                      │",
+    ]
+
+
+@pytest.mark.parametrize("clear_window", [False, True])
+def test_boxes_erase_only_their_rectangle(clear_window):
+    backend = VirtualBackend(lines=9, cols=70, keys=" " * 3)
+    left = DialogBox(0, 0, 30, 6, backend=backend)
+    right = DialogBox(35, 0, 30, 6, backend=backend)
+    right.clear_window = clear_window
+
+    left.char_by_char("left", backend.stdscr, delay=0)
+    right.char_by_char(" ".join(WORDS.split()[:12]), backend.stdscr,
+                       delay=0)
+
+    if clear_window:
+        assert rows(backend, 1, 2) == [
+            "                                   │ word09 word10 word11       │"
+        ]
+    else:
+        assert rows(backend, 1, 2) == [
+            "│ left                       │     │ word09 word10 word11       │"
+        ]
+    # Lines of the previous page are erased.
+    assert [line[35:] for line in rows(backend, 2, 4)] == [
+        "│                            │"] * 2
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_get_input_calls_idle_callbacks(asynchronous):
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys("x", at=250)
+    backend.push_keys(" ", at=700)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.input_timeout = 200
+
+    idle = []
+    box.idle_callbacks = [
+        lambda box, win, elapsed: idle.append(elapsed)]
+    if asynchronous:
+        asyncio.run(box.aget_input(backend.stdscr))
+    else:
+        box.get_input(backend.stdscr)
+
+    # Pressing another key does not restart the count.
+    assert idle == [200, 450, 650]
+    assert backend.clock.now == 700
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_pages_auto_advance(asynchronous):
+    backend = VirtualBackend(lines=9, cols=40)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.auto_advance = 500
+
+    args = (" ".join(WORDS.split()[:12]), backend.stdscr)
+    if asynchronous:
+        asyncio.run(box.achar_by_char(*args, delay=0))
+    else:
+        box.char_by_char(*args, delay=0)
+
+    # Both pages are displayed without key pressed.
+    assert backend.clock.now == 1000
+    assert rows(backend, 1, 2) == ["│ word09 word10 word11       │"]
+
+
+def test_history_displays_previous_pages():
+    backend = VirtualBackend(lines=9, cols=40, keys=(
+        " ", " ", "KEY_UP", "KEY_UP", "KEY_UP", "KEY_DOWN", " ", " "))
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.history = PageHistory()
+
+    screens = []
+
+    def read_key(win, timeout):
+        screens.append(rows(backend, 1, 2)[0][2:8])
+        return win.getkey()
+
+    box.key_source = read_key
+    box.char_by_char(" ".join(WORDS.split()[:27]), backend.stdscr,
+                     delay=0)
+
+    # Confirming while a previous page is displayed brings back the
+    # current one.
+    assert screens == ["word00", "word09", "word18", "word09", "word00",
+                       "word00", "word09", "word18"]
+    assert len(box.history) == 3
@@ -0,0 +1,183 @@
+# test_layout.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import curses
+import re
+import textwrap
+
+from visualdialog import DialogBox, VirtualBackend
+from visualdialog.layout import (CacheInfo, Highlighter, LayoutCache,
+                                 PageHistory, PersistentLayoutCache, Run,
+                                 coalesce_runs)
+
+
+def highlighted(words_attr, text):
+    """Return the parts of ``text`` highlighted by ``words_attr`` with
+    their attributes.
+    """
+    return [(text[start:end], attr)
+            for start, end, attr in Highlighter(words_attr).spans(text)]
+
+
+def test_highlighter_finds_words_and_phrases():
+    words_attr = {"new": 1, "new york": 2, ("test", "tests"): 4}
+
+    assert highlighted(words_attr, "Test tests, then new york. new!") == [
+        ("tests", 4), ("new york", 2), ("new", 1)]
+    # Words are not found inside other words.
+    assert highlighted(words_attr, "renew newest") == []
+
+
+def test_highlighter_prefers_words_at_same_position():
+    words_attr = {re.compile(r"\w+"): 1, "york": 2}
+
+    assert highlighted(words_attr, "new york") == [("new", 1), ("york", 2)]
+
+
+def test_highlighter_keeps_groups_of_patterns():
+    words_attr = {"kee": 1, re.compile(r"(\w)\1"): 2}
+
+    assert highlighted(words_attr, "bookkeeper") == [
+        ("oo", 2), ("kk", 2), ("ee", 2)]
+
+
+def test_highlighter_keeps_flags_of_patterns():
+    words_attr = {re.compile(r"(?i)foo"): 1,
+                  re.compile(r"\w+", re.ASCII): 2}
+
+    assert highlighted(words_attr, "FOO été") == [("FOO", 1), ("t", 2)]
+
+
+def test_highlighter_ignores_empty_matches():
+    words_attr = {re.compile(r"x*"): 1, re.compile(r"y"): 2}
+
+    assert highlighted(words_attr, "axy") == [("x", 1), ("y", 2)]
+
+
+def test_coalesce_runs_merges_same_attributes():
+    line = (Run(0, 0, "one", 1), Run(0, 4, "two", 1),
+            Run(0, 8, "three", 2), Run(0, 13, "!", 2, True))
+
+    assert coalesce_runs(line) == (Run(0, 0, "one two", 1),
+                                   Run(0, 8, "three!", 2))
+
+
+def test_coalesce_runs_keeps_visible_blanks_plain():
+    underline = curses.A_UNDERLINE
+    line = (Run(0, 0, "one", underline), Run(0, 4, "two", underline),
+            Run(0, 7, "s", underline, True))
+
+    assert coalesce_runs(line) == (Run(0, 0, "one", underline),
+                                   Run(0, 4, "twos", underline))
+
+
+def test_layout_cache_reuses_plans():
+    cache = LayoutCache(maxsize=2)
+    wrapper = textwrap.TextWrapper(width=10)
+
+    plan = cache.get_plan("one two three", wrapper, 2, 0, {}, " ")
+    assert plan.pages == ((
+        (Run(0, 0, "one", 0), Run(0, 4, "two", 0)),
+        (Run(1, 0, "three", 0),),
+    ),)
+    other = cache.get_plan("one two three", wrapper, 1, 0, {}, " ")
+    assert other != plan
+    assert cache.get_plan("one two three", wrapper, 2, 0, {}, " ") is plan
+
+    cache.get_plan("four", wrapper, 2, 0, {}, " ")
+    # The least recently used plan is discarded.
+    assert cache.get_plan("one two three", wrapper, 2, 0, {}, " ") is plan
+    assert cache.get_plan("one two three", wrapper, 1, 0, {}, " ") is not other
+    assert cache.cache_info() == CacheInfo(hits=2, misses=4,
+                                           maxsize=2, currsize=2)
+
+
+def test_boxes_share_layout_cache():
+    cache = LayoutCache()
+    screens = []
+    for _ in range(2):
+        backend = VirtualBackend(lines=9, cols=40, keys=" ")
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+        box.layout_cache = cache
+        box.word_by_word("Hello world", backend.stdscr, delay=0)
+        screens.append(backend.display())
+
+    assert screens[0] == screens[1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_persistent_cache_keeps_plans_between_runs(tmp_path):
+    path = tmp_path / "layouts.cache"
+    wrapper = textwrap.TextWrapper(width=10)
+    words_attr = {re.compile("t[a-z]+"): 1}
+
+    with PersistentLayoutCache(path) as cache:
+        plan = cache.get_plan("one two three", wrapper, 2, 0, words_attr,
+                              " ")
+        assert cache.loads == 0
+
+    with PersistentLayoutCache(path) as cache:
+        assert cache.get_plan("one two three", wrapper, 2, 0, words_attr,
+                              " ") == plan
+        assert cache.loads == 1
+
+        # Plans are laid out again when anything changes.
+        cache.get_plan("one two four", wrapper, 2, 0, words_attr, " ")
+        cache.get_plan("one two three", wrapper, 2, 0,
+                       {re.compile("t[a-z]+", re.I): 1}, " ")
+        cache.get_plan("one two three", textwrap.TextWrapper(width=8), 2,
+                       0, words_attr, " ")
+        assert cache.loads == 1
+
+
+def test_persistent_cache_ignores_other_versions(tmp_path):
+    path = tmp_path / "layouts.cache"
+    wrapper = textwrap.TextWrapper(width=10)
+
+    with PersistentLayoutCache(path) as cache:
+        cache.get_plan("one two three", wrapper, 2, 0, {}, " ")
+    data = bytearray(path.read_bytes())
+    # Version of the file.
+    data[4] += 1
+    path.write_bytes(data)
+
+    with PersistentLayoutCache(path) as cache:
+        cache.get_plan("one two three", wrapper, 2, 0, {}, " ")
+        assert cache.loads == 0
+
+    with PersistentLayoutCache(path) as cache:
+        cache.get_plan("one two three", wrapper, 2, 0, {}, " ")
+        assert cache.loads == 1
+
+
+def test_persistent_cache_prunes_unused_plans(tmp_path):
+    path = tmp_path / "layouts.cache"
+    wrapper = textwrap.TextWrapper(width=10)
+
+    with PersistentLayoutCache(path) as cache:
+        cache.get_plan("old", wrapper, 2, 0, {}, " ")
+        cache.get_plan("new", wrapper, 2, 0, {}, " ")
+    size = path.stat().st_size
+
+    cache = PersistentLayoutCache(path)
+    cache.get_plan("new", wrapper, 2, 0, {}, " ")
+    cache.save(prune=True)
+    cache.close()
+    assert path.stat().st_size < size
+
+    with PersistentLayoutCache(path) as cache:
+        cache.get_plan("old", wrapper, 2, 0, {}, " ")
+        assert cache.loads == 0
+
+
+def test_page_history_discards_oldest_pages():
+    history = PageHistory(max_bytes=200)
+    pages = [((Run(0, 0, f"page{i:02}", 0),),) for i in range(20)]
+
+    for page in pages:
+        history.append(page)
+
+    assert 0 < len(history) < 20
+    assert history.nbytes <= 200
+    assert history[-1] == pages[-1]
+    assert history[0] == pages[-len(history)]
@@ -0,0 +1,72 @@
+# test_record.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import io
+
+import pytest
+
+from visualdialog import (DialogBox, SessionRecorder, SessionReplayer,
+                          VirtualBackend)
+
+
+def recorded(box, play):
+    """Return the session recorded while ``play`` is called with
+    ``box``.
+    """
+    session = io.BytesIO()
+    with SessionRecorder(session) as recorder:
+        recorder.attach(box)
+        play(box)
+    return SessionReplayer(io.BytesIO(session.getvalue()))
+
+
+def test_replay_reproduces_random_delays():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=3000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    session = recorded(box, lambda box: box.char_by_char(
+        "Hello world", backend.stdscr, delay=0, random_delay=(10, 90)))
+
+    other = VirtualBackend(lines=9, cols=40)
+    replayed = DialogBox(0, 0, 30, 6, backend=other)
+    replay = recorded(replayed,
+                      lambda box: session.replay(box, win=other.stdscr))
+
+    assert other.display() == backend.display()
+    assert other.clock.now == backend.clock.now == 3000
+    # Characters are written at the same random times.
+    assert replay.events == session.events
+    times = [at for at, _, kind, *_ in session.events if kind == "draw"]
+    assert len({b - a for a, b in zip(times, times[1:])}) > 1
+
+
+def test_replay_reproduces_streams():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", " ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    def fragments():
+        for fragment in ("first line\n", "\n", "third line"):
+            backend.clock.advance(300)
+            yield fragment
+
+    session = recorded(box, lambda box: box.stream(
+        fragments(), backend.stdscr, delay=10))
+
+    other = VirtualBackend(lines=9, cols=40)
+    replayed = DialogBox(0, 0, 30, 6, backend=other)
+    session.replay(replayed, win=other.stdscr)
+
+    assert [line.rstrip() for line in other.display()[1:4]] == [
+        "│ first line                 │",
+        "│                            │",
+        "│ third line                 │",
+    ]
+    assert other.display() == backend.display()
+    assert other.clock.now == backend.clock.now
+
+
+def test_replayer_refuses_other_files():
+    with pytest.raises(ValueError):
+        SessionReplayer(io.BytesIO(b"not a session"))
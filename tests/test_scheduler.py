@@ -0,0 +1,198 @@
+# test_scheduler.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import pytest
+
+from visualdialog import DialogBox, Scheduler, VirtualBackend
+
+
+class CheckedBackend(VirtualBackend):
+    """A virtual backend refusing negative waiting times, as
+    ``time.sleep`` does.
+    """
+    def napms(self, ms: int):
+        assert ms >= 0
+        super().napms(ms)
+
+
+def rows(backend, start, stop):
+    """Return displayed lines ``start`` to ``stop`` without trailing
+    spaces.
+    """
+    return [line.rstrip() for line in backend.display()[start:stop]]
+
+
+def writes(log, name, backend):
+    """Return a callback appending ``name``, the character written and
+    the time of ``backend`` to ``log``.
+    """
+    def callback(box, win, char, index):
+        log.append((name, char, backend.clock.now))
+    return callback
+
+
+def test_run_interleaves_boxes():
+    backend = CheckedBackend(lines=9, cols=70)
+    backend.push_keys(" ", at=1000)
+    backend.push_keys(" ", at=1200)
+    left = DialogBox(0, 0, 30, 6, backend=backend)
+    right = DialogBox(35, 0, 30, 6, backend=backend)
+
+    log = []
+    scheduler = Scheduler(backend.stdscr)
+    scheduler.add(left, "abc", delay=100,
+                  callbacks=[writes(log, "left", backend)])
+    scheduler.add(right, "xyz", delay=150,
+                  callbacks=[writes(log, "right", backend)])
+    scheduler.run()
+
+    assert log == [("left", "a", 100), ("right", "x", 150),
+                   ("left", "b", 200), ("right", "y", 300),
+                   ("left", "c", 300), ("right", "z", 450)]
+    assert rows(backend, 1, 2) == [
+        "│ abc                        │     │ xyz                        │"
+    ]
+    # Each box waits for its own confirmation.
+    assert backend.clock.now == 1200
+    # The screen is only updated by the scheduler.
+    assert backend.refresh_calls == 0
+
+
+def test_run_goes_on_after_page_delay():
+    backend = CheckedBackend(lines=9, cols=40)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    scheduler = Scheduler(backend.stdscr)
+    scheduler.add(box, "abcd", delay=0, page_delay=500)
+    scheduler.run()
+
+    assert rows(backend, 1, 2) == ["│ abcd                       │"]
+    assert backend.clock.now == 500
+
+
+def test_run_restores_boxes():
+    backend = CheckedBackend(lines=9, cols=40, keys="  ")
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.clear_window = True
+
+    Scheduler(backend.stdscr).add(box, "abc", delay=0).run()
+
+    assert box.clear_window
+    box.char_by_char("def", backend.stdscr, delay=0)
+    assert backend.refresh_calls
+
+
+def test_run_skips_to_end_of_page():
+    backend = CheckedBackend(lines=9, cols=70)
+    backend.push_keys(" ", at=150)
+    backend.push_keys(" ", at=1000)
+    backend.push_keys(" ", at=2000)
+    left = DialogBox(0, 0, 30, 6, backend=backend)
+    left.allow_skip = True
+    right = DialogBox(35, 0, 30, 6, backend=backend)
+
+    log = []
+    scheduler = Scheduler(backend.stdscr)
+    scheduler.add(left, "abcdef", delay=100,
+                  callbacks=[writes(log, "left", backend)])
+    scheduler.add(right, "xyz", delay=300,
+                  callbacks=[writes(log, "right", backend)])
+    scheduler.run()
+
+    # The key is read by the left box at its next write, the right
+    # one goes on at its own speed.
+    assert log == [("left", "a", 100), ("left", "b", 200),
+                   ("left", "c", 200), ("left", "d", 200),
+                   ("left", "e", 200), ("left", "f", 200),
+                   ("right", "x", 300), ("right", "y", 600),
+                   ("right", "z", 900)]
+    assert backend.refresh_calls == 0
+
+
+def test_run_fast_forwards():
+    backend = CheckedBackend(lines=9, cols=40)
+    backend.push_keys("f", "f")
+    backend.push_keys(" ", at=2000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.fast_forward_keys = ["f"]
+
+    log = []
+    scheduler = Scheduler(backend.stdscr)
+    scheduler.add(box, "abcdef", delay=100,
+                  callbacks=[writes(log, "box", backend)])
+    scheduler.run()
+
+    assert [time for _, _, time in log] == [25, 50, 75, 100, 125, 225]
+
+
+def test_run_groups_writes_by_frames():
+    updates = []
+    for frame_interval in (0, 250):
+        backend = CheckedBackend(lines=9, cols=40)
+        backend.push_keys(" ", at=2000)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+        box.frame_interval = frame_interval
+
+        Scheduler(backend.stdscr).add(box, "abcdefghij", delay=100).run()
+        updates.append(backend.doupdate_calls)
+
+    assert updates[1] < updates[0]
+
+
+def slow_writes(log, backend, cost):
+    """Return a callback logging the time of ``backend`` and the typing
+    lag of the box, then taking ``cost`` milliseconds.
+    """
+    def callback(box, win, char, index):
+        log.append((backend.clock.now, box.typing_lag))
+        backend.clock.advance(cost)
+    return callback
+
+
+@pytest.mark.parametrize("cost", [7, 400])
+def test_run_waits_like_a_box_alone(cost):
+    logs = []
+    for scheduled in (False, True):
+        backend = CheckedBackend(lines=9, cols=40)
+        backend.push_keys(" ", at=5000)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+
+        log = []
+        callbacks = [slow_writes(log, backend, cost)]
+        if scheduled:
+            Scheduler(backend.stdscr).add(box, "abcde", delay=100,
+                                          callbacks=callbacks).run()
+        else:
+            box.char_by_char("abcde", backend.stdscr, delay=100,
+                             callbacks=callbacks)
+        logs.append(log)
+
+    assert logs[0] == logs[1]
+
+
+def test_run_does_not_drift():
+    backend = CheckedBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=5000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    log = []
+    Scheduler(backend.stdscr).add(
+        box, "abcde", delay=100,
+        callbacks=[slow_writes(log, backend, 7)]).run()
+
+    # Time spent writing is taken from the next wait.
+    assert log == [(100, 0), (200, 0), (300, 0), (400, 0), (500, 0)]
+
+
+def test_run_gives_up_catching_up():
+    backend = CheckedBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=5000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    log = []
+    Scheduler(backend.stdscr).add(
+        box, "abc", delay=100,
+        callbacks=[slow_writes(log, backend, 400)]).run()
+
+    # Writes more than 250 ms late start again from their time.
+    assert log == [(100, 0), (500, 300), (900, 300)]
@@ -0,0 +1,91 @@
+# test_script.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import curses
+import json
+import os
+
+import pytest
+
+from visualdialog import DialogBox, DialogueScript, ScriptEntry, VirtualBackend
+
+
+def write_script(path, *entries):
+    """Write ``entries`` to the script at ``path``, separated by an
+    empty line.
+    """
+    path.write_text("\n\n".join(json.dumps(entry) for entry in entries),
+                    encoding="utf-8")
+
+
+def test_entries_are_parsed(tmp_path):
+    path = tmp_path / "script.jsonl"
+    write_script(path,
+                 {"speaker": "Phoenix", "style": "left",
+                  "text": "Objection !"},
+                 {"speaker": "April", "text": "Arghh !",
+                  "attrs": ["A_BOLD", "A_UNDERLINE"], "delay": 30},
+                 {"text": "oops", "attrs": "bold"})
+
+    with DialogueScript(path) as script:
+        assert len(script) == 3
+        assert script[0] == ScriptEntry("Phoenix", "left", "Objection !",
+                                        0, {})
+        assert script[-2] == ScriptEntry(
+            "April", "April", "Arghh !",
+            curses.A_BOLD | curses.A_UNDERLINE, {"delay": 30})
+        with pytest.raises(ValueError):
+            script[2]
+
+
+def test_index_is_built_again_when_script_changes(tmp_path, monkeypatch):
+    path = tmp_path / "script.jsonl"
+    write_script(path, {"text": "one"}, {"text": "two"})
+
+    with DialogueScript(path) as script:
+        assert [entry.text for entry in script] == ["one", "two"]
+    assert os.path.exists(f"{path}.idx")
+
+    scans = []
+    scan = DialogueScript._scan
+    monkeypatch.setattr(DialogueScript, "_scan",
+                        lambda self: scans.append(self) or scan(self))
+
+    with DialogueScript(path) as script:
+        assert len(script) == 2
+    # The index file is used.
+    assert not scans
+
+    write_script(path, {"text": "one"}, {"text": "two"}, {"text": "3"})
+    with DialogueScript(path) as script:
+        assert [entry.text for entry in script] == ["one", "two", "3"]
+    assert len(scans) == 1
+
+
+def test_index_is_kept_in_memory_if_not_writable(tmp_path):
+    path = tmp_path / "script.jsonl"
+    write_script(path, {"text": "one"})
+
+    index_path = tmp_path / "missing" / "script.idx"
+    with DialogueScript(path, index_path) as script:
+        assert script[0].text == "one"
+    assert not index_path.exists()
+
+
+def test_play_displays_entries_on_boxes(tmp_path):
+    path = tmp_path / "script.jsonl"
+    write_script(path,
+                 {"speaker": "Tim", "style": "left", "text": "Hello",
+                  "delay": 0},
+                 {"speaker": "Tom", "style": "right", "text": "world",
+                  "method": "word_by_word", "delay": 0})
+    backend = VirtualBackend(lines=9, cols=70, keys=" " * 2)
+    boxes = {"left": DialogBox(0, 0, 30, 6, backend=backend),
+             "right": DialogBox(35, 0, 30, 6, backend=backend)}
+
+    with DialogueScript(path) as script:
+        script.play(boxes, backend.stdscr)
+
+    assert [line.rstrip() for line in backend.display()[1:2]] == [
+        "│ Hello                      │     │ world                      │"
+    ]
@@ -0,0 +1,69 @@
+# test_stats.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+from visualdialog import (ChoiceBox, DialogBox, RenderStats, Scheduler,
+                          VirtualBackend)
+
+
+def test_stats_count_writes_and_times():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=1000)
+    backend.push_keys(" ", at=2000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+    box.stats = RenderStats()
+    pages = []
+    box.stats_sinks.append(lambda box, stats: pages.append(stats.pages))
+
+    text = "héllo 日本 " + " ".join(["word"] * 14)
+    box.char_by_char(text, backend.stdscr, delay=10,
+                     callbacks=[lambda *_: backend.clock.advance(1)])
+
+    stats = box.stats
+    assert (stats.texts, stats.pages) == (1, 2)
+    # Sinks are given the statistics after each page.
+    assert pages == [1, 2]
+    assert stats.chars_drawn == stats.addstr_calls == 63
+    assert stats.bytes_drawn == 63 + 1 + 2 * 2
+    assert stats.refreshes == backend.refresh_calls
+    # Times are measured with the clock of the backend.
+    assert stats.callback_time == 63
+    assert stats.total_time == 2000
+    assert stats.sleep_time + stats.callback_time + stats.input_time == 2000
+
+
+def test_stats_of_scheduled_boxes():
+    results = []
+    for scheduled in (False, True):
+        backend = VirtualBackend(lines=9, cols=40)
+        backend.push_keys(" ", at=1000)
+        box = DialogBox(0, 0, 30, 6, backend=backend)
+        box.stats = RenderStats()
+
+        if scheduled:
+            Scheduler(backend.stdscr).add(box, "abc", delay=100).run()
+        else:
+            box.char_by_char("abc", backend.stdscr, delay=100)
+        results.append(box.stats.as_dict())
+
+    # Updates are done by the scheduler instead of refreshes.
+    assert results[0].pop("updates") == 0
+    assert results[1].pop("updates") > 0
+    assert results[0] == results[1]
+
+
+def test_stats_count_refreshes_of_menus():
+    backend = VirtualBackend(lines=9, cols=40, keys=("KEY_DOWN", " "))
+    menu = ChoiceBox(0, 0, 30, 7, backend=backend)
+    menu.stats = RenderStats()
+
+    menu.chain(["a", "b"], backend.stdscr)
+
+    assert menu.stats.refreshes == backend.refresh_calls == 2
+
+
+def test_reset():
+    stats = RenderStats()
+    stats.drawn("日本")
+    stats.reset()
+
+    assert not any(stats.as_dict().values())
@@ -0,0 +1,24 @@
+# test_utils.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import curses
+
+from visualdialog import TextAttr, VirtualBackend, combine_attrs
+
+
+def test_combine_attrs():
+    assert combine_attrs() == 0
+    assert (combine_attrs(curses.A_BOLD, curses.A_UNDERLINE, curses.A_BOLD)
+            == curses.A_BOLD | curses.A_UNDERLINE)
+
+
+def test_text_attr_enables_attributes_while_writing():
+    backend = VirtualBackend(lines=5, cols=10)
+    win = backend.stdscr
+
+    with TextAttr(win, curses.A_BOLD, curses.A_UNDERLINE):
+        win.addstr(0, 0, "a")
+    win.addstr(0, 1, "b")
+
+    assert win.attr_at(0, 0) == curses.A_BOLD | curses.A_UNDERLINE
+    assert win.attr_at(0, 1) == 0
@@ -0,0 +1,126 @@
+# test_virtual.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import curses
+
+import pytest
+
+from visualdialog import DialogBox, InputExhausted, VirtualBackend
+
+
+WORDS = " ".join(f"word{i:02}" for i in range(40))
+
+
+def rows(backend, start, stop):
+    """Return displayed lines ``start`` to ``stop`` without trailing
+    spaces.
+    """
+    return [line.rstrip() for line in backend.display()[start:stop]]
+
+
+def test_char_by_char_displays_text_in_frame():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 30, 6, "Tim", backend=backend)
+
+    box.char_by_char("Hello world", backend.stdscr, delay=10)
+
+    assert rows(backend, 0, 8) == [
+        " ┌─────┐",
+        " │ Tim │",
+        "┌────────────────────────────┐",
+        "│ Hello world                │",
+        "│                            │",
+        "│                            │",
+        "│                          ► │",
+        "└────────────────────────────┘",
+    ]
+    # Delays are waited on the clock of the backend.
+    assert backend.clock.now >= 10 * len("Hello world")
+
+
+def test_char_by_char_waits_confirmation_between_pages():
+    backend = VirtualBackend(lines=9, cols=40)
+    backend.push_keys(" ", at=1000)
+    backend.push_keys(" ", at=2000)
+    box = DialogBox(0, 0, 30, 6, backend=backend)
+
+    box.char_by_char(" ".join(WORDS.split()[:14]), backend.stdscr, delay=0)
+
+    assert rows(backend, 0, 6) == [
+        "┌────────────────────────────┐",
+        "│ word09 word10 word11       │",
+        "│ word12 word13              │",
+        "│                            │",
+        "│                          ► │",
+        "└────────────────────────────┘",
+    ]
+    assert backend.clock.now == 2000
+
+
+def test_pad_refresh_matches_curses():
+    backend = VirtualBackend(lines=9, cols=40)
+    pad = backend.newpad(20, 10)
+    pad.addstr(5, 0, "pad")
+
+    assert not hasattr(pad, "pnoutrefresh")
+    with pytest.raises(curses.error):
+        pad.noutrefresh()
+
+    pad.refresh(5, 0, 2, 3, 2, 12)
+    assert rows(backend, 2, 3) == ["   pad"]
+
+
+def test_updates_only_send_changes():
+    backend = VirtualBackend(lines=5, cols=10)
+    win = backend.stdscr
+
+    win.addstr(0, 0, "hello")
+    win.noutrefresh()
+    # Nothing is displayed before the update.
+    assert rows(backend, 0, 1) == [""]
+
+    backend.doupdate()
+    assert rows(backend, 0, 1) == ["hello"]
+    assert backend.cells_updated == 5
+
+    win.addstr(0, 0, "help")
+    win.refresh()
+    assert rows(backend, 0, 1) == ["helpo"]
+    assert backend.cells_updated == 6
+
+
+def test_windows_behave_like_curses():
+    backend = VirtualBackend(lines=5, cols=10)
+    win = backend.stdscr
+
+    sub = win.derwin(2, 4, 1, 1)
+    sub.addstr(0, 0, "ab")
+    # Derived windows share their characters with their parent.
+    assert win.text()[1] == " ab       "
+
+    with pytest.raises(curses.error):
+        win.addstr(5, 0, "x")
+    with pytest.raises(curses.error):
+        win.addstr(4, 9, "x")
+
+
+def test_keys_are_read_on_the_clock():
+    backend = VirtualBackend(lines=5, cols=10)
+    win = backend.stdscr
+
+    backend.push_keys("a", at=100)
+    backend.push_keys("b")
+    backend.napms(10)
+    # Keys typed later and keys without time are kept.
+    backend.flushinp()
+
+    assert win.getkey() == "a"
+    assert backend.clock.now == 100
+    win.timeout(50)
+    assert win.getkey() == "b"
+    assert win.getch() == -1
+    assert backend.clock.now == 150
+
+    win.timeout(-1)
+    with pytest.raises(InputExhausted):
+        win.getkey()
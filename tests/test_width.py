@@ -0,0 +1,49 @@
+# test_width.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+import pytest
+
+from visualdialog import (DialogBox, VirtualBackend, WidthTextWrapper,
+                          char_width, fit, graphemes, text_width)
+
+
+@pytest.mark.parametrize("char, width", [
+    ("a", 1), ("é", 1), ("語", 2), ("Ａ", 2), ("\u0301", 0), ("\t", 0),
+])
+def test_char_width(char, width):
+    assert char_width(char) == width
+
+
+def test_graphemes_keep_characters_together():
+    text = "e\u0301t👩\u200d💻"
+
+    assert graphemes(text) == ["e\u0301", "t", "👩\u200d💻"]
+    assert text_width(text) == 4
+
+
+def test_fit_does_not_cut_characters():
+    assert fit("a日本", 2) == 1
+    assert fit("a日本", 3) == 2
+    assert fit("e\u0301t", 1) == 2
+
+
+def test_wrapper_measures_columns():
+    wrapper = WidthTextWrapper(width=6)
+
+    assert wrapper.wrap("ab 日本語") == ["ab", "日本語"]
+    # Long words are cut between characters.
+    assert wrapper.wrap("日本語テキスト") == ["日本語", "テキス", "ト"]
+    assert WidthTextWrapper(width=1).wrap("日本") == ["日", "本"]
+
+
+def test_wide_characters_are_wrapped_in_box():
+    backend = VirtualBackend(lines=9, cols=40, keys=" ")
+    box = DialogBox(0, 0, 16, 6, backend=backend)
+
+    box.char_by_char("日本語のテキストを表示します ok", backend.stdscr,
+                     delay=0)
+
+    assert [text_width(line.rstrip())
+            for line in backend.display()[1:4]] == [16, 16, 16]
+    assert [line.split()[1] for line in backend.display()[1:4]] == [
+        "日本語のテ", "キストを表", "示します"]
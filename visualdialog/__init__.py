@@ -3,8 +3,18 @@
 __version__ = 0.9
 __author__ = "Timéo Arnouts"
 
+from .ansi import *
+from .backend import *
 from .box import *
+from .choices import *
 from .dialog import *
 from .error import *
+from .layout import *
+from .record import *
+from .scheduler import *
+from .script import *
+from .stats import *
 from .type import *
 from .utils import *
+from .virtual import *
+from .width import *
@@ -0,0 +1,440 @@
+# ansi.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["AnsiBackend"]
+
+import codecs
+import curses
+import os
+import re
+import select
+import shutil
+import sys
+import time
+from collections import deque
+from typing import BinaryIO, Deque, Dict, List, Optional, TextIO, Tuple
+
+from .backend import CursesBackend
+from .error import InputExhausted
+from .type import CursesKey, CursesTextAttribute
+from .virtual import VirtualBackend
+from .width import char_width
+
+try:
+    import termios
+    import tty
+except ImportError:
+    # Keys can not be read one by one outside of POSIX terminals.
+    termios = tty = None
+
+
+# SGR parameters of text attributes.
+_ATTRIBUTES = ((curses.A_BOLD, "1"),
+               (curses.A_DIM, "2"),
+               (curses.A_ITALIC, "3"),
+               (curses.A_UNDERLINE, "4"),
+               (curses.A_BLINK, "5"),
+               (curses.A_REVERSE, "7"),
+               (curses.A_STANDOUT, "7"),
+               (curses.A_INVIS, "8"))
+_ATTRIBUTES_MASK = 0
+for _attribute, _ in _ATTRIBUTES:
+    _ATTRIBUTES_MASK |= _attribute
+
+# Function keys by escape sequence, without the leading escape.
+_SEQUENCES = {"[A": curses.KEY_UP, "OA": curses.KEY_UP,
+              "[B": curses.KEY_DOWN, "OB": curses.KEY_DOWN,
+              "[C": curses.KEY_RIGHT, "OC": curses.KEY_RIGHT,
+              "[D": curses.KEY_LEFT, "OD": curses.KEY_LEFT,
+              "[H": curses.KEY_HOME, "OH": curses.KEY_HOME,
+              "[1~": curses.KEY_HOME, "[7~": curses.KEY_HOME,
+              "[F": curses.KEY_END, "OF": curses.KEY_END,
+              "[4~": curses.KEY_END, "[8~": curses.KEY_END,
+              "[2~": curses.KEY_IC, "[3~": curses.KEY_DC,
+              "[5~": curses.KEY_PPAGE, "[6~": curses.KEY_NPAGE,
+              "[Z": curses.KEY_BTAB,
+              "OP": curses.KEY_F1, "OQ": curses.KEY_F2,
+              "OR": curses.KEY_F3, "OS": curses.KEY_F4,
+              "[15~": curses.KEY_F5, "[17~": curses.KEY_F6,
+              "[18~": curses.KEY_F7, "[19~": curses.KEY_F8,
+              "[20~": curses.KEY_F9, "[21~": curses.KEY_F10,
+              "[23~": curses.KEY_F11, "[24~": curses.KEY_F12}
+# Keys translated as curses does.
+_CHARS = {"\r": "\n", "\b": curses.KEY_BACKSPACE,
+          "\x7f": curses.KEY_BACKSPACE}
+
+_SEQUENCE = re.compile(r"\x1b(\[[0-9;]*[@-~]|O.)")
+# Start of an escape sequence whose end is not read yet.
+_PARTIAL_SEQUENCE = re.compile(r"\x1b(\[[0-9;]*|O)?\Z")
+# Time to wait for the end of an escape sequence, in seconds.
+_ESCAPE_DELAY = 0.025
+
+
+def _decode_keys(text: str) -> List[CursesKey]:
+    """Return the keys typed to produce ``text``, function keys being
+    returned as ``curses`` key codes.
+    """
+    keys: List[CursesKey] = []
+    i = 0
+    while i < len(text):
+        match = _SEQUENCE.match(text, i)
+        if match is None:
+            keys.append(_CHARS.get(text[i], text[i]))
+            i += 1
+            continue
+
+        sequence = match.group(1)
+        if sequence not in _SEQUENCES and ";" in sequence:
+            # Modifiers are ignored: "[1;5A" is read as "[A".
+            sequence = "[" + sequence[-1]
+        # Unknown sequences are dropped rather than read as text.
+        if sequence in _SEQUENCES:
+            keys.append(_SEQUENCES[sequence])
+        i = match.end()
+    return keys
+
+
+def _color(color: int, base: int) -> str:
+    """Return the SGR parameter of a foreground (``base`` 30) or
+    background (``base`` 40) ``curses`` color.
+    """
+    if color < 0:
+        return str(base + 9)
+    elif color < 8:
+        return str(base + color)
+    elif color < 16:
+        return str(base + 52 + color)
+    return f"{base + 8};5;{color}"
+
+
+def _relative_move(distance: int, forward: str, backward: str) -> str:
+    """Return the escape sequence moving the cursor by ``distance``."""
+    final = forward if distance > 0 else backward
+    distance = abs(distance)
+    return f"\x1b[{final}" if distance == 1 else f"\x1b[{distance}{final}"
+
+
+class AnsiBackend(VirtualBackend):
+    """A backend which displays text boxes on a terminal by writing ANSI
+    escape sequences itself, without ``curses`` initialization::
+
+        with AnsiBackend(lines=8, inline=True) as backend:
+            box = DialogBox(0, 0, 40, 6, backend=backend)
+            box.char_by_char("Hello world", backend.stdscr)
+
+    Windows are the ones of :class:`visualdialog.virtual.VirtualBackend`:
+    drawing only changes an in-memory screen and an update sends the
+    cells which differ from the displayed ones. Escape sequences of an
+    update are gathered and written at once, cursor moves and changes of
+    attributes only being sent when needed, in their shortest form.
+
+    Unlike ``curses.wrapper``, no terminal database is loaded, so it
+    starts faster. Keys are read from standard input, which should be a
+    POSIX terminal: it is put in cbreak mode while the backend is
+    started. ``curses`` color pairs are defined with :meth:`init_pair`.
+
+    :param lines: Height of the screen. This defaults to the height of
+        the terminal.
+
+    :param cols: Width of the screen. This defaults to the width of the
+        terminal.
+
+    :param inline: If ``True``, text boxes are displayed in ``lines``
+        lines below the cursor instead of on the alternate screen,
+        and remain visible once the backend is stopped. This defaults
+        to ``False``.
+
+    :param input: File from which keys are read. This defaults to
+        ``sys.stdin``.
+
+    :param output: Binary file to which escape sequences are written.
+        This defaults to ``sys.stdout.buffer``.
+
+    :param encoding: Encoding of the terminal. This defaults to
+        ``"utf-8"``.
+
+    :ivar bytes_written: Number of bytes written to ``output``.
+
+    .. note::
+        This class can be used as a context manager, which starts and
+        stops the backend.
+    """
+    def __init__(self,
+                 lines: Optional[int] = None,
+                 cols: Optional[int] = None,
+                 inline: bool = False,
+                 input: Optional[TextIO] = None,
+                 output: Optional[BinaryIO] = None,
+                 encoding: str = "utf-8"):
+        """Initializes instance of :class:`AnsiBackend`."""
+        size = shutil.get_terminal_size()
+        super().__init__(size.lines if lines is None else lines,
+                         size.columns if cols is None else cols)
+
+        self.inline = inline
+        self._input_file = sys.stdin if input is None else input
+        self._output = sys.stdout.buffer if output is None else output
+        self.encoding = encoding
+
+        self._decoder = codecs.getincrementaldecoder(encoding)("replace")
+        self._keys: Deque[CursesKey] = deque()
+        self._saved_mode: Optional[list] = None
+
+        # Escape sequences of the update in progress.
+        self._buffer: List[str] = []
+        self._cursor: Tuple[int, int] = (0, 0)
+        self._attr: CursesTextAttribute = 0
+        self._pairs: Dict[int, Tuple[int, int]] = {}
+
+        self.bytes_written = 0
+
+    def __enter__(self) -> "AnsiBackend":
+        """Start the backend and return self."""
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Stop the backend."""
+        self.stop()
+
+    def start(self):
+        """Prepare the terminal: read keys one by one without echoing
+        them, hide the cursor and blank the lines used.
+        """
+        fd = self._input_fileno()
+        if tty is not None and os.isatty(fd):
+            self._saved_mode = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+
+        if self.inline:
+            # Make room below the cursor, scrolling if needed.
+            self._buffer.append("\n" * (self.lines - 1))
+            if self.lines > 1:
+                self._buffer.append(_relative_move(1 - self.lines,
+                                                   "B", "A"))
+            self._buffer.append("\r\x1b[J")
+        else:
+            self._buffer.append("\x1b[?1049h\x1b[H\x1b[2J")
+        self._buffer.append("\x1b[?25l")
+        self._cursor = (0, 0)
+        self._flush()
+
+    def stop(self):
+        """Restore the terminal as it was before :meth:`start`."""
+        self._set_attr(0)
+        if self.inline:
+            # Leave the cursor below the text boxes.
+            self._move(self.lines - 1, 0)
+            self._buffer.append("\n")
+        else:
+            self._buffer.append("\x1b[?1049l")
+        self._buffer.append("\x1b[?25h")
+        self._flush()
+
+        if self._saved_mode is not None:
+            termios.tcsetattr(self._input_fileno(),
+                              termios.TCSADRAIN,
+                              self._saved_mode)
+            self._saved_mode = None
+
+    def init_pair(self, pair_number: int, fg: int, bg: int):
+        """Define the colors of a color pair, see ``curses.init_pair``.
+
+        Colors are ``curses`` color numbers: ``-1`` for the default
+        color of the terminal, ``0`` to ``7`` for ``curses.COLOR_*``
+        colors, ``8`` to ``15`` for their bright variants and up to
+        ``255`` for the other colors of 256-color terminals.
+        """
+        self._pairs[pair_number] = (fg, bg)
+
+    def napms(self, ms: int):
+        """Sleep for ``ms`` milliseconds."""
+        time.sleep(max(ms, 0) / 1000)
+
+    def monotonic(self) -> float:
+        """Return the value in milliseconds of a monotonic clock."""
+        return CursesBackend.monotonic(self)
+
+    async def asleep(self, ms: int):
+        """Sleep for ``ms`` milliseconds without blocking the event
+        loop.
+        """
+        await CursesBackend.asleep(self, ms)
+
+    async def wait_input(self, timeout: Optional[int] = None):
+        """Return as soon as a key is available or after ``timeout``
+        milliseconds, letting the event loop run other tasks in the
+        meantime.
+        """
+        if not self._keys:
+            await CursesBackend.wait_input(self, timeout)
+
+    def flash(self):
+        """Ring the bell of the terminal."""
+        super().flash()
+        self._buffer.append("\a")
+        self._flush()
+
+    def flushinp(self):
+        """Discard keys typed but not read yet."""
+        self._keys.clear()
+        fd = self._input_fileno()
+        if termios is not None and os.isatty(fd):
+            termios.tcflush(fd, termios.TCIFLUSH)
+
+    def doupdate(self):
+        """Write the cells changed since the last update to the
+        terminal, at once.
+        """
+        super().doupdate()
+        self._flush()
+
+    def _input_fileno(self) -> int:
+        """Return the file descriptor keys are read from."""
+        return self._input_file.fileno()
+
+    def _next_key(self, delay: int) -> Optional[CursesKey]:
+        """Return the next key typed, ``None`` if no key is typed within
+        ``delay`` milliseconds (blocking if negative).
+
+        :raises InputExhausted: If the end of input is reached.
+        """
+        fd = self._input_fileno()
+        timeout = None if delay < 0 else delay / 1000
+
+        while not self._keys:
+            if not select.select([fd], [], [], timeout)[0]:
+                return None
+
+            text = self._read(fd)
+            # Escape sequences can be received in several parts.
+            while (_PARTIAL_SEQUENCE.search(text)
+                   and select.select([fd], [], [], _ESCAPE_DELAY)[0]):
+                text += self._read(fd)
+            self._keys.extend(_decode_keys(text))
+        return self._keys.popleft()
+
+    def _read(self, fd: int) -> str:
+        """Return the text available on ``fd``."""
+        data = os.read(fd, 1024)
+        if not data:
+            raise InputExhausted()
+        return self._decoder.decode(data)
+
+    def _transmit(self, y: int, x: int, chars: List[str], attrs: List[int]):
+        """Append the escape sequences writing changed cells to the
+        update in progress.
+        """
+        super()._transmit(y, x, chars, attrs)
+
+        row = self._curscr.chars[y]
+        if not chars[0] and x and row[x - 1] and char_width(row[x - 1][0]) > 1:
+            # The right half of a wide character is written with it.
+            x -= 1
+            chars = [row[x], *chars]
+            attrs = [self._curscr.attrs[y][x], *attrs]
+
+        cells = chars
+        if "" in chars:
+            cells = [" " if not cell and (
+                         not i or not chars[i - 1]
+                         or char_width(chars[i - 1][0]) < 2)
+                     else cell
+                     for i, cell in enumerate(chars)]
+
+        self._move(y, x)
+        start = 0
+        while start < len(cells):
+            attr, end = attrs[start], start + 1
+            while end < len(cells) and attrs[end] == attr:
+                end += 1
+            self._set_attr(attr)
+            self._buffer.append("".join(cells[start:end]))
+            start = end
+
+        x += len(cells)
+        if cells[-1] and char_width(cells[-1][0]) > 1:
+            # The right half of the last character is not in the run.
+            x += 1
+        if x >= self.cols:
+            # Leave the pending wrap of the last column.
+            self._buffer.append("\r")
+            x = 0
+        self._cursor = (y, x)
+
+    def _move(self, y: int, x: int):
+        """Move the cursor to ``y``;``x`` of the screen."""
+        cursor_y, cursor_x = self._cursor
+        if (y, x) == (cursor_y, cursor_x):
+            return
+
+        sequence = ""
+        if y != cursor_y:
+            sequence += _relative_move(y - cursor_y, "B", "A")
+        if x == 0 and x != cursor_x:
+            sequence += "\r"
+        elif x == cursor_x - 1:
+            sequence += "\b"
+        elif x != cursor_x:
+            sequence += _relative_move(x - cursor_x, "C", "D")
+
+        if not self.inline:
+            absolute = f"\x1b[{y + 1};{x + 1}H"
+            if len(absolute) < len(sequence):
+                sequence = absolute
+
+        if y == cursor_y and cursor_x < x < cursor_x + len(sequence):
+            # Like curses, write again the few cells to skip when it is
+            # shorter than moving over them.
+            skipped = "".join(self._curscr.chars[y][cursor_x:x])
+            if (len(skipped) == x - cursor_x
+                    and skipped.isascii()
+                    and all(attr == self._attr for attr
+                            in self._curscr.attrs[y][cursor_x:x])):
+                sequence = skipped
+
+        self._buffer.append(sequence)
+        self._cursor = (y, x)
+
+    def _set_attr(self, attr: CursesTextAttribute):
+        """Make ``attr`` the attributes of the next characters."""
+        current = self._attr
+        if attr == current:
+            return
+
+        parameters = []
+        if current & ~attr & _ATTRIBUTES_MASK:
+            # Attributes can only be removed all at once.
+            parameters.append("0")
+            current = 0
+        for attribute, parameter in _ATTRIBUTES:
+            if attr & attribute and not current & attribute:
+                parameters.append(parameter)
+        if (attr ^ current) & curses.A_COLOR:
+            fg, bg = self._pair(attr)
+            current_fg, current_bg = self._pair(current)
+            if fg != current_fg:
+                parameters.append(_color(fg, 30))
+            if bg != current_bg:
+                parameters.append(_color(bg, 40))
+
+        if not parameters:
+            # Pairs of the same colors.
+            self._attr = attr
+            return
+
+        self._buffer.append(f"\x1b[{';'.join(parameters)}m")
+        self._attr = attr
+
+    def _pair(self, attr: CursesTextAttribute) -> Tuple[int, int]:
+        """Return the colors of the color pair of ``attr``."""
+        return self._pairs.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+
+    def _flush(self):
+        """Write the escape sequences of the update in progress."""
+        if self._buffer:
+            data = "".join(self._buffer).encode(self.encoding, "replace")
+            self._buffer.clear()
+            self._output.write(data)
+            self._output.flush()
+            self.bytes_written += len(data)
@@ -0,0 +1,118 @@
+# backend.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["CursesBackend"]
+
+import asyncio
+import curses
+import curses.textpad
+import sys
+import time
+from typing import Optional
+
+from .type import CursesTextAttribute, CursesWindow
+
+
+class CursesBackend:
+    """This class gathers the ``curses`` module-level functions used by
+    text boxes.
+
+    Text boxes never call these functions directly but through their
+    ``backend`` attribute, so an alternative implementation (such as
+    :class:`visualdialog.virtual.VirtualBackend`) can be substituted to
+    drive them without a terminal.
+
+    .. note::
+        Apart from :meth:`color_pair`, methods of this class require
+        ``curses.initscr`` to have been called.
+    """
+    def color_pair(self, pair_number: int) -> CursesTextAttribute:
+        """Return the attribute value for displaying text in the
+        specified color pair.
+        """
+        return curses.color_pair(pair_number)
+
+    def napms(self, ms: int):
+        """Sleep for ``ms`` milliseconds."""
+        curses.napms(ms)
+
+    def monotonic(self) -> float:
+        """Return the value in milliseconds of a monotonic clock."""
+        return time.monotonic() * 1000
+
+    async def asleep(self, ms: int):
+        """Sleep for ``ms`` milliseconds without blocking the event
+        loop.
+        """
+        await asyncio.sleep(ms / 1000)
+
+    def flash(self):
+        """Flash the screen."""
+        curses.flash()
+
+    def flushinp(self):
+        """Flush all input buffers."""
+        curses.flushinp()
+
+    async def wait_input(self, timeout: Optional[int] = None):
+        """Return as soon as input is available on standard input or
+        after ``timeout`` milliseconds, letting the event loop run other
+        tasks in the meantime.
+        """
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self._input_fileno()
+
+        try:
+            loop.add_reader(fd,
+                            lambda: readable.done()
+                            or readable.set_result(None))
+        except NotImplementedError:
+            # Some event loops (on Windows) can not watch the console,
+            # fall back to polling.
+            await asyncio.sleep(0.01 if timeout is None
+                                else min(timeout / 1000, 0.01))
+            return
+
+        try:
+            await asyncio.wait_for(
+                readable,
+                None if timeout is None else timeout / 1000)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(fd)
+
+    def newwin(self,
+               nlines: int,
+               ncols: int,
+               begin_y: int = 0,
+               begin_x: int = 0) -> CursesWindow:
+        """Return a new window, see ``curses.newwin``."""
+        return curses.newwin(nlines, ncols, begin_y, begin_x)
+
+    def newpad(self, nlines: int, ncols: int) -> CursesWindow:
+        """Return a new pad, see ``curses.newpad``."""
+        return curses.newpad(nlines, ncols)
+
+    def doupdate(self):
+        """Update the physical screen."""
+        curses.doupdate()
+
+    def rectangle(self,
+                  win: CursesWindow,
+                  uly: int,
+                  ulx: int,
+                  lry: int,
+                  lrx: int):
+        """Draw a rectangle on ``win``, see ``curses.textpad.rectangle``.
+        """
+        curses.textpad.rectangle(win, uly, ulx, lry, lrx)
+
+    def _input_fileno(self) -> int:
+        """Return the file descriptor keys are read from."""
+        return sys.stdin.fileno()
+
+
+#: Backend used by text boxes when none is given to their constructor.
+default_backend = CursesBackend()
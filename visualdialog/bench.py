@@ -0,0 +1,278 @@
+# bench.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+"""Benchmarks of the text boxes rendering pipeline.
+
+Dialogs are played on a :class:`visualdialog.virtual.VirtualBackend`
+with all delays set to zero, so the measured time is only spent in the
+library. Run it with::
+
+    python -m visualdialog.bench [--repeat N] [--json] [NAME ...]
+"""
+
+__all__ = ["Scenario", "SCENARIOS", "run_scenario"]
+
+import argparse
+import curses
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence
+
+from .dialog import DialogBox
+from .layout import LayoutCache, LineCompiler
+from .virtual import VirtualBackend
+
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+         "eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut "
+         "enim ad minim veniam, quis nostrud exercitation ullamco laboris "
+         "nisi ut aliquip ex ea commodo consequat. ")
+
+#: Stages whose time is measured separately. ``"compile"`` is the
+#: cutting of lines into runs of words with their attributes.
+STAGES = ("wrap", "compile", "draw", "refresh", "callbacks")
+
+
+class Scenario:
+    """A dialog to benchmark.
+
+    :param name: Name used to select the scenario from command line.
+
+    :param text: Text displayed by the dialog.
+
+    :param method: Name of the :class:`DialogBox` method used to display
+        ``text``. This defaults to ``"char_by_char"``.
+
+    :param box_kwargs: Keyword arguments passed to :class:`DialogBox`
+        constructor (``pos_x``, ``pos_y``, ``height``, ``width``...).
+
+    :param method_kwargs: Keyword arguments passed to ``method``. All
+        delays default to zero.
+
+    :param box_attrs: Attributes set on the :class:`DialogBox` before
+        the run (``frame_interval``...).
+    """
+    def __init__(self,
+                 name: str,
+                 text: str,
+                 method: str = "char_by_char",
+                 box_kwargs: Mapping[str, Any] = {},
+                 method_kwargs: Mapping[str, Any] = {},
+                 box_attrs: Mapping[str, Any] = {}):
+        """Initializes instance of :class:`Scenario`."""
+        self.name = name
+        self.text = text
+        self.method = method
+        self.box_kwargs = {"pos_x": 0, "pos_y": 0,
+                           "height": 40, "width": 6,
+                           **box_kwargs}
+        self.method_kwargs = {"delay": 0, **method_kwargs}
+        self.box_attrs = box_attrs
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return f"Scenario(name={self.name})"
+
+
+def _noop_callback(*_):
+    pass
+
+
+def _heavy_words_attr() -> Dict[str, int]:
+    words = set(LOREM.replace(",", "").replace(".", "").split())
+    attributes = (curses.A_BOLD, curses.A_ITALIC, curses.A_UNDERLINE)
+    return {word: attributes[i % len(attributes)]
+            for i, word in enumerate(sorted(words))}
+
+
+#: Scenarios run when none is selected.
+SCENARIOS: List[Scenario] = [
+    Scenario("short", "Hello world, how are you today ?"),
+    Scenario("long", LOREM * 20),
+    Scenario("long-word", LOREM * 20, method="word_by_word"),
+    Scenario("words-attr",
+             LOREM * 20,
+             method_kwargs={"words_attr": _heavy_words_attr()}),
+    Scenario("callbacks",
+             LOREM * 20,
+             method_kwargs={"callbacks": (_noop_callback, ) * 10}),
+    Scenario("titled", LOREM * 20, box_kwargs={"title": "Tim-ats"}),
+    Scenario("small-box",
+             LOREM * 20,
+             box_kwargs={"height": 12, "width": 5}),
+    Scenario("large-box",
+             LOREM * 20,
+             box_kwargs={"height": 78, "width": 22}),
+    Scenario("delayed", LOREM * 20, method_kwargs={"delay": 5}),
+    Scenario("framed",
+             LOREM * 20,
+             method_kwargs={"delay": 5},
+             box_attrs={"frame_interval": 33}),
+]
+
+
+class _StageTimer:
+    """Accumulate time spent in wrapped callables by stage.
+
+    Calls made inside an already measured call are not measured again.
+    """
+    def __init__(self):
+        self.times: Dict[str, float] = defaultdict(float)
+        self._measuring = False
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        times = self.times
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            if self._measuring:
+                return func(*args, **kwargs)
+
+            self._measuring = True
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                times[stage] += perf_counter() - start
+                self._measuring = False
+
+        return timed
+
+
+def run_scenario(scenario: Scenario,
+                 repeat: int = 10,
+                 layout_cache: bool = True) -> Dict[str, Any]:
+    """Play ``scenario`` ``repeat`` times and return measurements.
+
+    If ``layout_cache`` is ``False``, text layout is computed again at
+    each run.
+
+    :returns: A dictionary containing number of characters displayed
+        per second (``chars_per_sec``), total time in seconds
+        (``total``), ``refresh`` calls, ``noutrefresh`` calls and
+        screen updates per run (``refresh_calls``,
+        ``noutrefresh_calls`` and ``updates``), elapsed time of a run on
+        the virtual clock in milliseconds (``virtual_time``) and time
+        spent in each of :data:`STAGES` in seconds (``stages``).
+    """
+    backend = VirtualBackend(lines=30, cols=100)
+    win = backend.stdscr
+    box = DialogBox(**scenario.box_kwargs,
+                    downtime_chars_delay=0,
+                    backend=backend)
+    box.layout_cache = LayoutCache() if layout_cache else None
+    for name, value in scenario.box_attrs.items():
+        setattr(box, name, value)
+
+    # One confirmation key is read at the end of each page.
+    nb_pages = -(-len(box.text_wrapper.wrap(scenario.text))
+                 // box.nb_lines_max)
+
+    timer = _StageTimer()
+    box.text_wrapper.wrap = timer.wrap("wrap", box.text_wrapper.wrap)
+    win.addstr = timer.wrap("draw", win.addstr)
+    win.addch = timer.wrap("draw", win.addch)
+    win.refresh = timer.wrap("refresh", win.refresh)
+    win.noutrefresh = timer.wrap("refresh", win.noutrefresh)
+    backend.doupdate = timer.wrap("refresh", backend.doupdate)
+
+    method_kwargs = dict(scenario.method_kwargs)
+    method_kwargs["callbacks"] = [
+        timer.wrap("callbacks", callback)
+        for callback in method_kwargs.get("callbacks", ())
+    ]
+    method = getattr(box, scenario.method)
+
+    # Compilers are created by each layout, so the class is patched.
+    compile_line = LineCompiler.compile
+    compile_page = LineCompiler.compile_page
+    LineCompiler.compile = timer.wrap("compile", compile_line)
+    LineCompiler.compile_page = timer.wrap("compile", compile_page)
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            backend.push_keys(*" " * nb_pages)
+            method(scenario.text, win, **method_kwargs)
+        total = time.perf_counter() - start
+    finally:
+        LineCompiler.compile = compile_line
+        LineCompiler.compile_page = compile_page
+
+    return {
+        "name": scenario.name,
+        "chars_per_sec": len(scenario.text) * repeat / total,
+        "total": total,
+        "refresh_calls": backend.refresh_calls // repeat,
+        "noutrefresh_calls": backend.noutrefresh_calls // repeat,
+        "updates": backend.doupdate_calls // repeat,
+        "virtual_time": backend.clock.now // repeat,
+        "stages": {stage: timer.times[stage] for stage in STAGES},
+    }
+
+
+def _format_table(results: Iterable[Dict[str, Any]]) -> str:
+    header = (f"{'scenario':<12}{'chars/s':>12}{'refresh':>10}"
+              f"{'nout':>10}{'updates':>10}{'time (ms)':>11}"
+              + "".join(f"{stage:>12}" for stage in STAGES)
+              + f"{'other':>10}")
+    lines = [header, "-" * len(header)]
+
+    for result in results:
+        stages = result["stages"]
+        other = result["total"] - sum(stages.values())
+        lines.append(
+            f"{result['name']:<12}"
+            f"{result['chars_per_sec']:>12.0f}"
+            f"{result['refresh_calls']:>10}"
+            f"{result['noutrefresh_calls']:>10}"
+            f"{result['updates']:>10}"
+            f"{result['virtual_time']:>11}"
+            + "".join(f"{stages[stage] / result['total']:>12.1%}"
+                      for stage in STAGES)
+            + f"{other / result['total']:>10.1%}")
+
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Entry point of ``python -m visualdialog.bench``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m visualdialog.bench",
+        description="Benchmark Visual-dialog rendering pipeline.")
+    parser.add_argument("names",
+                        nargs="*",
+                        metavar="NAME",
+                        help="scenarios to run (default: all)")
+    parser.add_argument("-n", "--repeat",
+                        type=int,
+                        default=10,
+                        help="number of runs of each scenario")
+    parser.add_argument("--no-cache",
+                        action="store_true",
+                        help="disable the layout cache of text boxes")
+    parser.add_argument("--json",
+                        action="store_true",
+                        help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario for scenario in SCENARIOS
+                 if not args.names or scenario.name in args.names]
+    if not scenarios:
+        parser.error("no scenario matches "
+                     + ", ".join(args.names))
+
+    results = [run_scenario(scenario, args.repeat, not args.no_cache)
+               for scenario in scenarios]
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print(_format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,27 @@
 __all__ = ["BaseTextBox"]
 
 import curses
-import curses.textpad
-from typing import List, Literal, NoReturn, Sequence, Tuple, Union
+from typing import (Any, Callable, Iterable, List, Literal, NoReturn,
+                    Optional, Sequence, Tuple, Union)
 
+from .backend import CursesBackend, default_backend
 from .error import PanicError, ValueNotInBound
+from .record import SessionRecorder
+from .stats import RenderStats
 from .type import (CursesKey, CursesTextAttribute, CursesTextAttributes,
                    CursesWindow)
-from .utils import TextAttr, to_tuple
+from .utils import combine_attrs, to_tuple
+from .width import text_width
+
+
+# Maximum time in milliseconds before a key held down starts to be
+# repeated, most terminals wait between 250 and 500 ms.
+_KEY_REPEAT_DELAY = 500
+# Maximum time in milliseconds between two repetitions of a key held
+# down, most terminals repeat keys more often.
+_KEY_REPEAT_INTERVAL = 100
+# Lag in milliseconds from which writing stops trying to catch up.
+_MAX_TYPING_LAG = 250
 
 
 class BoundHeight:
@@ -22,7 +36,8 @@ class BoundHeight:
 
     def __set__(self, obj: "BaseTextBox", value: int) -> NoReturn:
         title_box_borders_total_height = 5
-        minimum_box_height = len(obj.title) + title_box_borders_total_height
+        minimum_box_height = (text_width(obj.title)
+                              + title_box_borders_total_height)
 
         if value < minimum_box_height:
             raise ValueNotInBound("height must be more than title length + 5")
@@ -64,7 +79,7 @@ class BaseTextBox:
         on which methods will have effects.
         This value is covered by a descriptor to avoid unexpected behavior.
         Set this value to a value lower than title length and title box borders
-        height (``len(self.title) + 5``) raises a ``ValueError``.
+        height (width of title + 5) raises a ``ValueError``.
 
     :param width: Width of the dialog box in ``curses`` window object on
         which methods will have effects.
@@ -97,6 +112,12 @@ class BaseTextBox:
         in ``downtime_chars``.
         This defaults to ``600``.
 
+    :param backend:
+        Object providing the ``curses`` module-level functions used by
+        the text box. Pass a :class:`visualdialog.virtual.VirtualBackend`
+        to drive the text box without terminal. This defaults to
+        ``visualdialog.backend.default_backend``.
+
     :ivar key_detection: initial value: ["getkey", "getch", "get_wch"]:
         Keystroke acquisition ``curses`` method for
         :meth:`BaseTextBox.get_input`.
@@ -106,6 +127,87 @@ class BaseTextBox:
 
     :ivar panic_keys: initial value: []:
         List of accepted key to raise :exc:`PanicError`.
+
+    :ivar frame_interval: initial value: 0:
+        Minimum time in milliseconds between two updates of the
+        physical screen while text is written. If zero, the screen is
+        refreshed after each character or word. Otherwise, writes are
+        marked with ``window.noutrefresh`` and waiting times are added
+        up until they reach ``frame_interval``, then the screen is
+        updated once with ``curses.doupdate`` and the whole time is
+        waited at once. Several characters are thus displayed by frame
+        when the delay between them is lower than ``frame_interval``,
+        without changing the overall writing speed.
+
+    :ivar typing_lag: initial value: 0:
+        Delay in milliseconds of the last write behind its scheduled
+        time. Waiting times are counted from the time each write was
+        scheduled for rather than from the end of the previous wait,
+        so time spent writing does not slow down text. Writing only
+        gives up catching up once late by more than 250 milliseconds.
+
+    :ivar allow_skip: initial value: False:
+        If ``True``, pressing a key contained in ``self.confirm_keys``
+        while text is written displays the rest of the current page at
+        once.
+
+    :ivar fast_forward_keys: initial value: []:
+        List of keys which accelerate writing as long as they are held
+        down.
+
+    :ivar fast_forward_factor: initial value: 4:
+        Number by which waiting times are divided while a key contained
+        in ``self.fast_forward_keys`` is held down.
+
+    :ivar input_timeout: initial value: None:
+        Maximum time in milliseconds :meth:`get_input` waits for a key
+        before calling ``self.idle_callbacks`` and waiting again. If
+        ``None``, keys are waited for without limit.
+
+    :ivar auto_advance: initial value: None:
+        Time in milliseconds after which :meth:`get_input` returns
+        even if no key contained in ``self.confirm_keys`` was pressed,
+        so that pages follow one another unattended. If ``None``, a
+        confirmation is always required.
+
+    :ivar idle_callbacks: initial value: []:
+        List of callables called one by one each time
+        ``self.input_timeout`` elapses without key pressed while
+        :meth:`get_input` waits. The arguments passed to them are the
+        current instance (``self``), the window and the time elapsed
+        since waiting started in milliseconds.
+
+    :ivar stats: initial value: None:
+        :class:`visualdialog.stats.RenderStats` in which the text box
+        counts its writes, refreshes and the time spent waiting,
+        in callbacks and waiting for confirmations. Statistics are not
+        collected if ``None``.
+
+    :ivar stats_sinks: initial value: []:
+        List of callables called one by one with the current instance
+        (``self``) and ``self.stats`` once each page has been confirmed,
+        if ``self.stats`` is set.
+
+    :ivar key_source: initial value: None:
+        Callable from which keys are read instead of the window. The
+        arguments passed to it are the window and the maximum time to
+        wait for a key in milliseconds, ``-1`` to wait without limit.
+        It returns the key pressed, or ``None`` if no key was pressed
+        in time. :class:`visualdialog.record.SessionReplayer` uses it
+        to press recorded keys.
+
+    :ivar recorder: initial value: None:
+        :class:`visualdialog.record.SessionRecorder` to which the text
+        box reports the texts it displays, its writes and the keys it
+        reads. Set by :meth:`visualdialog.record.SessionRecorder.attach`.
+
+    :ivar clear_window: initial value: False:
+        If ``True``, the whole window is cleared before displaying a
+        text, which forces the whole screen to be repainted. Otherwise
+        only the rectangle of the text box is erased, which keeps other
+        content of the window (other text boxes for instance) untouched.
+        Between two pages of a same text, only the lines written inside
+        the frame are erased.
     """
     height, width = BoundHeight(), BoundWidth()
 
@@ -120,8 +222,11 @@ class BaseTextBox:
             title_text_attr: Union[CursesTextAttribute,
                                    CursesTextAttributes] = curses.A_BOLD,
             downtime_chars: Sequence[str] = (",", ".", ":", ";", "!", "?"),
-            downtime_chars_delay: int = 600):
+            downtime_chars_delay: int = 600,
+            backend: Optional[CursesBackend] = None):
         """Initializes instance of :class:`BaseTextBox`."""
+        self.backend = backend or default_backend
+
         self.title_offsetting_y = 2 if title else 0
 
         # Compensation for left and upper borders of text box.
@@ -134,7 +239,7 @@ class BaseTextBox:
 
         self.title = title
         if title:
-            self.title_colors = curses.color_pair(title_colors_pair_nb)
+            self.title_colors = self.backend.color_pair(title_colors_pair_nb)
             self.title_text_attr = to_tuple(title_text_attr)
 
         self.pos_x, self.pos_y = pos_x, pos_y
@@ -155,6 +260,75 @@ class BaseTextBox:
         #: This defaults to an empty list.
         self.panic_keys: List[CursesKey] = []
 
+        #: Display the rest of the page when a confirm key is pressed
+        #: while writing. This defaults to ``False``.
+        self.allow_skip = False
+        #: List of keys accelerating writing while held down.
+        #: This defaults to an empty list.
+        self.fast_forward_keys: List[CursesKey] = []
+        #: Acceleration of writing while a fast forward key is held.
+        #: This defaults to ``4``.
+        self.fast_forward_factor = 4
+        # Time until which writing is accelerated.
+        self._fast_forward_until = 0
+
+        #: Minimum time between two screen updates in milliseconds.
+        #: This defaults to ``0`` (update after each write).
+        self.frame_interval = 0
+        # Waiting time accumulated since the last frame.
+        self._pending_delay = 0
+        # Set when the screen is updated by the caller (see Scheduler).
+        self._defer_refresh = False
+
+        #: Delay of the last write behind its scheduled time.
+        #: This defaults to ``0``.
+        self.typing_lag = 0
+        # Time of the clock of the backend the next write is scheduled
+        # for, None before the first write.
+        self._deadline: Optional[float] = None
+
+        #: Maximum time waited for a key by get_input before calling
+        #: idle callbacks. This defaults to ``None`` (no limit).
+        self.input_timeout: Optional[int] = None
+        #: Time after which get_input returns without confirmation.
+        #: This defaults to ``None`` (never).
+        self.auto_advance: Optional[int] = None
+        #: Callables called when input_timeout elapses without key.
+        #: This defaults to an empty list.
+        self.idle_callbacks: List[Callable[["BaseTextBox",
+                                            CursesWindow,
+                                            float],
+                                           Optional[Any]]] = []
+
+        #: Statistics of display, not collected if ``None``.
+        #: This defaults to ``None``.
+        self.stats: Optional[RenderStats] = None
+        #: Callables receiving statistics after each page.
+        #: This defaults to an empty list.
+        self.stats_sinks: List[Callable[["BaseTextBox", RenderStats],
+                                        Optional[Any]]] = []
+
+        #: Callable from which keys are read instead of the window.
+        #: This defaults to ``None``.
+        self.key_source: Optional[Callable[[CursesWindow, int],
+                                           Optional[CursesKey]]] = None
+        #: Recorder of the session, not recorded if ``None``.
+        #: This defaults to ``None``.
+        self.recorder: Optional[SessionRecorder] = None
+
+        #: Clear the whole window before each text or only the box.
+        #: This defaults to ``False``.
+        self.clear_window = False
+
+        # Off-screen window on which the frame is drawn and the
+        # geometry it was drawn for.
+        self._frame_win: Optional[CursesWindow] = None
+        self._frame_key: Optional[Tuple] = None
+        # Window derived from the one written on, covering the inside
+        # of the frame, and the window and geometry it was derived for.
+        self._text_area_win: Optional[CursesWindow] = None
+        self._text_area_key: Optional[Tuple] = None
+
     @property
     def position(self) -> Tuple[int, int]:
         """A property that returns a tuple contains x;y position of
@@ -186,32 +360,126 @@ class BaseTextBox:
         :param win: ``curses`` window object on which the method will
             have effect.
         """
-        title_height = len(self.title) + 4
+        title_height = text_width(self.title) + 4
         title_width = 2
 
         # Display title and title box.
         if self.title:
-            attr = (self.title_colors, *self.title_text_attr)
-
-            curses.textpad.rectangle(win,
-                                     self.pos_y,
-                                     self.pos_x + 1,
-                                     self.pos_y + title_width,
-                                     self.pos_x + title_height)
-
-            with TextAttr(win, *attr):
-                win.addstr(self.pos_y + 1,
-                           self.pos_x + 3,
-                           self.title)
+            self.backend.rectangle(win,
+                                   self.pos_y,
+                                   self.pos_x + 1,
+                                   self.pos_y + title_width,
+                                   self.pos_x + title_height)
+
+            win.addstr(self.pos_y + 1,
+                       self.pos_x + 3,
+                       self.title,
+                       combine_attrs(self.title_colors,
+                                     *self.title_text_attr))
 
         # Display borders of text box.
-        curses.textpad.rectangle(win,
-                                 self.pos_y + self.title_offsetting_y,
-                                 self.pos_x,
-                                 (self.pos_y
-                                  + self.title_offsetting_y
-                                  + self.width),
-                                 self.pos_x + self.height)
+        self.backend.rectangle(win,
+                               self.pos_y + self.title_offsetting_y,
+                               self.pos_x,
+                               (self.pos_y
+                                + self.title_offsetting_y
+                                + self.width),
+                               self.pos_x + self.height)
+
+    def _frame(self) -> CursesWindow:
+        """Return an off-screen window on which the frame of the box is
+        drawn at the same position as on screen.
+
+        The frame is only drawn again when the geometry or title of the
+        box change.
+        """
+        key = (self.pos_x, self.pos_y,
+               self.height, self.width,
+               self.title,
+               getattr(self, "title_colors", 0),
+               tuple(getattr(self, "title_text_attr", ())))
+
+        if key != self._frame_key:
+            # One more line and column so that the lower right corner of
+            # the frame is not the one of the window.
+            self._frame_win = self.backend.newwin(
+                self.pos_y + self.title_offsetting_y + self.width + 2,
+                self.pos_x + self.height + 2)
+            self.framing_box(self._frame_win)
+            self._frame_key = key
+        return self._frame_win
+
+    def _draw_frame(self, win: CursesWindow):
+        """Erase the rectangle occupied by the text box and display its
+        frame, by copying them from :meth:`_frame`.
+        """
+        max_y, max_x = win.getmaxyx()
+        self._frame().overwrite(win,
+                                self.pos_y, self.pos_x,
+                                self.pos_y, self.pos_x,
+                                min(self.pos_y
+                                    + self.title_offsetting_y
+                                    + self.width,
+                                    max_y - 1),
+                                min(self.pos_x + self.height, max_x - 1))
+
+    def _text_area(self, win: CursesWindow) -> Optional[CursesWindow]:
+        """Return a window derived from ``win`` covering the inside of
+        the frame of the text box, or ``None`` if it does not fit in
+        ``win``.
+        """
+        key = (win,
+               self.pos_x, self.pos_y,
+               self.height, self.width,
+               self.title_offsetting_y)
+
+        if key != self._text_area_key:
+            try:
+                self._text_area_win = win.derwin(
+                    self.width - 1,
+                    self.height - 1,
+                    self.pos_y + self.title_offsetting_y + 1,
+                    self.pos_x + 1)
+            except curses.error:
+                self._text_area_win = None
+            else:
+                # Report changes to win, so that they are refreshed.
+                self._text_area_win.syncok(True)
+            self._text_area_key = key
+        return self._text_area_win
+
+    def _erase_text_area(self,
+                         win: CursesWindow,
+                         rows: Optional[Iterable[int]] = None):
+        """Erase the inside of the frame of the text box.
+
+        :param rows: Lines to erase, relative to the top of the inside
+            of the frame. If omitted, all lines are erased.
+        """
+        if rows is None:
+            rows = range(self.width - 1)
+
+        text_area = self._text_area(win)
+        if text_area is not None:
+            for y in rows:
+                text_area.move(y, 0)
+                text_area.clrtoeol()
+            return
+
+        # The box is partially outside of the window.
+        max_y, max_x = win.getmaxyx()
+        blank = " " * min(self.height - 1, max_x - self.pos_x - 1)
+
+        for y in rows:
+            y += self.pos_y + self.title_offsetting_y + 1
+            if y >= max_y:
+                continue
+            try:
+                win.addstr(y, self.pos_x + 1, blank)
+            except curses.error:
+                # Writing the lower right corner of the window moves the
+                # cursor out of it but the cell is still written.
+                pass
 
     def get_input(self, win: CursesWindow):
         """Block execution as long as a key contained in
@@ -220,18 +488,292 @@ class BaseTextBox:
         The method of key detection depends on the variable
         ``self.key_detection``.
 
+        If ``self.auto_advance`` is set, the method returns once this
+        time has elapsed even without confirmation. If
+        ``self.input_timeout`` is set, ``self.idle_callbacks`` are
+        called each time it elapses without key pressed.
+
         :param win: ``curses`` window object on which the method will
             have effect.
 
         :raises PanicError: If a key contained in ``self.panic_keys`` is
             pressed.
         """
-        curses.flushinp()
+        self.backend.napms(self._end_frame())
+        self.backend.flushinp()
+
+        if self.input_timeout is None and self.auto_advance is None:
+            while 1:
+                key = self._read_key(win)
+
+                if self._input_key(win, key):
+                    break
+            return
 
+        start = self.backend.monotonic()
+        timed_out = False
         while 1:
-            key = getattr(win, self.key_detection)()
+            elapsed = self.backend.monotonic() - start
+            timeout = self._read_timeout(elapsed)
+            if timeout is None:
+                break
+            if timed_out:
+                self._idle(win, elapsed)
+
+            key = self._read_key(win, timeout)
+            timed_out = key is None
+
+            if not timed_out and self._input_key(win, key):
+                break
+
+    async def aget_input(self, win: CursesWindow):
+        """Asynchronous counterpart of :meth:`get_input`.
+
+        Instead of blocking, keys are read without delay and the event
+        loop runs other tasks until new input is available.
+
+        :param win: ``curses`` window object on which the method will
+            have effect.
+
+        :raises PanicError: If a key contained in ``self.panic_keys`` is
+            pressed.
+        """
+        await self.backend.asleep(self._end_frame())
+        self.backend.flushinp()
 
-            if key in self.confirm_keys:
+        start = self.backend.monotonic()
+        waited = False
+        while 1:
+            key = self._read_key(win, 0)
+
+            if key is None:
+                elapsed = self.backend.monotonic() - start
+                timeout = self._read_timeout(elapsed)
+                if timeout is None:
+                    break
+                if waited:
+                    self._idle(win, elapsed)
+
+                await self.backend.wait_input(
+                    None if timeout < 0 else timeout)
+                waited = True
+            elif self._input_key(win, key):
                 break
-            elif key in self.panic_keys:
-                raise PanicError(key)
+            else:
+                # As in get_input, the wait ended with a key.
+                waited = False
+
+    def _read_timeout(self, elapsed: float) -> Optional[int]:
+        """Return the time to wait for a key in milliseconds, ``-1`` to
+        wait without limit, or ``None`` if ``self.auto_advance`` has
+        elapsed.
+
+        :param elapsed: Time elapsed since waiting started.
+        """
+        timeout = -1 if self.input_timeout is None else self.input_timeout
+
+        if self.auto_advance is not None:
+            remaining = int(self.auto_advance - elapsed)
+            if remaining <= 0:
+                return None
+            timeout = remaining if timeout < 0 else min(timeout, remaining)
+        return timeout
+
+    def _idle(self, win: CursesWindow, elapsed: float):
+        """Call ``self.idle_callbacks``."""
+        for callback in self.idle_callbacks:
+            callback(self, win, elapsed)
+
+    def _typing_keys(self, win: CursesWindow, ms: int) -> Optional[int]:
+        """Handle a key pressed while text is written, before waiting
+        ``ms`` milliseconds.
+
+        Keyboard is only polled if ``self.allow_skip`` is set or
+        ``self.fast_forward_keys`` is not empty.
+
+        :returns: ``None`` if the rest of the page must be displayed at
+            once, else the time to wait instead of ``ms``.
+
+        :raises PanicError: If a key contained in ``self.panic_keys`` is
+            pressed.
+        """
+        if not (self.allow_skip or self.fast_forward_keys):
+            return ms
+
+        key = self._read_key(win, 0)
+        now = self.backend.monotonic()
+
+        if key is not None:
+            if key in self.fast_forward_keys:
+                # Held keys are repeated by the terminal, acceleration
+                # lasts until the next expected repetition. The first
+                # repetition comes later than the following ones.
+                if now < self._fast_forward_until:
+                    interval = _KEY_REPEAT_INTERVAL
+                else:
+                    interval = _KEY_REPEAT_DELAY
+                self._fast_forward_until = now + interval
+            elif self._is_confirmation(key) and self.allow_skip:
+                return None
+
+        if now < self._fast_forward_until:
+            return ms // self.fast_forward_factor
+        return ms
+
+    def _read_key(self,
+                  win: CursesWindow,
+                  timeout: int = -1) -> Optional[CursesKey]:
+        """Return the key pressed, or ``None`` if no key is pressed
+        before ``timeout`` milliseconds elapse.
+
+        Keys are read from ``self.key_source`` if it is set, otherwise
+        from ``win`` with ``self.key_detection``, and reported to
+        ``self.recorder``.
+
+        :param timeout: Maximum time to wait for a key, ``-1`` to wait
+            without limit. This defaults to ``-1``.
+        """
+        if self.key_source is not None:
+            key = self.key_source(win, timeout)
+        elif timeout < 0:
+            key = getattr(win, self.key_detection)()
+        else:
+            win.timeout(timeout)
+            try:
+                key = getattr(win, self.key_detection)()
+            except curses.error:
+                # No key pressed before the timeout.
+                key = None
+            finally:
+                win.timeout(-1)
+
+            if key == -1:
+                key = None
+
+        if key is not None and self.recorder is not None:
+            self.recorder.key(self, key)
+        return key
+
+    def _input_key(self, win: CursesWindow, key: CursesKey) -> bool:
+        """Handle ``key`` pressed while :meth:`get_input` waits.
+
+        :returns: ``True`` if ``key`` confirms to continue.
+
+        :raises PanicError: If ``key`` is contained in
+            ``self.panic_keys``.
+        """
+        return self._is_confirmation(key)
+
+    def _is_confirmation(self, key: CursesKey) -> bool:
+        """Return ``True`` if ``key`` is contained in
+        ``self.confirm_keys``.
+
+        :raises PanicError: If ``key`` is contained in
+            ``self.panic_keys``.
+        """
+        if key in self.confirm_keys:
+            return True
+        elif key in self.panic_keys:
+            raise PanicError(key)
+        return False
+
+    def _write(self,
+               win: CursesWindow,
+               y: int,
+               x: int,
+               text: str,
+               attr: CursesTextAttribute):
+        """Write ``text`` at ``y``, ``x`` of ``win`` with ``attr``,
+        reporting it to ``self.stats`` and ``self.recorder``.
+        """
+        win.addstr(y, x, text, attr)
+        if self.stats is not None:
+            self.stats.drawn(text)
+        if self.recorder is not None:
+            self.recorder.draw(self, y, x, text, attr)
+
+    def _present(self, win: CursesWindow):
+        """Make the last writes on ``win`` visible, immediately or at
+        the next frame depending on ``self.frame_interval``.
+        """
+        self._refresh(win, self.frame_interval or self._defer_refresh)
+
+    def _refresh(self, win: CursesWindow, defer: bool = False):
+        """Refresh ``win``, reporting it to ``self.stats`` and
+        ``self.recorder``.
+
+        :param defer: If ``True``, ``win`` is only marked to be copied
+            at the next ``curses.doupdate``. This defaults to ``False``.
+        """
+        if defer:
+            win.noutrefresh()
+        else:
+            win.refresh()
+
+        if self.stats is not None:
+            self.stats.refreshes += 1
+        if self.recorder is not None:
+            self.recorder.refresh(self)
+
+    def _frame_wait(self, ms: int) -> int:
+        """Return the time to wait now instead of ``ms`` milliseconds.
+
+        If ``self.frame_interval`` is set, ``ms`` is added to the waiting
+        time of the current frame which is only returned once the frame
+        is over.
+        """
+        if not self.frame_interval:
+            return ms
+
+        self._pending_delay += ms
+        if self._pending_delay >= self.frame_interval:
+            return self._end_frame()
+        return 0
+
+    def _schedule(self, ms: int) -> int:
+        """Return the time to wait for the next write to happen ``ms``
+        milliseconds after the time the previous one was scheduled for.
+        """
+        now = self.backend.monotonic()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += ms
+
+        lag = now - self._deadline
+        if self.stats is not None and lag > self.stats.max_lag:
+            self.stats.max_lag = lag
+        if lag > _MAX_TYPING_LAG:
+            # Too late to catch up, start again from now.
+            self._deadline = now
+        self.typing_lag = max(lag, 0)
+        return max(int(-lag), 0)
+
+    def _end_frame(self) -> int:
+        """Update the physical screen and return the waiting time
+        accumulated since the last frame.
+        """
+        pending, self._pending_delay = self._pending_delay, 0
+        if self.frame_interval:
+            self.backend.doupdate()
+            if self.stats is not None:
+                self.stats.updates += 1
+        return pending
+
+    def _call_callbacks(self, callbacks: Iterable[Callable], *args):
+        """Call ``callbacks`` one by one with the current instance and
+        ``args``.
+        """
+        if self.stats is None:
+            for callback in callbacks:
+                callback(self, *args)
+            return
+
+        start = self.backend.monotonic()
+        for callback in callbacks:
+            callback(self, *args)
+        self.stats.callback_time += self.backend.monotonic() - start
+
+    def _report_stats(self):
+        """Give ``self.stats`` to ``self.stats_sinks``."""
+        for sink in self.stats_sinks:
+            sink(self, self.stats)
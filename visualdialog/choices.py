@@ -1,29 +1,309 @@
 # choices.py
 # 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
 
+__all__ = ["ChoiceBox"]
+
 import curses
-from typing import Any, Mapping, Tuple, Union
+from typing import Any, Iterable, Mapping, Sequence, Union
 
 from .dialog import DialogBox
-from .type import *
-from .utils import TextAttr, chunked
+from .type import (CursesKey, CursesTextAttribute, CursesTextAttributes,
+                   CursesWindow)
+from .utils import combine_attrs, to_tuple
+from .width import fit, text_width
+
+
+class _Menu:
+    """Selection state of a list of propositions displayed by a
+    :class:`ChoiceBox`.
+    """
+    def __init__(self,
+                 box: "ChoiceBox",
+                 win: CursesWindow,
+                 labels: Sequence[str],
+                 attr: CursesTextAttribute,
+                 selected: int):
+        self.box, self.win = box, win
+        self.labels = labels
+        self.attr = attr
+        self.rows = box.nb_lines_max
+        self.selected = selected
+        # Index of the first visible proposition.
+        self.top = max(0, min(selected - self.rows + 1,
+                              len(labels) - self.rows))
+        # Digits typed to select a proposition by its number.
+        self.number = ""
+
+    def draw(self):
+        """Display visible propositions and scroll marks."""
+        for index in range(self.top,
+                           min(self.top + self.rows, len(self.labels))):
+            self.draw_row(index)
+
+        box = self.box
+        more_above = self.top > 0
+        more_below = self.top + self.rows < len(self.labels)
+        box._write(self.win,
+                   box.text_pos_y,
+                   box.end_indicator_pos_x,
+                   box.more_above_char if more_above else " ",
+                   self.attr)
+        box._write(self.win,
+                   box.text_pos_y + self.rows - 1,
+                   box.end_indicator_pos_x,
+                   box.more_below_char if more_below else " ",
+                   self.attr)
+
+    def draw_row(self, index: int):
+        """Display the proposition at ``index``, highlighted if it is
+        selected.
+        """
+        box = self.box
+        columns = box.nb_char_max_line
+        text = self.labels[index]
+        if box.numbered:
+            digits = len(str(len(self.labels)))
+            text = f"{index + 1:>{digits}}. {text}"
+
+        text = text[:fit(text, columns)]
+        # Padding erases the previous proposition and extends the
+        # highlight to the whole row.
+        text += " " * (columns - text_width(text))
+
+        attr = self.attr
+        if index == self.selected:
+            attr = combine_attrs(attr, *to_tuple(box.highlight_attr))
+        box._write(self.win,
+                   box.text_pos_y + index - self.top,
+                   box.text_pos_x,
+                   text,
+                   attr)
+
+    def press(self, key: CursesKey) -> bool:
+        """Move the selection according to ``key``.
+
+        :returns: ``True`` if the selection is confirmed.
+
+        :raises PanicError: If ``key`` is contained in
+            ``self.box.panic_keys``.
+        """
+        box = self.box
+        if box._is_confirmation(key):
+            return True
+
+        last = len(self.labels) - 1
+        selected = self.selected
+        digit = chr(key) if isinstance(key, int) and 0 <= key < 128 else key
+
+        if isinstance(digit, str) and digit.isdigit() and len(digit) == 1:
+            number = int(self.number + digit)
+            if not 1 <= number <= last + 1:
+                # Start a new number.
+                number = int(digit)
+            self.number = str(number)
+            if 1 <= number <= last + 1:
+                selected = number - 1
+        else:
+            self.number = ""
+            if key in box.up_keys:
+                selected = max(selected - 1, 0)
+            elif key in box.down_keys:
+                selected = min(selected + 1, last)
+            elif key in box.page_up_keys:
+                selected = max(selected - self.rows, 0)
+            elif key in box.page_down_keys:
+                selected = min(selected + self.rows, last)
+            elif key in box.home_keys:
+                selected = 0
+            elif key in box.end_keys:
+                selected = last
+
+        self.select(selected)
+        return False
+
+    def select(self, index: int):
+        """Highlight the proposition at ``index`` instead of the one
+        selected, scrolling if it is not visible.
+        """
+        if index == self.selected:
+            return
+
+        previous, self.selected = self.selected, index
+        if index < self.top or index >= self.top + self.rows:
+            self.top = (index if index < self.top
+                        else index - self.rows + 1)
+            self.draw()
+        else:
+            # Only rows whose highlight changed are written again.
+            self.draw_row(previous)
+            self.draw_row(index)
+        self.box._refresh(self.win)
 
 
 class ChoiceBox(DialogBox):
+    """This class provides a text box in which the user chooses one of
+    several propositions.
 
-    def __init__(self,
-                 **kwargs):
-        super().__init__(**kwargs)
+    Base :class:`DialogBox`.
+
+    Propositions are displayed one by line, the selected one being
+    highlighted. Lists longer than the box are scrolled. Moving the
+    selection only writes again the rows whose highlight changed, so
+    that long menus stay responsive over slow terminals.
+
+    The selection is moved by the navigation keys of
+    :class:`DialogBox`, such as ``self.up_keys`` and ``self.down_keys``,
+    and scroll marks are ``self.more_above_char`` and
+    ``self.more_below_char``. Typing the number of a proposition
+    selects it.
+
+    :param args: Constructor arguments of :class:`DialogBox`.
+
+    :param kwargs: Constructor keyword arguments of :class:`DialogBox`.
+
+    :ivar confirm_keys: initial value: [" ", "\\n"]:
+        List of keys confirming the selected proposition.
 
-    def chain(
+    :ivar highlight_attr: initial value: curses.A_REVERSE:
+        Text attribute or tuple of text attributes of the selected
+        proposition.
+
+    :ivar numbered: initial value: True:
+        If ``True``, propositions are preceded by their number.
+    """
+    def __init__(self, *args, **kwargs):
+        """Initializes instance of :class:`ChoiceBox`."""
+        super().__init__(*args, **kwargs)
+
+        self.confirm_keys = [" ", "\n"]
+
+        #: Attributes of the selected proposition.
+        #: This defaults to ``curses.A_REVERSE``.
+        self.highlight_attr: Union[CursesTextAttribute,
+                                   CursesTextAttributes] = curses.A_REVERSE
+        #: Display the number of propositions. This defaults to ``True``.
+        self.numbered = True
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return f"ChoiceBox(title={self.title})"
+
+    def chain(self,
+              propositions: Union[Sequence[str], Mapping[str, Any]],
+              win: CursesWindow = None,
+              colors_pair_nb: int = 0,
+              text_attr: Union[CursesTextAttribute,
+                               CursesTextAttributes] = (),
+              default: int = 0) -> Any:
+        """Display ``propositions`` and let the user choose one of them.
+
+        :param propositions: Sequence of propositions, or mapping of
+            propositions to the values returned when they are chosen.
+
+        :param win: ``curses`` window object on which the method will
+            have effect.
+
+        :param colors_pair_nb: Number of the curses color pair that
+            will be used to color propositions. This defaults to ``0``.
+
+        :param text_attr: Text attributes of propositions. This defaults
+            to an empty tuple.
+
+        :param default: Index of the proposition selected at first. This
+            defaults to ``0``.
+
+        :returns: The proposition chosen, or its value if
+            ``propositions`` is a mapping.
+
+        :raises TypeError: If ``propositions`` is neither a sequence
+            nor a mapping.
+
+        :raises ValueError: If ``propositions`` is empty.
+
+        :raises PanicError: If a key contained in ``self.panic_keys`` is
+            pressed.
+
+        .. note::
+            This method used to take the window first and the
+            propositions as the following positional arguments, as in
+            ``chain(win, "Yes", "No")``, and to return nothing.
+            Propositions now come first, in a single sequence or
+            mapping: ``chain(["Yes", "No"], win)``.
+        """
+        win = self.global_win or win
+        menu = self._menu(propositions, win, colors_pair_nb, text_attr,
+                          default)
+
+        while not menu.press(self._read_key(win)):
+            pass
+        return self._choice(propositions, menu)
+
+    async def achain(
             self,
-            win,
-            *propositions: Mapping[str, Any]) -> Any:
-        """"""
-        super().framing_box(win)
-
-        for y, proposition in enumerate(propositions):
-            win.addstr(self.pos_y + y*2,
-                       self.pos_x,
-                       proposition)
-            win.refresh()
+            propositions: Union[Sequence[str], Mapping[str, Any]],
+            win: CursesWindow = None,
+            colors_pair_nb: int = 0,
+            text_attr: Union[CursesTextAttribute,
+                             CursesTextAttributes] = (),
+            default: int = 0) -> Any:
+        """Asynchronous counterpart of :meth:`chain`, which takes the
+        same arguments.
+
+        Instead of blocking, keys are read without delay and the event
+        loop runs other tasks until new input is available.
+        """
+        win = self.global_win or win
+        menu = self._menu(propositions, win, colors_pair_nb, text_attr,
+                          default)
+
+        while 1:
+            key = self._read_key(win, 0)
+            if key is None:
+                await self.backend.wait_input()
+            elif menu.press(key):
+                return self._choice(propositions, menu)
+
+    def _menu(self,
+              propositions: Union[Sequence[str], Mapping[str, Any]],
+              win: CursesWindow,
+              colors_pair_nb: int,
+              text_attr: Union[CursesTextAttribute,
+                               CursesTextAttributes],
+              default: int) -> _Menu:
+        """Display the box and ``propositions``, and return their
+        selection state.
+        """
+        if (isinstance(propositions, str)
+                or not isinstance(propositions, Iterable)):
+            raise TypeError("propositions must be a sequence or a mapping, "
+                            f"not {type(propositions).__name__}")
+        labels = list(propositions)
+        if not labels:
+            raise ValueError("propositions must not be empty")
+        self._record_call("chain",
+                          labels,
+                          {"colors_pair_nb": colors_pair_nb,
+                           "text_attr": text_attr,
+                           "default": default})
+
+        attr = combine_attrs(self.backend.color_pair(colors_pair_nb),
+                             *to_tuple(text_attr))
+        menu = _Menu(self, win, labels, attr,
+                     min(max(default, 0), len(labels) - 1))
+
+        self.backend.flushinp()
+        if self.clear_window:
+            win.clear()
+        self._draw_frame(win)
+        menu.draw()
+        self._refresh(win)
+        return menu
+
+    @staticmethod
+    def _choice(propositions: Union[Sequence[str], Mapping[str, Any]],
+                menu: _Menu) -> Any:
+        """Return the value of the proposition selected in ``menu``."""
+        label = menu.labels[menu.selected]
+        if isinstance(propositions, Mapping):
+            return propositions[label]
+        return label
@@ -4,14 +4,163 @@
 __all__ = ["DialogBox"]
 
 import curses
+import inspect
+import itertools
 import random
-import textwrap
-from typing import (Any, Callable, Iterable, List, Mapping, Optional, Sequence,
-                    Tuple, Union)
+from collections import deque
+from typing import (Any, AsyncIterable, Callable, Deque, Iterable, Iterator,
+                    List, Mapping, Optional, Sequence, Union)
 
+from .backend import CursesBackend
 from .box import BaseTextBox
-from .type import CursesTextAttribute, CursesTextAttributes, CursesWindow
-from .utils import TextAttr, chunked, to_tuple
+from .layout import (LayoutCache, Line, LineCompiler, Page, PageHistory,
+                     RenderPlan, Run, StreamWrapper, coalesce_runs,
+                     compile_layout, default_layout_cache, wrap_lazily)
+from .type import (CursesKey, CursesTextAttribute, CursesTextAttributes,
+                   CursesWindow)
+from .utils import combine_attrs, to_tuple
+from .width import WidthTextWrapper, graphemes, text_width
+
+
+# Yielded by DialogBox._steps when a confirmation is expected.
+_INPUT = object()
+# Yielded when all the text received by DialogBox.stream is displayed.
+_MORE_TEXT = object()
+# Number of lines of the largest pad curses can create.
+_MAX_PAD_LINES = 32767
+
+
+async def _aiter(iterable: Iterable) -> AsyncIterable:
+    """Return an asynchronous iterator over ``iterable``."""
+    for item in iterable:
+        yield item
+
+
+def _words(line: Line) -> Iterator[Sequence[Run]]:
+    """Yield the runs of each word of ``line``."""
+    start = 0
+    for i in range(1, len(line)):
+        if not line[i].joined:
+            yield line[start:i]
+            start = i
+    if line:
+        yield line[start:]
+
+
+class _TextFeed:
+    """Lines of a text received piece by piece."""
+    def __init__(self,
+                 wrapper: StreamWrapper,
+                 compiler: LineCompiler,
+                 nb_lines_max: int):
+        self.wrapper = wrapper
+        self.compiler = compiler
+        self.nb_lines_max = nb_lines_max
+        self.closed = False
+        self._lines: Deque[str] = deque()
+
+    def feed(self, fragment: str):
+        self._lines.extend(self.wrapper.feed(fragment))
+
+    def close(self):
+        self._lines.extend(self.wrapper.close())
+        self.closed = True
+
+    def lines(self) -> Iterator[Union[Line, object]]:
+        """Yield compiled lines, ``_MORE_TEXT`` when more text must be
+        fed.
+        """
+        for y in itertools.cycle(range(self.nb_lines_max)):
+            while not self._lines:
+                if self.closed:
+                    return
+                yield _MORE_TEXT
+            yield self.compiler.compile(self._lines.popleft(), y)
+
+
+class _Viewport:
+    """Visible region of a text drawn once into a pad by
+    :meth:`DialogBox.scroll`.
+    """
+    def __init__(self,
+                 box: "DialogBox",
+                 win: CursesWindow,
+                 pad: CursesWindow,
+                 nb_lines: int,
+                 attr: CursesTextAttribute,
+                 top: int):
+        self.box, self.win, self.pad = box, win, pad
+        self.nb_lines = nb_lines
+        self.attr = attr
+        self.rows = box.nb_lines_max
+        self.last_top = max(nb_lines - self.rows, 0)
+        # Index of the first visible line.
+        self.top = min(max(top, 0), self.last_top)
+
+        begin_y, begin_x = win.getbegyx()
+        self.screen_y = begin_y + box.text_pos_y
+        self.screen_x = begin_x + box.text_pos_x
+
+    def show(self):
+        """Display the visible lines of the pad and scroll marks in a
+        single update of the screen.
+        """
+        box = self.box
+        box._write(self.win,
+                   box.text_pos_y,
+                   box.end_indicator_pos_x,
+                   box.more_above_char if self.top > 0 else " ",
+                   self.attr)
+        box._write(self.win,
+                   box.text_pos_y + self.rows - 1,
+                   box.end_indicator_pos_x,
+                   box.more_below_char if self.top < self.last_top
+                   else " ",
+                   self.attr)
+        self.win.noutrefresh()
+        # Only the visible region is copied, whatever the text length.
+        self.pad.noutrefresh(self.top, 0,
+                             self.screen_y,
+                             self.screen_x,
+                             self.screen_y + self.rows - 1,
+                             self.screen_x + box.nb_char_max_line - 1)
+        box.backend.doupdate()
+
+        if box.stats is not None:
+            box.stats.refreshes += 2
+            box.stats.updates += 1
+
+    def press(self, key: CursesKey) -> bool:
+        """Scroll according to ``key``.
+
+        :returns: ``True`` if the view is confirmed.
+
+        :raises PanicError: If ``key`` is contained in
+            ``self.box.panic_keys``.
+        """
+        box = self.box
+        if box._is_confirmation(key):
+            return True
+
+        top = self.top
+        if key in box.up_keys:
+            top -= 1
+        elif key in box.down_keys:
+            top += 1
+        elif key in box.page_up_keys:
+            top -= self.rows
+        elif key in box.page_down_keys:
+            top += self.rows
+        elif key in box.home_keys:
+            top = 0
+        elif key in box.end_keys:
+            top = self.last_top
+
+        top = min(max(top, 0), self.last_top)
+        if top != self.top:
+            self.top = top
+            self.show()
+        return False
 
 
 class DialogBox(BaseTextBox):
@@ -34,9 +183,71 @@ class DialogBox(BaseTextBox):
     :param kwargs: Constructor keyword arguments of
         :class:`BaseTextBox`.
 
+    :ivar layout_cache: initial value:
+        ``visualdialog.layout.default_layout_cache``:
+        :class:`visualdialog.layout.LayoutCache` in which the layout of
+        displayed texts is kept, so that a text displayed again is not
+        wrapped and cut into words again. It is shared by default by
+        all instances. Set it to ``None`` to disable caching.
+
+    :ivar lazy_layout_threshold: initial value: 16384:
+        Length from which texts are wrapped and cut into pages as they
+        are displayed instead of all at once, so time before the first
+        character is written and memory used do not depend on text
+        length. Such texts are not cached in ``layout_cache``. Set it
+        to ``None`` to always lay out texts at once.
+
+    :ivar history: initial value: None:
+        :class:`visualdialog.layout.PageHistory` in which pages are
+        kept once displayed. While :meth:`get_input` waits, keys
+        contained in ``self.history_back_keys`` and
+        ``self.history_forward_keys`` display again previous pages at
+        once. Confirming while a previous page is displayed brings back
+        the current one. Pages are not kept if ``None``.
+
+    :ivar history_back_keys: initial value: ["KEY_UP", curses.KEY_UP]:
+        List of keys displaying the page before the one displayed.
+
+    :ivar history_forward_keys: initial value:
+        ["KEY_DOWN", curses.KEY_DOWN]:
+        List of keys displaying the page after the one displayed.
+
+    :ivar up_keys: initial value: ["KEY_UP", curses.KEY_UP]:
+        List of keys moving up by a line in :meth:`scroll`, or selecting
+        the previous proposition of a
+        :class:`visualdialog.choices.ChoiceBox`.
+
+    :ivar down_keys: initial value: ["KEY_DOWN", curses.KEY_DOWN]:
+        List of keys moving down by a line, or selecting the next
+        proposition.
+
+    :ivar page_up_keys: initial value: ["KEY_PPAGE", curses.KEY_PPAGE]:
+        List of keys moving up by a page.
+
+    :ivar page_down_keys: initial value: ["KEY_NPAGE", curses.KEY_NPAGE]:
+        List of keys moving down by a page.
+
+    :ivar home_keys: initial value: ["KEY_HOME", curses.KEY_HOME]:
+        List of keys moving to the beginning.
+
+    :ivar end_keys: initial value: ["KEY_END", curses.KEY_END]:
+        List of keys moving to the end.
+
+    :ivar more_above_char: initial value: "▲":
+        Character displayed in the upper right corner of the box when
+        lines are hidden above.
+
+    :ivar more_below_char: initial value: "▼":
+        Character displayed in the lower right corner of the box when
+        lines are hidden below.
+
     .. note::
         This class can be used as a context manager.
     """
+    # Write method used by each public method displaying text.
+    _write_methods = {"char_by_char": "_write_word_char_by_char",
+                      "word_by_word": "_write_word"}
+
     def __init__(
             self,
             pos_x: int,
@@ -50,16 +261,18 @@ class DialogBox(BaseTextBox):
             downtime_chars: Sequence[str] = (",", ".", ":", ";", "!", "?"),
             downtime_chars_delay: int = 600,
             end_indicator: str = "►",
-            global_win: Optional[CursesWindow] = None):
+            global_win: Optional[CursesWindow] = None,
+            backend: Optional[CursesBackend] = None):
         """Initializes instance of :class:`DialogBox`."""
         BaseTextBox.__init__(self,
                              pos_x, pos_y,
                              height, width,
                              title,
                              title_colors_pair_nb, title_text_attr,
-                             downtime_chars, downtime_chars_delay)
+                             downtime_chars, downtime_chars_delay,
+                             backend)
 
-        self.text_wrapper = textwrap.TextWrapper(width=self.nb_char_max_line)
+        self.text_wrapper = WidthTextWrapper(width=self.nb_char_max_line)
 
         self.end_indicator_char = end_indicator
         self.end_indicator_pos_x = self.pos_x + self.height - 2
@@ -71,6 +284,40 @@ class DialogBox(BaseTextBox):
 
         self.global_win = global_win
 
+        #: Cache of texts layouts.
+        self.layout_cache: Optional[LayoutCache] = default_layout_cache
+        #: Length from which texts are laid out lazily.
+        self.lazy_layout_threshold: Optional[int] = 16384
+
+        #: History of displayed pages, not kept if ``None``.
+        #: This defaults to ``None``.
+        self.history: Optional[PageHistory] = None
+        #: Keys browsing the history while a confirmation is waited.
+        self.history_back_keys: List[CursesKey] = ["KEY_UP", curses.KEY_UP]
+        self.history_forward_keys: List[CursesKey] = ["KEY_DOWN",
+                                                      curses.KEY_DOWN]
+        # Number of pages between the one displayed and the current one.
+        self._history_position = 0
+        # Draws random delays, seeded for each text.
+        self._random = random.Random()
+        # Seed of the random delays of the next text, drawn at random if
+        # None. Set when a session is replayed.
+        self._seed: Optional[int] = None
+
+        #: Keys moving in scrolled text and lists.
+        self.up_keys: List[CursesKey] = ["KEY_UP", curses.KEY_UP]
+        self.down_keys: List[CursesKey] = ["KEY_DOWN", curses.KEY_DOWN]
+        self.page_up_keys: List[CursesKey] = ["KEY_PPAGE",
+                                              curses.KEY_PPAGE]
+        self.page_down_keys: List[CursesKey] = ["KEY_NPAGE",
+                                                curses.KEY_NPAGE]
+        self.home_keys: List[CursesKey] = ["KEY_HOME", curses.KEY_HOME]
+        self.end_keys: List[CursesKey] = ["KEY_END", curses.KEY_END]
+
+        #: Scroll marks. This defaults to ``"▲"`` and ``"▼"``.
+        self.more_above_char = "▲"
+        self.more_below_char = "▼"
+
     def __repr__(self) -> str:
         """Return repr(self)."""
         return f"DialogBox(title={self.title})"
@@ -135,7 +382,10 @@ class DialogBox(BaseTextBox):
         :param words_attr: Mapping composed of string as a key and a
             single curses text attribute or tuple as a value. Each key
             is colored with its associated values This defaults to an
-            empty dictionary.
+            empty dictionary. Keys can be words, phrases or compiled
+            regular expressions, or tuples of them. Words and phrases
+            are also colored when punctuation is attached to them, see
+            :class:`visualdialog.layout.Highlighter`.
 
         :param word_delimiter: The delimiter according which to
             split the text in word. This defaults to ``" "``.
@@ -175,8 +425,9 @@ class DialogBox(BaseTextBox):
             for more information of the behavior of text wrap.
 
         .. warning::
-            ``win`` will be completely cleaned when writing each
-            paragraph by ``window.clear`` method of ``curses`` module.
+            ``win`` will be completely cleaned before writing the
+            first paragraph by ``window.clear`` method of ``curses``
+            module if ``self.clear_window`` is ``True``.
         """
         self._one_by_one(self._write_word_char_by_char,
                          text,
@@ -230,7 +481,10 @@ class DialogBox(BaseTextBox):
         :param words_attr: Mapping composed of string as a key and a
             single curses text attribute or tuple as a value. Each key
             is colored with its associated values This defaults to an
-            empty dictionary.
+            empty dictionary. Keys can be words, phrases or compiled
+            regular expressions, or tuples of them. Words and phrases
+            are also colored when punctuation is attached to them, see
+            :class:`visualdialog.layout.Highlighter`.
 
         :param word_delimiter: The delimiter according which to
             split the text in word. This defaults to ``" "``.
@@ -268,8 +522,9 @@ class DialogBox(BaseTextBox):
             for more information of the behavior of text wrap.
 
         .. warning::
-            ``win`` will be completely cleaned when writing each
-            paragraph by ``window.clear`` method of ``curses`` module.
+            ``win`` will be completely cleaned before writing the
+            first paragraph by ``window.clear`` method of ``curses``
+            module if ``self.clear_window`` is ``True``.
 
         .. warning::
             ``self.downtime_chars`` and ``self.downtime_chars_delay`` do
@@ -289,6 +544,305 @@ class DialogBox(BaseTextBox):
 
         return text
 
+    async def achar_by_char(
+            self,
+            text: str,
+            win: CursesWindow = None,
+            colors_pair_nb: int = 0,
+            text_attr: Union[CursesTextAttribute,
+                             CursesTextAttributes] = (),
+            words_attr: Mapping[Sequence[str],
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]] = {},
+            word_delimiter: str = " ",
+            flash_screen: bool = False,
+            delay: int = 40,
+            random_delay: Sequence[int] = (0, 0),
+            callbacks: Iterable[Callable[["DialogBox", str],
+                                         Optional[Any]]] = ()) -> str:
+        """Asynchronous counterpart of :meth:`char_by_char`, which takes
+        the same arguments.
+
+        Delays are waited with the event loop and confirmation keys are
+        read with :meth:`BaseTextBox.aget_input`, so other tasks keep
+        running while the text is written::
+
+            await box.achar_by_char("Foo bar", win)
+        """
+        await self._aone_by_one(self._write_word_char_by_char,
+                                text,
+                                win,
+                                colors_pair_nb,
+                                text_attr,
+                                words_attr,
+                                word_delimiter,
+                                flash_screen,
+                                delay,
+                                random_delay,
+                                callbacks)
+
+        return text
+
+    async def aword_by_word(
+            self,
+            text: str,
+            win: CursesWindow = None,
+            colors_pair_nb: int = 0,
+            text_attr: Union[CursesTextAttribute,
+                             CursesTextAttributes] = (),
+            words_attr: Mapping[Sequence[str],
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]] = {},
+            word_delimiter: str = " ",
+            flash_screen: bool = False,
+            delay: int = 150,
+            random_delay: Sequence[int] = (0, 0),
+            callbacks: Iterable[Callable[["DialogBox", str],
+                                         Optional[Any]]] = ()) -> str:
+        """Asynchronous counterpart of :meth:`word_by_word`, which takes
+        the same arguments.
+
+        See :meth:`achar_by_char`.
+        """
+        await self._aone_by_one(self._write_word,
+                                text,
+                                win,
+                                colors_pair_nb,
+                                text_attr,
+                                words_attr,
+                                word_delimiter,
+                                flash_screen,
+                                delay,
+                                random_delay,
+                                callbacks)
+
+        return text
+
+    def stream(self,
+               fragments: Iterable[str],
+               win: CursesWindow = None,
+               colors_pair_nb: int = 0,
+               text_attr: Union[CursesTextAttribute,
+                                CursesTextAttributes] = (),
+               words_attr: Mapping[Sequence[str],
+                                   Union[CursesTextAttribute,
+                                         CursesTextAttributes]] = {},
+               word_delimiter: str = " ",
+               flash_screen: bool = False,
+               delay: int = 40,
+               random_delay: Sequence[int] = (0, 0),
+               callbacks: Iterable[Callable[["DialogBox", str],
+                                            Optional[Any]]] = (),
+               method: str = "char_by_char",
+               max_buffer: int = 4096):
+        """Write a text received piece by piece, for instance lines read
+        from a subprocess.
+
+        Each fragment is wrapped as soon as it is received and complete
+        lines are written without waiting for the end of ``fragments``.
+        Next fragment is only requested once all lines received are
+        written, so at most one page of text is kept in memory.
+
+        :param fragments: Iterable of strings which form the text to
+            display. Unlike :meth:`char_by_char`, line breaks
+            (``"\\n"``) contained in the text are kept.
+
+        :param method: Name of the method whose way of writing is used:
+            ``"char_by_char"`` or ``"word_by_word"``. This defaults to
+            ``"char_by_char"``.
+
+        :param max_buffer: Maximum number of characters wrapped at once.
+            Longer fragments are cut. This defaults to ``4096``.
+
+        Other parameters are the same as :meth:`char_by_char` ones.
+        """
+        win = self.global_win or win
+        feed = self._text_feed(colors_pair_nb, text_attr, words_attr,
+                               word_delimiter, flash_screen, delay,
+                               random_delay, method, max_buffer)
+        fragments = iter(fragments)
+
+        for step in self._waits(win, self._line_steps(
+                getattr(self, self._write_methods[method]),
+                feed.lines(),
+                win,
+                flash_screen,
+                delay,
+                random_delay,
+                callbacks)):
+            if step is _INPUT:
+                self.get_input(win)
+            elif step is _MORE_TEXT:
+                try:
+                    fragment = next(fragments)
+                except StopIteration:
+                    feed.close()
+                else:
+                    if self.recorder is not None:
+                        self.recorder.fragment(self, fragment)
+                    feed.feed(fragment)
+            else:
+                self.backend.napms(step)
+
+    async def astream(
+            self,
+            fragments: Union[Iterable[str], AsyncIterable[str]],
+            win: CursesWindow = None,
+            colors_pair_nb: int = 0,
+            text_attr: Union[CursesTextAttribute,
+                             CursesTextAttributes] = (),
+            words_attr: Mapping[Sequence[str],
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]] = {},
+            word_delimiter: str = " ",
+            flash_screen: bool = False,
+            delay: int = 40,
+            random_delay: Sequence[int] = (0, 0),
+            callbacks: Iterable[Callable[["DialogBox", str],
+                                         Optional[Any]]] = (),
+            method: str = "char_by_char",
+            max_buffer: int = 4096):
+        """Asynchronous counterpart of :meth:`stream`, which takes the
+        same arguments.
+
+        ``fragments`` can also be an asynchronous iterable, the text
+        already received being written while next fragments are
+        awaited.
+        """
+        win = self.global_win or win
+        feed = self._text_feed(colors_pair_nb, text_attr, words_attr,
+                               word_delimiter, flash_screen, delay,
+                               random_delay, method, max_buffer)
+        if isinstance(fragments, AsyncIterable):
+            fragments = fragments.__aiter__()
+        else:
+            fragments = _aiter(fragments)
+
+        for step in self._waits(win, self._line_steps(
+                getattr(self, self._write_methods[method]),
+                feed.lines(),
+                win,
+                flash_screen,
+                delay,
+                random_delay,
+                callbacks)):
+            if step is _INPUT:
+                await self.aget_input(win)
+            elif step is _MORE_TEXT:
+                try:
+                    fragment = await fragments.__anext__()
+                except StopAsyncIteration:
+                    feed.close()
+                else:
+                    if self.recorder is not None:
+                        self.recorder.fragment(self, fragment)
+                    feed.feed(fragment)
+            else:
+                await self.backend.asleep(step)
+
+    def scroll(self,
+               text: str,
+               win: CursesWindow = None,
+               colors_pair_nb: int = 0,
+               text_attr: Union[CursesTextAttribute,
+                                CursesTextAttributes] = (),
+               words_attr: Mapping[Sequence[str],
+                                   Union[CursesTextAttribute,
+                                         CursesTextAttributes]] = {},
+               word_delimiter: str = " ",
+               start: int = 0) -> int:
+        """Display ``text`` at once in a viewport scrolled line by line
+        until the user confirms, instead of page by page.
+
+        The whole text is laid out and written once into a ``curses``
+        pad, of which only the visible lines are copied to the screen.
+        Scrolling neither lays out nor writes text again, so it takes
+        the same time whatever the length of the text. Keys contained
+        in ``self.up_keys``, ``self.down_keys``, ``self.page_up_keys``,
+        ``self.page_down_keys``, ``self.home_keys`` and
+        ``self.end_keys`` move the viewport, keys contained in
+        ``self.confirm_keys`` close it.
+
+        :param start: Index of the first line displayed. This defaults
+            to ``0``.
+
+        :returns: Index of the first line displayed when the viewport
+            is closed, to open it again at the same place.
+
+        :raises ValueError: If ``text`` has more lines than a ``curses``
+            pad can hold.
+
+        :raises PanicError: If a key contained in ``self.panic_keys`` is
+            pressed.
+
+        Other parameters are the same as :meth:`char_by_char` ones.
+        """
+        win = self.global_win or win
+        view = self._viewport(text, win, colors_pair_nb, text_attr,
+                              words_attr, word_delimiter, start)
+
+        while not view.press(self._read_key(win)):
+            pass
+        return view.top
+
+    async def ascroll(
+            self,
+            text: str,
+            win: CursesWindow = None,
+            colors_pair_nb: int = 0,
+            text_attr: Union[CursesTextAttribute,
+                             CursesTextAttributes] = (),
+            words_attr: Mapping[Sequence[str],
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]] = {},
+            word_delimiter: str = " ",
+            start: int = 0) -> int:
+        """Asynchronous counterpart of :meth:`scroll`, which takes the
+        same arguments.
+
+        Instead of blocking, keys are read without delay and the event
+        loop runs other tasks until new input is available.
+        """
+        win = self.global_win or win
+        view = self._viewport(text, win, colors_pair_nb, text_attr,
+                              words_attr, word_delimiter, start)
+
+        while 1:
+            key = self._read_key(win, 0)
+            if key is None:
+                await self.backend.wait_input()
+            elif view.press(key):
+                return view.top
+
+    def precompile(self,
+                   texts: Iterable[str],
+                   colors_pair_nb: int = 0,
+                   text_attr: Union[CursesTextAttribute,
+                                    CursesTextAttributes] = (),
+                   words_attr: Mapping[Sequence[str],
+                                       Union[CursesTextAttribute,
+                                             CursesTextAttributes]] = {},
+                   word_delimiter: str = " "):
+        """Lay out ``texts`` in advance into ``self.layout_cache``, so
+        that they are not laid out when displayed.
+
+        Combined with a :class:`visualdialog.layout.PersistentLayoutCache`,
+        texts can be laid out once for all runs of the program.
+
+        Texts longer than ``self.lazy_layout_threshold`` are ignored as
+        their layout is not cached. Parameters are the same as
+        :meth:`char_by_char` ones.
+        """
+        if self.layout_cache is None:
+            return
+
+        attr = combine_attrs(self.backend.color_pair(colors_pair_nb),
+                             *to_tuple(text_attr))
+        for text in texts:
+            if (self.lazy_layout_threshold is None
+                    or len(text) <= self.lazy_layout_threshold):
+                self._layout(text, attr, words_attr, word_delimiter)
+
     def _display_end_indicator(self,
                                win: CursesWindow,
                                text_attr: CursesTextAttributes = (
@@ -305,10 +859,10 @@ class DialogBox(BaseTextBox):
             ``(curses.A_BOLD, curses.A_BLINK)``.
         """
         if self.end_indicator_char:
-            with TextAttr(win, *text_attr):
-                win.addch(self.end_indicator_pos_y,
-                          self.end_indicator_pos_x,
-                          self.end_indicator_char)
+            win.addch(self.end_indicator_pos_y,
+                      self.end_indicator_pos_x,
+                      self.end_indicator_char,
+                      combine_attrs(*text_attr))
 
     def _one_by_one(self,
                     write_method: Callable,
@@ -333,49 +887,466 @@ class DialogBox(BaseTextBox):
         character.
         """
         win = self.global_win or win
-        text_attr = to_tuple(text_attr)
-        colors_pair = curses.color_pair(colors_pair_nb)
 
-        wrapped_text = chunked(self.text_wrapper.wrap(text), self.nb_lines_max)
-
-        if flash_screen:
-            curses.flash()
+        for step in self._waits(win, self._steps(write_method,
+                                                 text,
+                                                 win,
+                                                 colors_pair_nb,
+                                                 text_attr,
+                                                 words_attr,
+                                                 word_delimiter,
+                                                 flash_screen,
+                                                 delay,
+                                                 random_delay,
+                                                 callbacks)):
+            if step is _INPUT:
+                self.get_input(win)
+            else:
+                self.backend.napms(step)
 
-        for paragraph in wrapped_text:
-            win.clear()
-            self.framing_box(win)
+    def _method_name(self, write_method: Callable) -> str:
+        """Return the name of the public method writing like
+        ``write_method``.
+        """
+        for method, name in self._write_methods.items():
+            if name == write_method.__name__:
+                return method
+        raise ValueError(f"unknown write method {write_method!r}")
+
+    def _record_call(self,
+                     method: str,
+                     text: Union[str, Sequence[str], None],
+                     kwargs: Mapping[str, Any]):
+        """Report to ``self.recorder`` that ``text`` is displayed by
+        ``method`` with ``kwargs``.
+
+        Random delays are drawn from a seed recorded with the call, so
+        that a replay waits the same times.
+        """
+        seed = self._seed if self._seed is not None else (
+            random.getrandbits(32))
+        self._seed = None
+        self._random.seed(seed)
+
+        if self.recorder is not None:
+            self.recorder.call(self, method, text, kwargs, seed)
+
+    def _method_steps(self,
+                      method: str,
+                      text: str,
+                      win: CursesWindow = None,
+                      **kwargs) -> Iterator[Union[int, object]]:
+        """Return the steps of :meth:`_steps` displaying ``text`` like
+        the public method named ``method`` would do with ``kwargs``.
+        """
+        write_method = getattr(self, self._write_methods[method])
+        arguments = inspect.signature(
+            getattr(self, method)).bind(text, win, **kwargs)
+        arguments.apply_defaults()
+        text, win, *args = arguments.args
+
+        return self._steps(write_method,
+                           text,
+                           self.global_win or win,
+                           *args)
+
+    async def _aone_by_one(self,
+                           write_method: Callable,
+                           text: str,
+                           win: CursesWindow,
+                           *args):
+        """Asynchronous counterpart of :meth:`_one_by_one`."""
+        win = self.global_win or win
 
-            for y, line in enumerate(paragraph):
-                offsetting_x = 0
-                for word in line.split(word_delimiter):
-                    if word in words_attr:
-                        attr = to_tuple(words_attr[word])
+        for step in self._waits(win, self._steps(write_method,
+                                                 text,
+                                                 win,
+                                                 *args)):
+            if step is _INPUT:
+                await self.aget_input(win)
+            else:
+                await self.backend.asleep(step)
+
+    def _waits(self,
+               win: CursesWindow,
+               steps: Iterator[Union[int, object]]
+               ) -> Iterator[Union[int, object]]:
+        """Turn the waiting times of ``steps`` into the times actually
+        waited, according to frames and keys pressed while writing.
+
+        Null waiting times are not yielded. See
+        :meth:`BaseTextBox._typing_keys` and
+        :meth:`BaseTextBox._schedule`.
+        """
+        skipping = False
+        # Set while the screen is updated by a Scheduler.
+        deferred = self._defer_refresh
+        self._deadline = None
+        stats = self.stats
+        if stats is not None:
+            stats.texts += 1
+            start = self.backend.monotonic()
+        try:
+            for step in steps:
+                if step is _INPUT:
+                    if skipping:
+                        skipping = False
+                        self._defer_refresh = deferred
+                        self._refresh(win, deferred)
+
+                    if stats is None:
+                        yield step
+                    else:
+                        input_start = self.backend.monotonic()
+                        yield step
+                        stats.input_time += (self.backend.monotonic()
+                                             - input_start)
+                        stats.pages += 1
+                        self._report_stats()
+                    # Time spent waiting for the user is not lag.
+                    self._deadline = None
+                elif step is _MORE_TEXT:
+                    # Show what is written before waiting for text.
+                    if skipping:
+                        self._refresh(win, deferred)
                     else:
-                        attr = (colors_pair, *text_attr)
-
-                    with TextAttr(win, *attr):
-                        write_method = getattr(self, write_method.__name__)
-                        write_method(win,
-                                     self.text_pos_x + offsetting_x,
-                                     self.text_pos_y + y,
-                                     word,
-                                     delay,
-                                     random_delay,
-                                     callbacks)
-
-                        # Waiting for space character.
-                        curses.napms(delay)
-                        # Compensate for the space between words.
-                        offsetting_x += len(word) + 1
+                        ms = self._end_frame()
+                        if ms:
+                            yield self._schedule(ms)
+                    yield step
+                    self._deadline = None
+                elif not skipping:
+                    ms = self._frame_wait(step)
+                    if ms:
+                        ms = self._typing_keys(win, ms)
+
+                    if ms is None:
+                        # Write the rest of the page without waiting.
+                        skipping = self._defer_refresh = True
+                        self._pending_delay = 0
+                    elif ms:
+                        ms = self._schedule(ms)
+                        if ms:
+                            if stats is not None:
+                                stats.sleep_time += ms
+                            yield ms
+        finally:
+            self._defer_refresh = deferred
+            if stats is not None:
+                stats.total_time += self.backend.monotonic() - start
+
+    def _steps(self,
+               write_method: Callable,
+               text: str,
+               win: CursesWindow,
+               colors_pair_nb: int,
+               text_attr: Union[CursesTextAttribute,
+                                CursesTextAttributes],
+               words_attr: Mapping[Sequence[str],
+                                   Union[CursesTextAttribute,
+                                         CursesTextAttributes]],
+               word_delimiter: str,
+               flash_screen: bool,
+               delay: int,
+               random_delay: Sequence[int],
+               callbacks: Iterable[Callable[["DialogBox",
+                                             CursesWindow,
+                                             str],
+                                            Optional[Any]]]
+               ) -> Iterator[Union[int, object]]:
+        """Display ``text`` page by page.
+
+        Waiting is left to the caller: the generator yields the time to
+        wait in milliseconds after each write and ``_INPUT`` at the end
+        of each page when the user must confirm to continue.
+        """
+        self._record_call(self._method_name(write_method),
+                          text,
+                          {"colors_pair_nb": colors_pair_nb,
+                           "text_attr": text_attr,
+                           "words_attr": words_attr,
+                           "word_delimiter": word_delimiter,
+                           "flash_screen": flash_screen,
+                           "delay": delay,
+                           "random_delay": random_delay})
+
+        attr = combine_attrs(self.backend.color_pair(colors_pair_nb),
+                             *to_tuple(text_attr))
+
+        return self._line_steps(write_method,
+                                self._lines(text,
+                                            attr,
+                                            words_attr,
+                                            word_delimiter),
+                                win,
+                                flash_screen,
+                                delay,
+                                random_delay,
+                                callbacks)
+
+    def _line_steps(self,
+                    write_method: Callable,
+                    lines: Iterable[Union[Line, object]],
+                    win: CursesWindow,
+                    flash_screen: bool,
+                    delay: int,
+                    random_delay: Sequence[int],
+                    callbacks: Iterable[Callable[["DialogBox",
+                                                  CursesWindow,
+                                                  str],
+                                                 Optional[Any]]]
+                    ) -> Iterator[Union[int, object]]:
+        """Display compiled lines, a new page being started by each line
+        at the first row.
 
+        ``_MORE_TEXT`` items of ``lines`` are yielded as is.
+        """
+        if flash_screen:
+            self.backend.flash()
+
+        write_method = getattr(self, write_method.__name__)
+        # Words written without waiting nor callbacks between them can
+        # be written together when they have the same attributes.
+        coalesce = (write_method.__name__ == "_write_word"
+                    and not delay
+                    and not any(random_delay)
+                    and not callbacks)
+        page_started = False
+        # Lines of the text area written on the current page.
+        damaged = set()
+        # Lines of the current page, added to self.history.
+        page: List[Line] = []
+        for line in lines:
+            if line is _MORE_TEXT:
+                yield line
+                continue
+
+            if not line[0].y:
+                if page_started:
+                    self._display_end_indicator(win)
+                    self._end_page(page)
+                    yield _INPUT
+                    # The frame is still displayed, only lines written
+                    # since the previous page are erased.
+                    damaged.add(self.end_indicator_pos_y
+                                - self.text_pos_y)
+                    if self._history_position:
+                        # A previous page is still displayed.
+                        self._history_position = 0
+                        damaged.update(range(self.width - 1))
+                    self._erase_text_area(win, sorted(damaged))
+                    damaged.clear()
+                else:
+                    if self.clear_window:
+                        win.clear()
+                    self._draw_frame(win)
+                    page_started = True
+            damaged.add(line[0].y)
+
+            if coalesce:
+                line = coalesce_runs(line)
+            if self.history is not None:
+                page.append(line)
+
+            for word in _words(line):
+                # Attributes are given to each write rather than enabled
+                # on the window, so that other text boxes can write on
+                # the same window while this one waits.
+                yield from write_method(win,
+                                        word,
+                                        delay,
+                                        random_delay,
+                                        callbacks)
+
+                # Waiting for space character.
+                yield delay
+
+        if page_started:
             self._display_end_indicator(win)
-            self.get_input(win)
+            self._end_page(page)
+            yield _INPUT
+            self._history_position = 0
+
+    def _end_page(self, page: List[Line]):
+        """Add the lines of the page just written to ``self.history``
+        and empty ``page``.
+        """
+        if self.history is not None:
+            self.history.append(tuple(page))
+            page.clear()
+
+    def _input_key(self, win: CursesWindow, key: CursesKey) -> bool:
+        """Handle ``key`` pressed while :meth:`get_input` waits, keys
+        browsing ``self.history`` included.
+        """
+        history = self.history
+        if history is None:
+            return self._is_confirmation(key)
+
+        if key in self.history_back_keys:
+            position = min(self._history_position + 1,
+                           max(len(history) - 1, 0))
+        elif key in self.history_forward_keys:
+            position = max(self._history_position - 1, 0)
+        elif self._history_position and self._is_confirmation(key):
+            # Bring back the current page before continuing.
+            position = 0
+        else:
+            return self._is_confirmation(key)
+
+        if position != self._history_position:
+            self._history_position = position
+            self._draw_page(win, history[-1 - position])
+        return False
+
+    def _draw_page(self, win: CursesWindow, page: Page):
+        """Display ``page`` at once instead of the page displayed."""
+        self._erase_text_area(win)
+        for line in page:
+            for run in line:
+                self._write(win,
+                            self.text_pos_y + run.y,
+                            self.text_pos_x + run.x,
+                            run.text,
+                            run.attr)
+        self._display_end_indicator(win)
+        self._refresh(win)
+
+    def _text_feed(self,
+                   colors_pair_nb: int,
+                   text_attr: Union[CursesTextAttribute,
+                                    CursesTextAttributes],
+                   words_attr: Mapping[Sequence[str],
+                                       Union[CursesTextAttribute,
+                                             CursesTextAttributes]],
+                   word_delimiter: str,
+                   flash_screen: bool,
+                   delay: int,
+                   random_delay: Sequence[int],
+                   method: str,
+                   max_buffer: int) -> _TextFeed:
+        """Record the start of :meth:`stream` and return a
+        :class:`_TextFeed` laying out text for this box.
+        """
+        self._record_call("stream",
+                          None,
+                          {"colors_pair_nb": colors_pair_nb,
+                           "text_attr": text_attr,
+                           "words_attr": words_attr,
+                           "word_delimiter": word_delimiter,
+                           "flash_screen": flash_screen,
+                           "delay": delay,
+                           "random_delay": random_delay,
+                           "method": method,
+                           "max_buffer": max_buffer})
+
+        attr = combine_attrs(self.backend.color_pair(colors_pair_nb),
+                             *to_tuple(text_attr))
+
+        return _TextFeed(StreamWrapper(self.text_wrapper, max_buffer),
+                         LineCompiler(attr, words_attr, word_delimiter),
+                         self.nb_lines_max)
+
+    def _layout(self,
+                text: str,
+                attr: CursesTextAttribute,
+                words_attr: Mapping[Sequence[str],
+                                    Union[CursesTextAttribute,
+                                          CursesTextAttributes]],
+                word_delimiter: str) -> RenderPlan:
+        """Return the render plan of ``text``, from ``self.layout_cache``
+        if possible.
+        """
+        if self.layout_cache is None:
+            return compile_layout(text,
+                                  self.text_wrapper,
+                                  self.nb_lines_max,
+                                  attr,
+                                  words_attr,
+                                  word_delimiter)
+        return self.layout_cache.get_plan(text,
+                                          self.text_wrapper,
+                                          self.nb_lines_max,
+                                          attr,
+                                          words_attr,
+                                          word_delimiter)
+
+    def _lines(self,
+               text: str,
+               attr: CursesTextAttribute,
+               words_attr: Mapping[Sequence[str],
+                                   Union[CursesTextAttribute,
+                                         CursesTextAttributes]],
+               word_delimiter: str) -> Iterator[Line]:
+        """Yield the compiled lines of ``text``, laid out at once or
+        lazily depending on ``self.lazy_layout_threshold``.
+        """
+        if (self.lazy_layout_threshold is not None
+                and len(text) > self.lazy_layout_threshold):
+            compiler = LineCompiler(attr, words_attr, word_delimiter)
+            wrapped = wrap_lazily(text, self.text_wrapper)
+            pages = iter(
+                lambda: list(itertools.islice(wrapped, self.nb_lines_max)),
+                [])
+            return (line for page in pages
+                    for line in compiler.compile_page(page))
+
+        plan = self._layout(text, attr, words_attr, word_delimiter)
+        return (line for page in plan.pages for line in page)
+
+    def _viewport(self,
+                  text: str,
+                  win: CursesWindow,
+                  colors_pair_nb: int,
+                  text_attr: Union[CursesTextAttribute,
+                                   CursesTextAttributes],
+                  words_attr: Mapping[Sequence[str],
+                                      Union[CursesTextAttribute,
+                                            CursesTextAttributes]],
+                  word_delimiter: str,
+                  start: int) -> _Viewport:
+        """Write ``text`` into a pad, display the box and the first
+        visible lines, and return the viewport.
+        """
+        self._record_call("scroll",
+                          text,
+                          {"colors_pair_nb": colors_pair_nb,
+                           "text_attr": text_attr,
+                           "words_attr": words_attr,
+                           "word_delimiter": word_delimiter,
+                           "start": start})
+
+        attr = combine_attrs(self.backend.color_pair(colors_pair_nb),
+                             *to_tuple(text_attr))
+        lines = list(self._lines(text, attr, words_attr, word_delimiter))
+        if len(lines) > _MAX_PAD_LINES:
+            raise ValueError(f"text has {len(lines)} lines, more than the "
+                             f"{_MAX_PAD_LINES} lines of a pad")
+
+        # An extra column lets the last line fill the width without
+        # moving the cursor out of the pad.
+        pad = self.backend.newpad(max(len(lines), 1),
+                                  self.nb_char_max_line + 1)
+        for y, line in enumerate(lines):
+            for run in coalesce_runs(line):
+                pad.addstr(y, run.x, run.text, run.attr)
+                if self.stats is not None:
+                    self.stats.drawn(run.text)
+
+        self.backend.flushinp()
+        if self.clear_window:
+            win.clear()
+        self._draw_frame(win)
+        if self.stats is not None:
+            self.stats.texts += 1
+
+        view = _Viewport(self, win, pad, len(lines), attr, start)
+        view.show()
+        return view
 
     def _write_word_char_by_char(self,
                                  win: CursesWindow,
-                                 pos_x: int,
-                                 pos_y: int,
-                                 word: str,
+                                 runs: Sequence[Run],
                                  delay: int,
                                  random_delay: Sequence[int],
                                  callbacks: Iterable[
@@ -383,47 +1354,59 @@ class DialogBox(BaseTextBox):
                                                CursesWindow,
                                                str,
                                                int],
-                                     Optional[Any]]]):
-        """Write word char by char at given positon."""
-        for x, char in enumerate(word):
-            win.addstr(pos_y,
-                       pos_x + x,
-                       char)
-            win.refresh()
+                                     Optional[Any]]]
+                                 ) -> Iterator[int]:
+        """Write the runs of a word char by char, yielding the time to
+        wait after each character.
+        """
+        pos_x = self.text_pos_x + runs[0].x
+        pos_y = self.text_pos_y + runs[0].y
+        chars = ((char, run.attr)
+                 for run in runs for char in graphemes(run.text))
+
+        column = 0
+        for x, (char, attr) in enumerate(chars):
+            self._write(win, pos_y, pos_x + column, char, attr)
+            self._present(win)
+            column += text_width(char)
 
-            rand_delay = int(random.uniform(*random_delay))
+            rand_delay = int(self._random.uniform(*random_delay))
 
             if char in self.downtime_chars:
-                curses.napms(self.downtime_chars_delay
-                             + rand_delay)
+                yield (self.downtime_chars_delay
+                       + rand_delay)
             else:
-                curses.napms(rand_delay)
+                yield rand_delay
 
-            curses.napms(delay)
+            yield delay
 
-            for callback in callbacks:
-                callback(self, win, char, x)
+            self._call_callbacks(callbacks, win, char, x)
 
     def _write_word(self,
                     win: CursesWindow,
-                    pos_x: int,
-                    pos_y: int,
-                    word: str,
+                    runs: Sequence[Run],
                     delay: int,
                     random_delay: Sequence[int],
                     callbacks: Iterable[Callable[["DialogBox",
                                                   CursesWindow,
                                                   str],
-                                                 Optional[Any]]]):
-        """Write word at given position."""
-        win.addstr(pos_y,
-                   pos_x,
-                   word)
-        win.refresh()
-
-        rand_delay = int(random.uniform(*random_delay))
-        curses.napms(delay
-                     + rand_delay)
-
-        for callback in callbacks:
-            callback(self, win, word)
+                                                 Optional[Any]]]
+                    ) -> Iterator[int]:
+        """Write the runs of a word, yielding the time to wait after
+        it.
+        """
+        for run in runs:
+            self._write(win,
+                        self.text_pos_y + run.y,
+                        self.text_pos_x + run.x,
+                        run.text,
+                        run.attr)
+        self._present(win)
+
+        rand_delay = int(self._random.uniform(*random_delay))
+        yield (delay
+               + rand_delay)
+
+        self._call_callbacks(callbacks,
+                             win,
+                             "".join(run.text for run in runs))
@@ -1,7 +1,7 @@
 # error.py
 # 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
 
-__all__ = ["PanicError", "ValueNotInBound"]
+__all__ = ["InputExhausted", "PanicError", "ValueNotInBound"]
 
 from .type import CursesKey
 
@@ -31,3 +31,14 @@ class PanicError(KeyboardInterrupt):
                 + (f"keycode {self.key}"
                    if isinstance(self.key, int)
                    else f'by pressing "{self.key}" key'))
+
+
+class InputExhausted(EOFError):
+    """Base ``EOFError``.
+
+    Exception thrown when a blocking key read is done on a
+    :class:`visualdialog.virtual.VirtualWindow` whose input script is
+    empty, or by a text box replaying a session whose recorded keys are
+    exhausted, instead of waiting forever.
+    """
+    pass
@@ -0,0 +1,830 @@
+# layout.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["Highlighter",
+           "LayoutCache",
+           "LineCompiler",
+           "PageHistory",
+           "PersistentLayoutCache",
+           "RenderPlan",
+           "Run",
+           "StreamWrapper",
+           "coalesce_runs",
+           "compile_layout",
+           "wrap_lazily"]
+
+import curses
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import re
+import struct
+import textwrap
+import zlib
+from collections import OrderedDict, deque
+from functools import lru_cache, partial
+from typing import (Deque, Dict, Hashable, Iterator, List, Mapping, Match,
+                    NamedTuple, Optional, Pattern, Sequence, Set, Tuple,
+                    Union)
+
+from .type import CursesTextAttribute, CursesTextAttributes
+from .utils import chunked, combine_attrs, to_tuple
+from .width import text_width
+
+
+# Header of the files of PersistentLayoutCache: magic, version of the
+# layout, version of marshal and number of plans, followed by the hash,
+# offset and length of each plan then by the plans. Hashes are 16-byte
+# BLAKE2 digests.
+_LAYOUT_HEADER = struct.Struct("=4sIIQ")
+_LAYOUT_ENTRY = struct.Struct("=16sQI")
+_LAYOUT_MAGIC = b"VDLC"
+# To increase when plans of a same text change.
+_LAYOUT_VERSION = 2
+# Attributes visible on spaces. Colors are included as the background
+# of their pair may not be the one of the window.
+_VISIBLE_ON_BLANKS = (curses.A_UNDERLINE
+                      | curses.A_REVERSE
+                      | curses.A_STANDOUT
+                      | curses.A_COLOR)
+
+
+class Run(NamedTuple):
+    """A piece of text displayed with the same attributes.
+
+    Positions are relative to the upper left corner of the text area of
+    a text box. ``joined`` is ``True`` if the run continues the word of
+    the previous run, which happens when attributes change inside a
+    word.
+    """
+    y: int
+    x: int
+    text: str
+    attr: CursesTextAttribute
+    joined: bool = False
+
+
+#: A line of a page is a tuple of runs.
+Line = Tuple[Run, ...]
+#: A page is a tuple of lines.
+Page = Tuple[Line, ...]
+
+
+class RenderPlan(NamedTuple):
+    """Immutable result of the layout of a text: the pages to display
+    one after the other.
+    """
+    pages: Tuple[Page, ...]
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a :class:`LayoutCache`, like
+    ``functools.lru_cache`` ones.
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+#: Keys of ``words_attr`` mappings.
+WordsKey = Union[str, Pattern, Sequence[Union[str, Pattern]]]
+#: A highlighted part of a text: start, end and attribute.
+Span = Tuple[int, int, CursesTextAttribute]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _trie_pattern(node: Dict[str, dict], root: bool = False) -> str:
+    """Return a regular expression matching the words of the trie
+    ``node``, longest first.
+    """
+    alternatives = []
+    for char, child in node.items():
+        if char:
+            # Like \b, only ends made of word characters must not be
+            # in the middle of a word.
+            boundary = r"(?<!\w)" if root and _is_word_char(char) else ""
+            alternatives.append(boundary
+                                + re.escape(char)
+                                + _trie_pattern(child))
+    if "" in node:
+        # End of a word, tried after longer words.
+        alternatives.append(node[""])
+
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def _search(regex: Pattern, text: str, pos: int) -> Optional[Match]:
+    """Return the first non-empty match of ``regex`` in ``text`` from
+    ``pos``, or ``None``.
+    """
+    for match in regex.finditer(text, pos):
+        if match.end() > match.start():
+            return match
+    return None
+
+
+class Highlighter:
+    """Find the parts of a text to display with particular attributes.
+
+    Keys of ``words_attr`` can be words or phrases, which are found
+    even with punctuation attached, compiled regular expressions, or
+    tuples of them sharing the same attributes. Words and phrases are
+    compiled together in a single regular expression, in the form of a
+    trie, so finding them does not depend on their number. Regular
+    expressions are searched as they are, with their own groups and
+    flags. Parts found do not overlap: the first one in the text wins,
+    then at a same position the longest word or phrase, then words or
+    phrases over regular expressions, then regular expressions in the
+    order of ``words_attr``.
+
+    Use :meth:`from_words_attr` to reuse highlighters already compiled.
+
+    :param words_attr: Mapping of words, phrases or regular expressions
+        to their attributes.
+    """
+    def __init__(self,
+                 words_attr: Mapping[WordsKey,
+                                     Union[CursesTextAttribute,
+                                           CursesTextAttributes]]):
+        """Initializes instance of :class:`Highlighter`."""
+        self.words: Dict[str, CursesTextAttribute] = {}
+        self.patterns: List[Tuple[Pattern, CursesTextAttribute]] = []
+
+        trie: Dict[str, dict] = {}
+        for keys, key_attr in words_attr.items():
+            key_attr = combine_attrs(*to_tuple(key_attr))
+            if isinstance(keys, (str, re.Pattern)):
+                keys = (keys, )
+
+            for key in keys:
+                if isinstance(key, re.Pattern):
+                    self.patterns.append((key, key_attr))
+                elif key and key not in self.words:
+                    self.words[key] = key_attr
+                    node = trie
+                    for char in key:
+                        node = node.setdefault(char, {})
+                    node[""] = r"(?!\w)" if _is_word_char(key[-1]) else ""
+
+        self.regex = (re.compile(_trie_pattern(trie, root=True))
+                      if trie else None)
+
+    @classmethod
+    def from_words_attr(
+            cls,
+            words_attr: Mapping[WordsKey,
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]]
+            ) -> Optional["Highlighter"]:
+        """Return a :class:`Highlighter` of ``words_attr``, or ``None``
+        if it is empty.
+
+        The last highlighters created are kept and reused.
+        """
+        if not words_attr:
+            return None
+        try:
+            return _cached_highlighter(
+                tuple((keys, tuple(to_tuple(key_attr)))
+                      for keys, key_attr in words_attr.items()))
+        except TypeError:
+            # Unhashable keys.
+            return cls(words_attr)
+
+    def spans(self, text: str) -> List[Span]:
+        """Return the sorted and non-overlapping spans of ``text`` to
+        highlight.
+        """
+        if not self.patterns:
+            if self.regex is None:
+                return []
+            return [(*match.span(), self.words[match.group()])
+                    for match in self.regex.finditer(text)
+                    if match.end() > match.start()]
+
+        # Regular expressions by priority, None standing for the
+        # attributes of words.
+        matchers: List[Tuple[Pattern, Optional[CursesTextAttribute]]] = []
+        if self.regex is not None:
+            matchers.append((self.regex, None))
+        matchers.extend(self.patterns)
+        found = [_search(regex, text, 0) for regex, _ in matchers]
+
+        spans = []
+        while True:
+            best = None
+            for i, match in enumerate(found):
+                if match is not None and (
+                        best is None
+                        or match.start() < found[best].start()):
+                    best = i
+            if best is None:
+                return spans
+
+            match, attr = found[best], matchers[best][1]
+            start, end = match.span()
+            spans.append((start, end,
+                          self.words[match.group()] if attr is None
+                          else attr))
+
+            # Parts overlapping the one found are searched again after
+            # it.
+            for i, other in enumerate(found):
+                if other is not None and other.start() < end:
+                    found[i] = _search(matchers[i][0], text, end)
+
+
+@lru_cache(maxsize=32)
+def _cached_highlighter(items: Tuple) -> Highlighter:
+    return Highlighter(dict(items))
+
+
+class LineCompiler:
+    """Position words of wrapped lines with their attributes.
+
+    Attributes are combined once into a single value, used as the
+    ``attr`` of the runs. Words are highlighted by a
+    :class:`Highlighter`.
+
+    :param attr: Attributes of words absent from ``words_attr``.
+
+    :param words_attr: Mapping of words, phrases or regular expressions
+        to their attributes, see :class:`Highlighter`.
+
+    :param word_delimiter: Delimiter according which to split lines in
+        words.
+    """
+    def __init__(self,
+                 attr: Union[CursesTextAttribute, CursesTextAttributes],
+                 words_attr: Mapping[WordsKey,
+                                     Union[CursesTextAttribute,
+                                           CursesTextAttributes]],
+                 word_delimiter: str):
+        """Initializes instance of :class:`LineCompiler`."""
+        self.attr = combine_attrs(*to_tuple(attr))
+        self.highlighter = Highlighter.from_words_attr(words_attr)
+        self.word_delimiter = word_delimiter
+
+    def compile(self, line: str, y: int) -> Line:
+        """Return the runs of ``line`` displayed at row ``y`` of a page.
+        """
+        if self.highlighter is None:
+            return self._compile(line, y, ())
+        return self._compile(line, y, self.highlighter.spans(line))
+
+    def compile_page(self, lines: Sequence[str]) -> Page:
+        """Return the runs of the lines of a page.
+
+        Unlike :meth:`compile`, phrases cut by the end of a line are
+        highlighted.
+        """
+        if self.highlighter is None:
+            return tuple(self._compile(line, y, ())
+                         for y, line in enumerate(lines))
+
+        spans = self.highlighter.spans(" ".join(lines))
+
+        page = []
+        i = start = 0
+        for y, line in enumerate(lines):
+            end = start + len(line)
+
+            # Spans of the line, relative to its start.
+            line_spans = []
+            while i < len(spans) and spans[i][0] < end:
+                span_start, span_end, attr = spans[i]
+                line_spans.append((max(span_start, start) - start,
+                                   min(span_end, end) - start,
+                                   attr))
+                if span_end > end:
+                    # The span goes on the next line.
+                    break
+                i += 1
+
+            page.append(self._compile(line, y, line_spans))
+            start = end + 1
+        return tuple(page)
+
+    def _compile(self, line: str, y: int, spans: Sequence[Span]) -> Line:
+        # Positions are counted in terminal columns.
+        width = len if line.isascii() else text_width
+
+        if not spans:
+            runs = []
+            offsetting_x = 0
+            for word in line.split(self.word_delimiter):
+                runs.append(Run(y, offsetting_x, word, self.attr))
+                # Compensate for the space between words.
+                offsetting_x += width(word) + 1
+            return tuple(runs)
+
+        runs = []
+        offsetting_x = pos = i = 0
+        for word in line.split(self.word_delimiter):
+            end = pos + len(word)
+
+            # Cut the word where its attributes change.
+            segments: List[List] = []
+            cur = pos
+            while i < len(spans) and spans[i][0] < end:
+                span_start, span_end, attr = spans[i]
+                if span_end > cur:
+                    span_start = max(span_start, cur)
+                    if span_start > cur:
+                        segments.append([cur, span_start, self.attr])
+                    cur = min(span_end, end)
+                    segments.append([span_start, cur, attr])
+                    if span_end > end:
+                        break
+                i += 1
+            if cur < end or not segments:
+                segments.append([cur, end, self.attr])
+
+            for j, (start, stop, attr) in enumerate(segments):
+                if runs and j and runs[-1].attr == attr:
+                    runs[-1] = runs[-1]._replace(
+                        text=runs[-1].text + line[start:stop])
+                else:
+                    runs.append(Run(y,
+                                    offsetting_x + width(line[pos:start]),
+                                    line[start:stop],
+                                    attr,
+                                    bool(j)))
+
+            offsetting_x += width(word) + 1
+            pos = end + len(self.word_delimiter)
+        return tuple(runs)
+
+
+def coalesce_runs(line: Line) -> Line:
+    """Merge adjacent runs of ``line`` having the same attributes into a
+    single run, so that they can be written at once.
+
+    Words of a merged run are joined by spaces, which take its
+    attributes. Runs whose attributes are visible on spaces, such as
+    ``curses.A_UNDERLINE`` or colors, are only merged with the runs of
+    the same word, so that spaces between words are displayed as when
+    words are written one by one.
+    """
+    runs = []
+    for run in line:
+        if (runs and runs[-1].attr == run.attr
+                and (run.joined
+                     or not run.attr & _VISIBLE_ON_BLANKS)):
+            last = runs[-1]
+            runs[-1] = last._replace(
+                text=last.text + ("" if run.joined else " ") + run.text)
+        else:
+            runs.append(run)
+    return tuple(runs)
+
+
+def compile_layout(
+        text: str,
+        text_wrapper: textwrap.TextWrapper,
+        nb_lines_max: int,
+        attr: Union[CursesTextAttribute, CursesTextAttributes],
+        words_attr: Mapping[WordsKey, Union[CursesTextAttribute,
+                                            CursesTextAttributes]],
+        word_delimiter: str) -> RenderPlan:
+    """Wrap ``text``, cut it into pages of ``nb_lines_max`` lines and
+    position each word with its attributes.
+
+    :param text: Text to lay out.
+
+    :param text_wrapper: ``textwrap.TextWrapper`` used to cut ``text``
+        into lines.
+
+    :param nb_lines_max: Number of lines of a page.
+
+    :param attr: Attributes of words absent from ``words_attr``.
+
+    :param words_attr: Mapping of words, phrases or regular expressions
+        to their attributes, see :class:`Highlighter`.
+
+    :param word_delimiter: Delimiter according which to split lines in
+        words.
+
+    :returns: The :class:`RenderPlan` of ``text``.
+    """
+    compiler = LineCompiler(attr, words_attr, word_delimiter)
+
+    return RenderPlan(tuple(
+        compiler.compile_page(paragraph)
+        for paragraph in chunked(text_wrapper.wrap(text), nb_lines_max)))
+
+
+class StreamWrapper:
+    """Wrap a text given piece by piece, as soon as possible.
+
+    Unlike ``textwrap.TextWrapper.wrap``, line breaks of the text are
+    kept by default: each line of the text is wrapped separately and
+    empty lines are kept.
+
+    Only the incomplete last line is kept between two pieces, so the
+    memory used does not depend on the length of the whole text. As a
+    line is never changed once returned, words longer than a line may
+    be broken differently than by ``textwrap``.
+
+    :param text_wrapper: ``textwrap.TextWrapper`` used to wrap lines.
+
+    :param max_buffer: Maximum number of characters wrapped at once.
+        Longer pieces are cut. This defaults to ``4096``.
+
+    :param line_breaks: If ``False``, line breaks are handled by
+        ``text_wrapper`` like other whitespaces. This defaults to
+        ``True``.
+    """
+    def __init__(self,
+                 text_wrapper: textwrap.TextWrapper,
+                 max_buffer: int = 4096,
+                 line_breaks: bool = True):
+        """Initializes instance of :class:`StreamWrapper`."""
+        self.text_wrapper = text_wrapper
+        self.max_buffer = max_buffer
+        self.line_breaks = line_breaks
+        self._tail = ""
+
+    def feed(self, fragment: str) -> List[str]:
+        """Add ``fragment`` to the text and return lines which are
+        complete.
+        """
+        lines = []
+        for start in range(0, len(fragment), self.max_buffer):
+            lines.extend(
+                self._feed(fragment[start:start + self.max_buffer]))
+        return lines
+
+    def close(self) -> List[str]:
+        """Return the last lines of the text."""
+        lines, self._tail = self.text_wrapper.wrap(self._tail), ""
+        return lines
+
+    def _feed(self, fragment: str) -> List[str]:
+        if self.line_breaks:
+            *paragraphs, tail = (self._tail + fragment).split("\n")
+        else:
+            paragraphs, tail = [], self._tail + fragment
+
+        lines = []
+        for paragraph in paragraphs:
+            # Empty lines of the text are kept as empty lines.
+            lines.extend(self.text_wrapper.wrap(paragraph) or [""])
+
+        # Only the last line of the text can still change.
+        wrapped = self.text_wrapper.wrap(tail)
+        lines.extend(wrapped[:-1])
+
+        self._tail = wrapped[-1] if wrapped else ""
+        if self._tail:
+            # Wrapping drops trailing whitespaces.
+            self._tail += tail[len(tail.rstrip()):]
+
+        return lines
+
+
+def wrap_lazily(text: str,
+                text_wrapper: textwrap.TextWrapper,
+                max_buffer: int = 4096) -> Iterator[str]:
+    """Like ``text_wrapper.wrap(text)`` but return an iterator which
+    wraps ``text`` as lines are requested, ``max_buffer`` characters at
+    a time.
+
+    Time to get the first line and memory used do not depend on the
+    length of ``text``.
+    """
+    wrapper = StreamWrapper(text_wrapper, max_buffer, line_breaks=False)
+    for start in range(0, len(text), max_buffer):
+        yield from wrapper.feed(text[start:start + max_buffer])
+    yield from wrapper.close()
+
+
+class LayoutCache:
+    """A bounded cache of :class:`RenderPlan` which discards least
+    recently used plans first.
+
+    A same cache can be shared by several text boxes: plans only depend
+    on the text, the wrapping width, the number of lines of a page,
+    attributes and delimiter.
+
+    :param maxsize: Maximum number of plans kept. This defaults to
+        ``256``.
+    """
+    def __init__(self, maxsize: int = 256):
+        """Initializes instance of :class:`LayoutCache`."""
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._plans: "OrderedDict[Hashable, RenderPlan]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._plans)
+
+    def get_plan(
+            self,
+            text: str,
+            text_wrapper: textwrap.TextWrapper,
+            nb_lines_max: int,
+            attr: Union[CursesTextAttribute, CursesTextAttributes],
+            words_attr: Mapping[WordsKey,
+                                Union[CursesTextAttribute,
+                                      CursesTextAttributes]],
+            word_delimiter: str) -> RenderPlan:
+        """Return the plan of ``text``, compiling it with
+        :func:`compile_layout` if it is not cached.
+
+        .. note::
+            Only the ``width`` of ``text_wrapper`` is a part of the
+            cache key. Call :meth:`clear` after changing its other
+            options.
+        """
+        key = (text,
+               text_wrapper.width,
+               nb_lines_max,
+               combine_attrs(*to_tuple(attr)),
+               tuple((word, combine_attrs(*to_tuple(word_attr)))
+                     for word, word_attr in words_attr.items()),
+               word_delimiter)
+        try:
+            plan = self._plans[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+        plan = self._compile(key, text, text_wrapper, nb_lines_max,
+                             attr, words_attr, word_delimiter)
+        self._plans[key] = plan
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+        return plan
+
+    def cache_info(self) -> CacheInfo:
+        """Return hits, misses, maximum and current size of the cache.
+        """
+        return CacheInfo(self.hits, self.misses,
+                         self.maxsize, len(self._plans))
+
+    def clear(self):
+        """Discard all plans and reset statistics."""
+        self._plans.clear()
+        self.hits = self.misses = 0
+
+    def _compile(self,
+                 key: Hashable,
+                 text: str,
+                 *args) -> RenderPlan:
+        """Return the plan of ``text`` missing from the cache under
+        ``key``. Other arguments are :func:`compile_layout` ones.
+        """
+        return compile_layout(text, *args)
+
+
+def _encode_cache_key(key: Hashable) -> bytes:
+    """Return a serialization of a key of :class:`LayoutCache` which
+    differs for different keys, unlike ``repr`` which truncates long
+    patterns.
+    """
+    def encode(item):
+        if isinstance(item, re.Pattern):
+            return {"pattern": item.pattern, "flags": item.flags}
+        elif isinstance(item, tuple):
+            return [encode(element) for element in item]
+        return item
+
+    return json.dumps(encode(key),
+                      ensure_ascii=False,
+                      separators=(",", ":")).encode()
+
+
+class PersistentLayoutCache(LayoutCache):
+    """A :class:`LayoutCache` which also keeps plans in a file, so that
+    texts laid out by a previous run of the program are not laid out
+    again::
+
+        cache = PersistentLayoutCache("layouts.cache")
+        box.layout_cache = cache
+
+        ...
+
+        cache.save()
+
+    The file is only read when a plan is missing from memory, and only
+    the plans requested are read from it. Plans are stored under a hash
+    of the text, the wrapping width, the number of lines of a page,
+    attributes and delimiter, so a plan is laid out again as soon as
+    one of them changes. The whole file is ignored if it was written by
+    another version of the cache.
+
+    Plans laid out since the file was read are only written to it by
+    :meth:`save`.
+
+    :param path: Path of the file of the cache.
+
+    :param maxsize: Maximum number of plans kept in memory. This
+        defaults to ``256``.
+
+    :ivar loads: Number of plans read from the file.
+
+    .. note::
+        This class can be used as a context manager, which saves the
+        cache and closes its file.
+    """
+    def __init__(self,
+                 path: Union[str, os.PathLike],
+                 maxsize: int = 256):
+        """Initializes instance of :class:`PersistentLayoutCache`."""
+        super().__init__(maxsize)
+        self.path = os.fspath(path)
+        self.loads = 0
+
+        # Location of the plans of the file by hash, None until it is
+        # read.
+        self._index: Optional[Dict[bytes, Tuple[int, int]]] = None
+        self._map: Optional[mmap.mmap] = None
+        # Plans laid out since the file was read, and hashes of the
+        # plans used.
+        self._pending: Dict[bytes, bytes] = {}
+        self._used: Set[bytes] = set()
+
+    def __enter__(self) -> "PersistentLayoutCache":
+        """Return self."""
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Save the cache and close its file."""
+        self.save()
+        self.close()
+
+    def save(self, prune: bool = False):
+        """Write plans laid out since the file was read to it.
+
+        The file is replaced at once, so that it is never seen
+        incomplete by another process.
+
+        :param prune: If ``True``, plans which have not been used since
+            the cache was created are removed from the file, such as
+            plans of texts which changed. This defaults to ``False``.
+        """
+        index = self._load()
+        if not self._pending and not (prune and index.keys() - self._used):
+            return
+
+        plans = {digest: self._map[offset:offset + length]
+                 for digest, (offset, length) in index.items()
+                 if not prune or digest in self._used}
+        plans.update(self._pending)
+
+        offset = _LAYOUT_HEADER.size + _LAYOUT_ENTRY.size * len(plans)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(_LAYOUT_HEADER.pack(_LAYOUT_MAGIC,
+                                               _LAYOUT_VERSION,
+                                               marshal.version,
+                                               len(plans)))
+                for digest, data in plans.items():
+                    file.write(_LAYOUT_ENTRY.pack(digest, offset, len(data)))
+                    offset += len(data)
+                for data in plans.values():
+                    file.write(data)
+            self.close()
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._pending.clear()
+
+    def close(self):
+        """Close the file of the cache, which is read again if a plan
+        is missing from memory.
+        """
+        if self._map is not None:
+            self._map.close()
+        self._index = self._map = None
+
+    def _compile(self,
+                 key: Hashable,
+                 text: str,
+                 *args) -> RenderPlan:
+        """Return the plan of ``text`` from the file, or lay it out."""
+        digest = hashlib.blake2b(_encode_cache_key(key),
+                                 digest_size=16).digest()
+        self._used.add(digest)
+
+        location = self._load().get(digest)
+        if location is not None:
+            offset, length = location
+            self.loads += 1
+            return RenderPlan(
+                _load_pages(self._map[offset:offset + length]))
+
+        plan = compile_layout(text, *args)
+        self._pending[digest] = _dump_pages(plan.pages)
+        return plan
+
+    def _load(self) -> Dict[bytes, Tuple[int, int]]:
+        """Return the location of the plans of the file by hash, reading
+        its index if it has not been read yet.
+        """
+        if self._index is not None:
+            return self._index
+
+        self._index = {}
+        try:
+            with open(self.path, "rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # No cache yet.
+            return self._index
+
+        if len(self._map) < _LAYOUT_HEADER.size:
+            return self._index
+        (magic, version,
+         marshal_version, count) = _LAYOUT_HEADER.unpack_from(self._map)
+        if ((magic, version, marshal_version)
+                != (_LAYOUT_MAGIC, _LAYOUT_VERSION, marshal.version)
+                or len(self._map) < (_LAYOUT_HEADER.size
+                                     + _LAYOUT_ENTRY.size * count)):
+            return self._index
+
+        for digest, offset, length in _LAYOUT_ENTRY.iter_unpack(
+                self._map[_LAYOUT_HEADER.size:
+                          _LAYOUT_HEADER.size
+                          + _LAYOUT_ENTRY.size * count]):
+            self._index[digest] = (offset, length)
+        return self._index
+
+
+def _dump_pages(pages: Sequence[Page]) -> bytes:
+    """Return ``pages`` serialized, see :func:`_load_pages`."""
+    return marshal.dumps(tuple(tuple(tuple(tuple(run) for run in line)
+                                     for line in page)
+                               for page in pages))
+
+
+def _load_pages(data: bytes) -> Tuple[Page, ...]:
+    """Return the pages serialized by :func:`_dump_pages`."""
+    # Faster than Run._make, which checks the number of fields.
+    new_run = partial(tuple.__new__, Run)
+    return tuple(tuple(tuple(map(new_run, line)) for line in page)
+                 for page in marshal.loads(data))
+
+
+class PageHistory:
+    """A history of displayed pages bounded in memory, which discards
+    oldest pages first.
+
+    Pages are kept laid out, so that they can be displayed again
+    without being wrapped, but serialized and compressed: a page of a
+    text box of usual size takes a few hundred bytes.
+
+    :param max_bytes: Maximum size of the pages kept in bytes. This
+        defaults to ``65536``.
+
+    :ivar nbytes: Size of the pages kept in bytes.
+    """
+    def __init__(self, max_bytes: int = 65536):
+        """Initializes instance of :class:`PageHistory`."""
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._pages: Deque[bytes] = deque()
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._pages)
+
+    def __getitem__(self, index: int) -> Page:
+        """Return self[index], the oldest page being at index ``0``."""
+        return _load_pages(zlib.decompress(self._pages[index]))[0]
+
+    def append(self, page: Page):
+        """Add ``page`` to the history, then discard oldest pages as long
+        as ``self.max_bytes`` is exceeded.
+        """
+        data = zlib.compress(_dump_pages((page, )), 1)
+        self._pages.append(data)
+        self.nbytes += len(data)
+
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= len(self._pages.popleft())
+
+    def clear(self):
+        """Discard all pages."""
+        self._pages.clear()
+        self.nbytes = 0
+
+
+#: Cache shared by text boxes which have not been given their own.
+default_layout_cache = LayoutCache()
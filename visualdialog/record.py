@@ -0,0 +1,331 @@
+# record.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["SessionRecorder", "SessionReplayer"]
+
+import gzip
+import json
+import math
+import re
+from collections import deque
+from typing import (Any, BinaryIO, Callable, Deque, Iterator, List, Mapping,
+                    Optional, Sequence, Tuple, Union)
+
+from .error import InputExhausted
+from .type import CursesKey, CursesTextAttribute, CursesWindow
+from .utils import combine_attrs, to_tuple
+
+
+_FORMAT = "visualdialog-session"
+_VERSION = 2
+# Methods called again with the recorded text and arguments by
+# SessionReplayer, apart from stream.
+_REPLAYED_METHODS = ("char_by_char", "word_by_word", "chain", "scroll")
+
+#: An event of a session: time in milliseconds since the first event,
+#: index of the text box, kind of event then its data.
+Event = List[Any]
+
+
+def _encode_key(key: Any) -> Any:
+    """Return a key of a ``words_attr`` mapping as JSON data."""
+    if isinstance(key, re.Pattern):
+        return {"pattern": key.pattern, "flags": key.flags}
+    elif isinstance(key, str):
+        return key
+    return [_encode_key(item) for item in key]
+
+
+def _decode_key(data: Any) -> Any:
+    """Return the ``words_attr`` key encoded by :func:`_encode_key`."""
+    if isinstance(data, dict):
+        return re.compile(data["pattern"], data["flags"])
+    elif isinstance(data, str):
+        return data
+    return tuple(_decode_key(item) for item in data)
+
+
+class SessionRecorder:
+    """Records what text boxes display, when, and the keys they read
+    to a file, so that the session can be replayed by
+    :class:`SessionReplayer`::
+
+        with SessionRecorder("session.vds") as recorder:
+            recorder.attach(box)
+
+            box.char_by_char("Hello world", win)
+
+    The file is written as events happen, in gzip-compressed JSON lines.
+    Its first line identifies the format, each following line is an
+    event: ``[time, box, kind, *data]``, where ``time`` is in
+    milliseconds since the first event and ``box`` is the index of the
+    text box in the order they were attached. Kinds of events are:
+
+    * ``"call"``: a text is displayed, with the name of the method, the
+      text (``None`` for :meth:`visualdialog.dialog.DialogBox.stream`),
+      its arguments and the seed of its random delays. Callbacks are
+      not recorded. For :meth:`visualdialog.choices.ChoiceBox.chain`,
+      the text is the list of propositions, without the values of a
+      mapping.
+    * ``"fragment"``: a fragment of a streamed text is received.
+    * ``"draw"``: text is written at ``y``, ``x`` of the window with an
+      attribute.
+    * ``"refresh"``: writes are made visible.
+    * ``"key"``: a key is read.
+
+    :param file: Path of the file in which the session is recorded, or
+        binary file object opened for writing.
+    """
+    def __init__(self, file: Union[str, BinaryIO]):
+        """Initializes instance of :class:`SessionRecorder`."""
+        self._file = gzip.open(file, "wt", encoding="utf-8")
+        self._boxes: List[Any] = []
+        self._start: Optional[float] = None
+
+        self._write({"format": _FORMAT, "version": _VERSION})
+
+    def __enter__(self) -> "SessionRecorder":
+        """Return self."""
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Close the recorder."""
+        self.close()
+
+    def attach(self, *boxes: Any):
+        """Record the sessions of ``boxes`` from now on.
+
+        Boxes are numbered in the order they are attached.
+        """
+        for box in boxes:
+            self._index(box)
+            box.recorder = self
+
+    def close(self):
+        """Stop recording attached text boxes and close the file."""
+        for box in self._boxes:
+            if box.recorder is self:
+                box.recorder = None
+        self._file.close()
+
+    def call(self,
+             box: Any,
+             method: str,
+             text: Union[str, Sequence[str], None],
+             kwargs: Mapping[str, Any],
+             seed: Optional[int] = None):
+        """Record that ``box`` displays ``text`` by calling ``method``
+        with ``kwargs``, random delays being drawn from ``seed``.
+        """
+        kwargs = dict(kwargs)
+        if "text_attr" in kwargs:
+            kwargs["text_attr"] = combine_attrs(
+                *to_tuple(kwargs["text_attr"]))
+        if "words_attr" in kwargs:
+            kwargs["words_attr"] = [
+                [_encode_key(key), combine_attrs(*to_tuple(key_attr))]
+                for key, key_attr in kwargs["words_attr"].items()]
+        self._event(box, "call", method, text, kwargs, seed)
+
+    def fragment(self, box: Any, text: str):
+        """Record that ``box`` receives a fragment of streamed text."""
+        self._event(box, "fragment", text)
+
+    def draw(self,
+             box: Any,
+             y: int,
+             x: int,
+             text: str,
+             attr: CursesTextAttribute):
+        """Record that ``box`` writes ``text`` at ``y``, ``x``."""
+        self._event(box, "draw", y, x, text, attr)
+
+    def refresh(self, box: Any):
+        """Record that ``box`` makes its writes visible."""
+        self._event(box, "refresh")
+
+    def key(self, box: Any, key: CursesKey):
+        """Record that ``box`` reads ``key``."""
+        self._event(box, "key", key)
+
+    def _index(self, box: Any) -> int:
+        """Return the index of ``box``, numbering it if it is new."""
+        for index, known in enumerate(self._boxes):
+            if known is box:
+                return index
+        self._boxes.append(box)
+        return len(self._boxes) - 1
+
+    def _event(self, box: Any, kind: str, *data: Any):
+        now = box.backend.monotonic()
+        if self._start is None:
+            self._start = now
+
+        self._write([round(now - self._start, 3),
+                     self._index(box),
+                     kind,
+                     *data])
+
+    def _write(self, data: Any):
+        self._file.write(json.dumps(data,
+                                    ensure_ascii=False,
+                                    separators=(",", ":")))
+        self._file.write("\n")
+
+
+class SessionReplayer:
+    """Replays a session recorded by :class:`SessionRecorder`.
+
+    Texts are displayed again with the same arguments and keys are
+    pressed at the same times, relatively to the start of each text.
+    Waiting is done by the backends of the text boxes: a replay runs at
+    real speed on a terminal and as fast as possible on text boxes
+    using a :class:`visualdialog.virtual.VirtualBackend`.
+
+    :param file: Path of the file of the session, or binary file object
+        opened for reading.
+
+    :raises ValueError: If the file is not a session recorded by a
+        compatible version of :class:`SessionRecorder`.
+
+    :ivar events: List of the events of the session, as described in
+        :class:`SessionRecorder`.
+    """
+    def __init__(self, file: Union[str, BinaryIO]):
+        """Initializes instance of :class:`SessionReplayer`."""
+        with gzip.open(file, "rt", encoding="utf-8") as lines:
+            try:
+                header = json.loads(next(lines, "null"))
+            except gzip.BadGzipFile:
+                header = None
+            if (not isinstance(header, dict)
+                    or header.get("format") != _FORMAT):
+                raise ValueError("not a recorded session")
+            if header.get("version") != _VERSION:
+                raise ValueError("unsupported session version "
+                                 f"{header.get('version')!r}")
+
+            self.events: List[Event] = [json.loads(line) for line in lines]
+
+    def replay(self, *boxes: Any, win: CursesWindow = None) -> float:
+        """Display the texts of the session on ``boxes``.
+
+        Texts are displayed one after the other in the order they were
+        recorded, even if they were displayed simultaneously.
+
+        :param boxes: Text boxes which replace recorded ones, in the
+            order the latter were attached to the recorder.
+
+        :param win: ``curses`` window object on which texts are
+            displayed, if boxes do not have a ``global_win``.
+
+        :returns: Time spent displaying texts in milliseconds, measured
+            by the backends of the text boxes.
+
+        :raises InputExhausted: If a text box waits for a key after the
+            last key recorded for its text.
+        """
+        elapsed = 0.
+        for index, (at, number, kind, *data) in enumerate(self.events):
+            if kind != "call":
+                continue
+
+            box = boxes[number]
+            method, text, kwargs, seed = data
+            kwargs = dict(kwargs)
+            keys, fragments = self._inputs(index)
+
+            if "text_attr" in kwargs:
+                kwargs["text_attr"] = (kwargs["text_attr"], )
+            if "words_attr" in kwargs:
+                kwargs["words_attr"] = {_decode_key(key): key_attr
+                                        for key, key_attr
+                                        in kwargs["words_attr"]}
+            if "random_delay" in kwargs:
+                kwargs["random_delay"] = tuple(kwargs["random_delay"])
+
+            box._seed = seed
+
+            start = box.backend.monotonic()
+            key_source = box.key_source
+            box.key_source = self._key_source(box, start - at, keys)
+            try:
+                if method == "stream":
+                    box.stream(self._fragments(box, start - at, fragments),
+                               win,
+                               **kwargs)
+                elif method in _REPLAYED_METHODS:
+                    # Propositions of chain are given as text.
+                    getattr(box, method)(text, win, **kwargs)
+                else:
+                    raise ValueError(f"unknown recorded method {method!r}")
+            finally:
+                box.key_source = key_source
+            elapsed += box.backend.monotonic() - start
+
+        return elapsed
+
+    def _inputs(self, index: int) -> Tuple[Deque[Tuple[float, CursesKey]],
+                                           List[Tuple[float, str]]]:
+        """Return the keys and fragments received during the text
+        displayed by the event at ``index``.
+        """
+        number = self.events[index][1]
+        keys: Deque[Tuple[float, CursesKey]] = deque()
+        fragments: List[Tuple[float, str]] = []
+
+        for at, event_number, kind, *data in self.events[index + 1:]:
+            if event_number != number:
+                continue
+            elif kind == "call":
+                break
+            elif kind == "key":
+                keys.append((at, data[0]))
+            elif kind == "fragment":
+                fragments.append((at, data[0]))
+        return keys, fragments
+
+    @staticmethod
+    def _key_source(box: Any,
+                    origin: float,
+                    keys: Deque[Tuple[float, CursesKey]]
+                    ) -> Callable[[CursesWindow, int], Optional[CursesKey]]:
+        """Return a ``key_source`` for ``box`` pressing ``keys`` at
+        their times relatively to the time ``origin`` of its backend.
+        """
+        backend = box.backend
+
+        def read_key(win: CursesWindow, timeout: int) -> Optional[CursesKey]:
+            # Like curses, reading a key refreshes the window.
+            win.refresh()
+
+            if not keys:
+                if timeout < 0:
+                    raise InputExhausted()
+                backend.napms(timeout)
+                return None
+
+            at, key = keys[0]
+            wait = origin + at - backend.monotonic()
+            if wait > 0:
+                if 0 <= timeout < wait:
+                    backend.napms(timeout)
+                    return None
+                backend.napms(math.ceil(wait))
+            keys.popleft()
+            return key
+
+        return read_key
+
+    @staticmethod
+    def _fragments(box: Any,
+                   origin: float,
+                   fragments: List[Tuple[float, str]]) -> Iterator[str]:
+        """Yield ``fragments`` at their times relatively to the time
+        ``origin`` of the backend of ``box``.
+        """
+        for at, fragment in fragments:
+            wait = origin + at - box.backend.monotonic()
+            if wait > 0:
+                box.backend.napms(math.ceil(wait))
+            yield fragment
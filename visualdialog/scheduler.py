@@ -0,0 +1,216 @@
+# scheduler.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["Scheduler"]
+
+import heapq
+import itertools
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .backend import CursesBackend, default_backend
+from .dialog import _INPUT, DialogBox
+from .type import CursesWindow
+
+
+class _Animation:
+    """A text being displayed by a text box."""
+    def __init__(self,
+                 box: DialogBox,
+                 steps: Iterator[Union[int, object]],
+                 page_delay: Optional[int]):
+        self.box = box
+        self.steps = steps
+        self.page_delay = page_delay
+
+
+class Scheduler:
+    """This class allows to animate several :class:`DialogBox` at the
+    same time.
+
+    All texts added with :meth:`add` are written on a shared timeline by
+    :meth:`run`: each text box waits its own delays (``delay``,
+    ``random_delay``, ``self.downtime_chars_delay``) but the screen is
+    updated once for all text boxes by tick, from a single thread::
+
+        scheduler = Scheduler(win)
+        scheduler.add(phoenix, "Objection !")
+        scheduler.add(status, "Recording...", page_delay=0)
+        scheduler.run()
+
+    While they are animated, text boxes only erase their own rectangle
+    instead of the whole window (see ``BaseTextBox.clear_window``).
+    They skip to the end of a page or write faster as when they are
+    used alone (see ``BaseTextBox.allow_skip`` and
+    ``BaseTextBox.fast_forward_keys``), and group their writes by
+    frames if ``BaseTextBox.frame_interval`` is set. A key read by a
+    text box while it writes is not seen by the other ones.
+
+    :param win: ``curses`` window object on which confirmation keys are
+        read.
+
+    :param backend: Backend used to wait and update the screen. If
+        omitted, the backend of the first added text box is used.
+    """
+    def __init__(self,
+                 win: CursesWindow,
+                 backend: Optional[CursesBackend] = None):
+        """Initializes instance of :class:`Scheduler`."""
+        self.win = win
+        self.backend = backend
+        self._animations: List[_Animation] = []
+
+    def add(self,
+            box: DialogBox,
+            text: str,
+            method: str = "char_by_char",
+            win: CursesWindow = None,
+            page_delay: Optional[int] = None,
+            **kwargs) -> "Scheduler":
+        """Add a text to display during the next :meth:`run`.
+
+        :param box: Text box which displays ``text``.
+
+        :param text: Text to display.
+
+        :param method: Name of the method of ``box`` used to display
+            ``text``: ``"char_by_char"`` or ``"word_by_word"``. This
+            defaults to ``"char_by_char"``.
+
+        :param win: ``curses`` window object on which ``text`` is
+            written. If omitted, ``self.win`` is chosen (or
+            ``box.global_win`` if set).
+
+        :param page_delay: If ``None``, the text box waits for one of
+            its ``confirm_keys`` at the end of each page, else time in
+            milliseconds after which it goes on by itself. This defaults
+            to ``None``.
+
+        :param kwargs: Keyword arguments of ``method``.
+
+        :returns: The scheduler itself, to chain calls.
+        """
+        if self.backend is None:
+            self.backend = box.backend
+
+        win = box.global_win or win or self.win
+        steps = box._waits(win,
+                           box._method_steps(method, text, win, **kwargs))
+        self._animations.append(_Animation(box, steps, page_delay))
+        return self
+
+    def run(self):
+        """Animate all added texts until they are completely displayed.
+
+        When several text boxes wait for a confirmation, a key is given
+        to the first one which accepts it.
+
+        :raises PanicError: If a key contained in ``panic_keys`` of a
+            waiting text box is pressed.
+        """
+        backend = self.backend or default_backend
+        animations, self._animations = self._animations, []
+        boxes = {animation.box for animation in animations}
+        clear_window = {box: box.clear_window for box in boxes}
+
+        # Deadlines of animated texts: (time, order, animation).
+        timeline: List[Tuple[float, int, _Animation]] = []
+        order = itertools.count()
+        waiting: List[_Animation] = []
+
+        for box in boxes:
+            box._defer_refresh = True
+            box.clear_window = False
+
+        try:
+            now = backend.monotonic()
+            for animation in animations:
+                heapq.heappush(timeline, (now, next(order), animation))
+
+            while timeline or waiting:
+                now = backend.monotonic()
+                # Statistics of the text boxes written during the tick.
+                written = {}
+
+                while timeline and timeline[0][0] <= now:
+                    animation = heapq.heappop(timeline)[2]
+                    deadline = self._advance(animation)
+                    if animation.box.stats is not None:
+                        written[id(animation.box.stats)] = (
+                            animation.box.stats)
+
+                    if deadline is not None:
+                        heapq.heappush(timeline,
+                                       (deadline, next(order), animation))
+                    elif animation.steps is not None:
+                        if not waiting:
+                            backend.flushinp()
+                        waiting.append(animation)
+
+                backend.doupdate()
+                for stats in written.values():
+                    stats.updates += 1
+
+                if waiting:
+                    for animation in self._read_keys(waiting,
+                                                     block=not timeline):
+                        heapq.heappush(timeline,
+                                       (backend.monotonic(),
+                                        next(order),
+                                        animation))
+
+                if timeline:
+                    # The next deadline may already be over.
+                    backend.napms(max(int(timeline[0][0]
+                                          - backend.monotonic()),
+                                      0))
+        finally:
+            for box in boxes:
+                box._defer_refresh = False
+                box.clear_window = clear_window[box]
+
+    def _advance(self, animation: _Animation) -> Optional[float]:
+        """Write ``animation`` until it has to wait.
+
+        :returns: The time at which the animation must go on or ``None``
+            if it waits for a confirmation or is over (then its
+            ``steps`` are set to ``None``).
+        """
+        box = animation.box
+        for step in animation.steps:
+            if step is _INPUT:
+                if animation.page_delay is None:
+                    return None
+                return box.backend.monotonic() + animation.page_delay
+            elif step > 0:
+                # Waiting times are counted from the time the previous
+                # write was scheduled for, see BaseTextBox._schedule.
+                return box._deadline
+
+        animation.steps = None
+        return None
+
+    def _read_keys(self,
+                   waiting: List[_Animation],
+                   block: bool) -> List[_Animation]:
+        """Read available keys and return animations which have been
+        confirmed. If ``block`` is ``True``, wait until a key is
+        pressed.
+        """
+        confirmed = []
+        timeout = -1 if block else 0
+        while waiting:
+            key = waiting[0].box._read_key(self.win, timeout)
+            if key is None:
+                break
+
+            for animation in waiting:
+                if animation.box._is_confirmation(key):
+                    waiting.remove(animation)
+                    confirmed.append(animation)
+                    break
+
+            if confirmed:
+                break
+            timeout = 0
+
+        return confirmed
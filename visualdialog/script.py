@@ -0,0 +1,239 @@
+# script.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["DialogueScript", "ScriptEntry"]
+
+import curses
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import (Any, Dict, Mapping, NamedTuple, Optional, Sequence,
+                    Union, overload)
+
+from .type import CursesTextAttribute, CursesWindow
+from .utils import combine_attrs
+
+
+# Header of index files: magic, version, then size, modification time
+# and number of entries of the indexed script. Index files are in the
+# byte order of the machine, followed by one 64-bit offset by entry.
+_INDEX_HEADER = struct.Struct("=4sIQQQ")
+_INDEX_MAGIC = b"VDSI"
+_INDEX_VERSION = 1
+
+
+class ScriptEntry(NamedTuple):
+    """An entry of a :class:`DialogueScript`: a text said by a speaker.
+
+    ``style`` is the name of the text box displaying the text,
+    ``text_attr`` the attributes of the text and ``options`` the other
+    keyword arguments of the method displaying it.
+    """
+    speaker: str
+    style: str
+    text: str
+    text_attr: CursesTextAttribute
+    options: Dict[str, Any]
+
+
+def _text_attr(names: Union[str, Sequence[str]]) -> CursesTextAttribute:
+    """Return the ``curses`` text attribute named by ``names``, such as
+    ``"A_BOLD"``.
+    """
+    if isinstance(names, str):
+        names = (names, )
+
+    attributes = []
+    for name in names:
+        if not name.startswith("A_") or not hasattr(curses, name):
+            raise ValueError(f"unknown text attribute {name!r}")
+        attributes.append(getattr(curses, name))
+    return combine_attrs(*attributes)
+
+
+class DialogueScript(Sequence[ScriptEntry]):
+    """A dialogue script file whose entries are read on demand.
+
+    Scripts are made of one JSON object by line::
+
+        {"speaker": "Phoenix", "style": "left", "text": "Objection !"}
+        {"speaker": "April", "style": "center", "text": "Arghh !",
+         "attrs": ["A_ITALIC"], "delay": 30}
+
+    ``"text"`` is the only required key. ``"style"`` defaults to the
+    speaker and ``"attrs"`` is a name or list of names of ``curses``
+    text attributes. Other keys are passed as keyword arguments to the
+    method displaying the text, ``"method"`` giving its name
+    (``"char_by_char"`` by default). Empty lines are ignored.
+
+    The script file is memory-mapped and the offsets of its entries are
+    kept in an index file, built the first time the script is opened
+    and built again when the script changes. An entry is only parsed
+    when it is accessed, so opening a script takes the same time
+    whatever its length.
+
+    :param path: Path of the script file.
+
+    :param index_path: Path of the index file. This defaults to
+        ``path`` followed by ``".idx"``. If it cannot be written, the
+        index is kept in memory.
+
+    .. note::
+        This class can be used as a context manager, which closes the
+        script.
+    """
+    def __init__(self,
+                 path: Union[str, os.PathLike],
+                 index_path: Optional[Union[str, os.PathLike]] = None):
+        """Initializes instance of :class:`DialogueScript`."""
+        self.path = os.fspath(path)
+        self.index_path = (os.fspath(index_path) if index_path is not None
+                           else self.path + ".idx")
+
+        self._file = open(self.path, "rb")
+        stat = os.fstat(self._file.fileno())
+        # Empty files cannot be mapped.
+        self._data = (mmap.mmap(self._file.fileno(), 0,
+                                access=mmap.ACCESS_READ)
+                      if stat.st_size else b"")
+
+        self._index_map: Optional[mmap.mmap] = None
+        self._offsets = self._load_index(stat.st_size, stat.st_mtime_ns)
+
+    def __enter__(self) -> "DialogueScript":
+        """Return self."""
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Close the script."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> ScriptEntry:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[ScriptEntry]:
+        ...
+
+    def __getitem__(self, index):
+        """Return self[index], parsing the entry."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        start = self._offsets[index]
+        end = self._data.find(b"\n", start)
+        if end < 0:
+            end = len(self._data)
+
+        try:
+            data = json.loads(self._data[start:end])
+            text = data.pop("text")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValueError(f"invalid entry {index} of {self.path!r}")
+
+        speaker = data.pop("speaker", "")
+        return ScriptEntry(speaker,
+                           data.pop("style", speaker),
+                           text,
+                           _text_attr(data.pop("attrs", ())),
+                           data)
+
+    def close(self):
+        """Unmap and close the script and its index."""
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        if self._index_map is not None:
+            self._index_map.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def play(self,
+             boxes: Mapping[str, Any],
+             win: CursesWindow = None,
+             start: int = 0):
+        """Display the entries of the script one after the other,
+        starting from the entry at ``start``.
+
+        :param boxes: Mapping of styles to the text boxes displaying
+            entries of these styles.
+
+        :param win: ``curses`` window object on which entries are
+            displayed, if boxes do not have a ``global_win``.
+
+        :param start: Index of the first entry displayed. This defaults
+            to ``0``.
+        """
+        for index in range(start, len(self)):
+            entry = self[index]
+            options = dict(entry.options)
+            method = options.pop("method", "char_by_char")
+
+            getattr(boxes[entry.style], method)(entry.text,
+                                                win,
+                                                text_attr=entry.text_attr,
+                                                **options)
+
+    def _load_index(self, size: int, mtime: int) -> Sequence[int]:
+        """Return the offsets of entries, from the index file if it
+        matches the script, otherwise building it.
+        """
+        try:
+            with open(self.index_path, "rb") as file:
+                index_map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+        else:
+            count = (len(index_map) - _INDEX_HEADER.size) // 8
+            if (count >= 0
+                    and len(index_map) == _INDEX_HEADER.size + count * 8
+                    and _INDEX_HEADER.unpack_from(index_map)
+                    == (_INDEX_MAGIC, _INDEX_VERSION, size, mtime, count)):
+                self._index_map = index_map
+                return memoryview(index_map)[_INDEX_HEADER.size:].cast("Q")
+            index_map.close()
+
+        offsets = self._scan()
+        try:
+            self._write_index(offsets, size, mtime)
+        except OSError:
+            # Read-only location, the index is kept in memory only.
+            pass
+        return offsets
+
+    def _scan(self) -> "array[int]":
+        """Return the offsets of the non-empty lines of the script."""
+        offsets = array("Q")
+        data = self._data
+        start = 0
+        while start < len(data):
+            end = data.find(b"\n", start)
+            if end < 0:
+                end = len(data)
+            if data[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+        return offsets
+
+    def _write_index(self, offsets: "array[int]", size: int, mtime: int):
+        """Write ``offsets`` to the index file, replacing it at once so
+        that it is never seen incomplete.
+        """
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION,
+                                              size, mtime, len(offsets)))
+                offsets.tofile(file)
+            os.replace(temp_path, self.index_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,84 @@
+# stats.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["RenderStats"]
+
+from typing import Any, Dict
+
+
+class RenderStats:
+    """Counters and timers of the display of text by text boxes.
+
+    Statistics are only collected by a text box whose ``stats``
+    attribute is set to an instance of this class::
+
+        box.stats = visualdialog.RenderStats()
+
+        box.char_by_char("Hello world", win)
+
+        print(box.stats.as_dict())
+
+    A same instance can be shared by several text boxes. Times are in
+    milliseconds.
+
+    :ivar texts: Number of texts displayed.
+
+    :ivar pages: Number of pages displayed and confirmed.
+
+    :ivar addstr_calls: Number of ``window.addstr`` calls writing text.
+
+    :ivar chars_drawn: Number of characters written.
+
+    :ivar bytes_drawn: Number of bytes of written characters encoded in
+        UTF-8.
+
+    :ivar refreshes: Number of ``window.refresh`` and
+        ``window.noutrefresh`` calls.
+
+    :ivar updates: Number of ``curses.doupdate`` calls ending a frame.
+
+    :ivar sleep_time: Time waited between writes.
+
+    :ivar callback_time: Time spent in callbacks.
+
+    :ivar input_time: Time spent waiting for confirmations.
+
+    :ivar total_time: Time spent displaying texts, from the first write
+        to the last confirmation.
+
+    :ivar max_lag: Maximum delay of a write behind its scheduled time.
+    """
+    def __init__(self):
+        """Initializes instance of :class:`RenderStats`."""
+        self.reset()
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        fields = ", ".join(f"{name}={value!r}"
+                           for name, value in self.as_dict().items())
+        return f"RenderStats({fields})"
+
+    def reset(self):
+        """Set all counters and timers to zero."""
+        self.texts = 0
+        self.pages = 0
+        self.addstr_calls = 0
+        self.chars_drawn = 0
+        self.bytes_drawn = 0
+        self.refreshes = 0
+        self.updates = 0
+        self.sleep_time = 0
+        self.callback_time = 0.
+        self.input_time = 0.
+        self.total_time = 0.
+        self.max_lag = 0.
+
+    def drawn(self, text: str):
+        """Count a write of ``text``."""
+        self.addstr_calls += 1
+        self.chars_drawn += len(text)
+        self.bytes_drawn += len(text.encode())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return counters and timers by name."""
+        return dict(vars(self))
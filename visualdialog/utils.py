@@ -1,9 +1,11 @@
 # utils.py
 # 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
 
-__all__ = ["TextAttr"]
+__all__ = ["TextAttr", "combine_attrs"]
 
+import operator
 from contextlib import ContextDecorator
+from functools import reduce
 from typing import Iterable, NoReturn, Sequence, Tuple, Union
 
 from .type import CursesTextAttribute, CursesWindow
@@ -34,6 +36,13 @@ def to_tuple(obj: Union[object, Sequence]) -> Union[Tuple, Sequence]:
         return (obj, )
 
 
+def combine_attrs(*attributes: CursesTextAttribute) -> CursesTextAttribute:
+    """Return the single ``curses`` text attribute equivalent to all
+    given attributes.
+    """
+    return reduce(operator.or_, attributes, 0)
+
+
 class TextAttr(ContextDecorator):
     """A context manager to manage ``curses`` text attributes.
 
@@ -48,17 +57,16 @@ class TextAttr(ContextDecorator):
                  *attributes: CursesTextAttribute):
         self.win = win
         self.attributes = attributes
+        self.attr = combine_attrs(*attributes)
 
     def __enter__(self) -> NoReturn:
-        """Activate one by one attributes contained in self.attributes
-        on ``self.win``.
+        """Activate attributes contained in self.attributes on
+        ``self.win``.
         """
-        for attr in self.attributes:
-            self.win.attron(attr)
+        self.win.attron(self.attr)
 
     def __exit__(self, *_) -> NoReturn:
-        """Disable one by one attributes contained in self.attributes
-        on ``self.win``.
+        """Disable attributes contained in self.attributes on
+        ``self.win``.
         """
-        for attr in self.attributes:
-            self.win.attroff(attr)
+        self.win.attroff(self.attr)
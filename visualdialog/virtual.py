@@ -0,0 +1,797 @@
+# virtual.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["VirtualBackend", "VirtualClock", "VirtualWindow"]
+
+import asyncio
+import curses
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .backend import CursesBackend
+from .error import InputExhausted
+from .type import CursesKey, CursesTextAttribute
+from .width import char_width, graphemes
+
+
+# Names returned by getkey for function keys, as curses.keyname does.
+_KEY_NAMES = {value: name
+              for name, value in reversed(vars(curses).items())
+              if name.startswith("KEY_") and isinstance(value, int)}
+
+
+def _cells(text: str) -> List[str]:
+    """Return the content of the cells occupied by ``text``: characters
+    occupying two columns are followed by an empty cell.
+    """
+    if text.isascii():
+        return list(text)
+
+    cells = []
+    for cluster in graphemes(text):
+        cells.append(cluster)
+        cells.extend([""] * (char_width(cluster[0]) - 1))
+    return cells
+
+
+class _Grid:
+    """A two-dimensional buffer of characters and attributes which
+    remembers the cells changed since it was last copied.
+    """
+    def __init__(self, nlines: int, ncols: int):
+        self.nlines, self.ncols = nlines, ncols
+        self.chars = [[" "] * ncols for _ in range(nlines)]
+        self.attrs = [[0] * ncols for _ in range(nlines)]
+        #: Touched span of each modified line: ``{y: [first_x, last_x]}``.
+        self.touched: Dict[int, List[int]] = {}
+        self.touch(0, nlines, 0, ncols)
+
+    def touch(self, y: int, nlines: int, x: int, ncols: int):
+        """Mark the given rectangle as modified."""
+        last_x = x + ncols - 1
+        for row in range(y, y + nlines):
+            span = self.touched.get(row)
+            if span is None:
+                self.touched[row] = [x, last_x]
+            else:
+                if x < span[0]:
+                    span[0] = x
+                if last_x > span[1]:
+                    span[1] = last_x
+
+
+class VirtualClock:
+    """A clock whose time only moves forward when asked to.
+
+    It replaces real waiting so that dialogs can be played as fast as
+    possible while still accounting for the time they would have taken.
+
+    :ivar now: Current time of the clock in milliseconds.
+    """
+    def __init__(self):
+        self.now = 0
+
+    def advance(self, ms: int):
+        """Move the clock forward by ``ms`` milliseconds."""
+        if ms > 0:
+            self.now += ms
+
+
+class VirtualWindow:
+    """An in-memory implementation of the ``curses`` window methods used
+    by text boxes.
+
+    Windows should be obtained from :class:`VirtualBackend` with
+    :attr:`VirtualBackend.stdscr`, :meth:`VirtualBackend.newwin` or
+    :meth:`VirtualBackend.newpad` rather than instantiated directly.
+
+    Like with ``curses``, writing outside the window raises
+    ``curses.error``, modifications are only visible on the virtual
+    screen of the backend after :meth:`refresh` (or :meth:`noutrefresh`
+    and :meth:`VirtualBackend.doupdate`) and derived windows share
+    their characters with their parent.
+    """
+    def __init__(self,
+                 backend: "VirtualBackend",
+                 grid: _Grid,
+                 nlines: int,
+                 ncols: int,
+                 begin_y: int = 0,
+                 begin_x: int = 0,
+                 org_y: int = 0,
+                 org_x: int = 0,
+                 is_pad: bool = False):
+        """Initializes instance of :class:`VirtualWindow`."""
+        self._backend = backend
+        self._grid = grid
+        self._nlines, self._ncols = nlines, ncols
+        self._begin_y, self._begin_x = begin_y, begin_x
+        # Position of the upper left corner of the window in the grid.
+        self._org_y, self._org_x = org_y, org_x
+        self._is_pad = is_pad
+
+        self._cur_y = self._cur_x = 0
+        self._attrs = 0
+        # Negative value means blocking, zero means non-blocking and
+        # a positive value is a timeout in milliseconds.
+        self._delay = -1
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return (f"VirtualWindow(nlines={self._nlines}, ncols={self._ncols}, "
+                f"begin_y={self._begin_y}, begin_x={self._begin_x})")
+
+    # Output.
+
+    def addstr(self, *args):
+        """Write a string, see ``window.addstr``."""
+        y, x, text, attr = self._parse_args(args)
+        self._write(y, x, text, self._attrs if attr is None else attr)
+
+    def addnstr(self, *args):
+        """Write at most ``n`` characters of a string, see
+        ``window.addnstr``.
+        """
+        if isinstance(args[0], int):
+            y, x, text, n, *attr = args
+            self.addstr(y, x, text[:n], *attr)
+        else:
+            text, n, *attr = args
+            self.addstr(text[:n], *attr)
+
+    def addch(self, *args):
+        """Write a character, see ``window.addch``."""
+        y, x, ch, attr = self._parse_args(args)
+        if isinstance(ch, int):
+            attr = (attr or 0) | (ch & ~curses.A_CHARTEXT)
+            ch = chr(ch & curses.A_CHARTEXT)
+        self._write(y, x, ch, self._attrs | (attr or 0))
+
+    def hline(self, *args):
+        """Draw an horizontal line, see ``window.hline``."""
+        y, x, ch, n = self._parse_line_args(args)
+        for i in range(min(n, self._ncols - x)):
+            self._put(y, x + i, ch)
+
+    def vline(self, *args):
+        """Draw a vertical line, see ``window.vline``."""
+        y, x, ch, n = self._parse_line_args(args)
+        for i in range(min(n, self._nlines - y)):
+            self._put(y + i, x, ch)
+
+    def move(self, y: int, x: int):
+        """Move the cursor to ``y``;``x``."""
+        self._check(y, x)
+        self._cur_y, self._cur_x = y, x
+
+    def erase(self):
+        """Fill the window with blanks."""
+        self._fill(0, self._nlines, 0, self._ncols)
+
+    def clear(self):
+        """Like :meth:`erase` but also causes the whole physical screen
+        to be repainted upon next update.
+        """
+        self.erase()
+        self._backend._clear_screen = True
+
+    def clrtoeol(self):
+        """Erase from cursor to the end of the line."""
+        self._fill(self._cur_y, 1, self._cur_x, self._ncols - self._cur_x)
+
+    def clrtobot(self):
+        """Erase from cursor to the end of the window."""
+        self.clrtoeol()
+        self._fill(self._cur_y + 1,
+                   self._nlines - self._cur_y - 1,
+                   0,
+                   self._ncols)
+
+    def overlay(self, destwin: "VirtualWindow", *args):
+        """Copy the window on ``destwin`` except blank characters, see
+        ``window.overlay``.
+        """
+        self._copywin(destwin, args, overlay=True)
+
+    def overwrite(self, destwin: "VirtualWindow", *args):
+        """Copy the window on ``destwin``, see ``window.overwrite``."""
+        self._copywin(destwin, args, overlay=False)
+
+    def attron(self, attr: CursesTextAttribute):
+        """Add ``attr`` to the current attributes."""
+        self._attrs |= attr
+
+    def attroff(self, attr: CursesTextAttribute):
+        """Remove ``attr`` from the current attributes."""
+        self._attrs &= ~attr
+
+    def attrset(self, attr: CursesTextAttribute):
+        """Set the current attributes to ``attr``."""
+        self._attrs = attr
+
+    def syncok(self, flag: bool):
+        """Derived windows share characters with their parent, so
+        changes are always seen by ancestors.
+        """
+
+    def syncup(self):
+        """See :meth:`syncok`."""
+
+    def touchwin(self):
+        """Pretend the whole window has been changed."""
+        self._grid.touch(self._org_y, self._nlines,
+                         self._org_x, self._ncols)
+
+    def refresh(self, *args):
+        """Update the virtual screen immediately.
+
+        Like with ``curses``, pads take the six arguments
+        ``pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol`` giving
+        the region of the pad displayed and where it is displayed, and
+        other windows take none.
+        """
+        self._backend.refresh_calls += 1
+        self._refresh_region("refresh", args)
+        self._backend.doupdate()
+
+    def noutrefresh(self, *args):
+        """Mark the window for refresh but wait for
+        :meth:`VirtualBackend.doupdate`.
+
+        Arguments are the same as :meth:`refresh` ones.
+        """
+        self._backend.noutrefresh_calls += 1
+        self._refresh_region("noutrefresh", args)
+
+    # Input.
+
+    def getch(self, *args) -> int:
+        """Return a key as an integer, ``-1`` if none is available
+        without blocking.
+        """
+        key = self._read(args)
+        if key is None:
+            return -1
+        return ord(key) if isinstance(key, str) else key
+
+    def getkey(self, *args) -> str:
+        """Return a key as a string, function keys are returned by
+        name (``"KEY_UP"`` for instance).
+        """
+        key = self._read(args)
+        if key is None:
+            raise curses.error("no input")
+        return key if isinstance(key, str) else _KEY_NAMES.get(key, chr(key))
+
+    def get_wch(self, *args) -> CursesKey:
+        """Return a character as a string or a function key as an
+        integer.
+        """
+        key = self._read(args)
+        if key is None:
+            raise curses.error("no input")
+        return key
+
+    def nodelay(self, flag: bool):
+        """Make input functions non-blocking if ``flag`` is ``True``."""
+        self._delay = 0 if flag else -1
+
+    def timeout(self, delay: int):
+        """Block at most ``delay`` milliseconds when reading a key."""
+        self._delay = delay
+
+    def keypad(self, flag: bool):
+        """Function keys are always interpreted by virtual windows."""
+
+    # Informations.
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        """Return height and width of the window."""
+        return self._nlines, self._ncols
+
+    def getbegyx(self) -> Tuple[int, int]:
+        """Return coordinates of the upper left corner."""
+        return self._begin_y, self._begin_x
+
+    def getyx(self) -> Tuple[int, int]:
+        """Return the current cursor position."""
+        return self._cur_y, self._cur_x
+
+    def inch(self, *args) -> int:
+        """Return the character and attributes at the given position."""
+        y, x = args if args else (self._cur_y, self._cur_x)
+        self._check(y, x)
+        gy, gx = self._org_y + y, self._org_x + x
+        return ord(self._grid.chars[gy][gx]) | self._grid.attrs[gy][gx]
+
+    def instr(self, *args) -> bytes:
+        """Return the characters starting at the given position."""
+        if len(args) >= 2:
+            y, x, *n = args
+        else:
+            (y, x), n = (self._cur_y, self._cur_x), list(args)
+        self._check(y, x)
+        row = self._grid.chars[self._org_y + y]
+        end = self._org_x + self._ncols
+        if n:
+            end = min(end, self._org_x + x + n[0])
+        return "".join(row[self._org_x + x:end]).encode()
+
+    def derwin(self, *args) -> "VirtualWindow":
+        """Return a window sharing characters with this one, positioned
+        relatively to it.
+        """
+        if len(args) == 2:
+            nlines = ncols = 0
+            begin_y, begin_x = args
+        else:
+            nlines, ncols, begin_y, begin_x = args
+        self._check(begin_y, begin_x)
+        nlines = nlines or self._nlines - begin_y
+        ncols = ncols or self._ncols - begin_x
+        if (begin_y + nlines > self._nlines
+                or begin_x + ncols > self._ncols):
+            raise curses.error("derwin() returned NULL")
+
+        return VirtualWindow(self._backend,
+                             self._grid,
+                             nlines, ncols,
+                             self._begin_y + begin_y,
+                             self._begin_x + begin_x,
+                             self._org_y + begin_y,
+                             self._org_x + begin_x,
+                             self._is_pad)
+
+    def subwin(self, *args) -> "VirtualWindow":
+        """Like :meth:`derwin` but positioned relatively to the
+        screen.
+        """
+        *size, begin_y, begin_x = args
+        return self.derwin(*size,
+                           begin_y - self._begin_y,
+                           begin_x - self._begin_x)
+
+    def text(self) -> List[str]:
+        """Return the lines of the window content.
+
+        Unlike :meth:`VirtualBackend.display`, the content is returned
+        even if it has not been refreshed.
+        """
+        return ["".join(row[self._org_x:self._org_x + self._ncols])
+                for row in self._grid.chars[self._org_y:
+                                            self._org_y + self._nlines]]
+
+    def attr_at(self, y: int, x: int) -> CursesTextAttribute:
+        """Return the attributes of the character at ``y``;``x``."""
+        self._check(y, x)
+        return self._grid.attrs[self._org_y + y][self._org_x + x]
+
+    # Implementation.
+
+    @staticmethod
+    def _parse_args(args: tuple) -> tuple:
+        """Split ``([y, x,] str[, attr])`` arguments."""
+        if len(args) >= 3:
+            y, x, obj, *attr = args
+        else:
+            y = x = None
+            obj, *attr = args
+        return y, x, obj, attr[0] if attr else None
+
+    def _parse_line_args(self, args: tuple) -> tuple:
+        """Split ``([y, x,] ch, n)`` arguments."""
+        if len(args) == 4:
+            y, x, ch, n = args
+        else:
+            (y, x), (ch, n) = (self._cur_y, self._cur_x), args
+        self._check(y, x)
+        attr = self._attrs
+        if isinstance(ch, int):
+            attr |= ch & ~curses.A_CHARTEXT
+            ch = chr(ch & curses.A_CHARTEXT)
+        return y, x, (ch, attr), n
+
+    def _check(self, y: int, x: int):
+        if not (0 <= y < self._nlines and 0 <= x < self._ncols):
+            raise curses.error(f"{y};{x} is out of window")
+
+    def _put(self, y: int, x: int, cell: Tuple[str, int]):
+        gy, gx = self._org_y + y, self._org_x + x
+        self._grid.chars[gy][gx], self._grid.attrs[gy][gx] = cell
+        self._grid.touch(gy, 1, gx, 1)
+
+    def _fill(self, y: int, nlines: int, x: int, ncols: int):
+        grid = self._grid
+        gy, gx = self._org_y + y, self._org_x + x
+        for row in range(gy, gy + nlines):
+            grid.chars[row][gx:gx + ncols] = [" "] * ncols
+            grid.attrs[row][gx:gx + ncols] = [0] * ncols
+        grid.touch(gy, nlines, gx, ncols)
+
+    def _write(self,
+               y: Optional[int],
+               x: Optional[int],
+               text: str,
+               attr: CursesTextAttribute):
+        """Write ``text`` from ``y``;``x`` wrapping at the end of lines
+        as ``curses`` does.
+        """
+        if y is None:
+            y, x = self._cur_y, self._cur_x
+        self._check(y, x)
+        grid = self._grid
+
+        lines = text.split("\n")
+        for i, line in enumerate(lines):
+            if i:
+                self._cur_y, self._cur_x = y, x
+                self.clrtoeol()
+                if y + 1 >= self._nlines:
+                    raise curses.error("addwstr() returned ERR")
+                y, x = y + 1, 0
+
+            cells = _cells(line)
+            while cells:
+                chunk = cells[:self._ncols - x]
+                cells = cells[len(chunk):]
+
+                gy, gx = self._org_y + y, self._org_x + x
+                grid.chars[gy][gx:gx + len(chunk)] = chunk
+                grid.attrs[gy][gx:gx + len(chunk)] = [attr] * len(chunk)
+                grid.touch(gy, 1, gx, len(chunk))
+
+                x += len(chunk)
+                if x >= self._ncols:
+                    # Like curses, writing the lower right corner moves
+                    # the cursor out of the window and fails.
+                    if y + 1 >= self._nlines:
+                        self._cur_y, self._cur_x = y, self._ncols - 1
+                        raise curses.error("addwstr() returned ERR")
+                    y, x = y + 1, 0
+
+        self._cur_y, self._cur_x = y, x
+
+    def _copywin(self,
+                 destwin: "VirtualWindow",
+                 args: tuple,
+                 overlay: bool):
+        """Copy a rectangle of the window on ``destwin``, the rectangle
+        being given by ``args`` as for ``window.overwrite`` or being the
+        part of the screen covered by both windows.
+        """
+        if args:
+            sminrow, smincol, dminrow, dmincol, dmaxrow, dmaxcol = args
+        else:
+            top = max(self._begin_y, destwin._begin_y)
+            left = max(self._begin_x, destwin._begin_x)
+            bottom = min(self._begin_y + self._nlines,
+                         destwin._begin_y + destwin._nlines) - 1
+            right = min(self._begin_x + self._ncols,
+                        destwin._begin_x + destwin._ncols) - 1
+            if bottom < top or right < left:
+                return
+            sminrow, smincol = top - self._begin_y, left - self._begin_x
+            dminrow, dmincol = top - destwin._begin_y, left - destwin._begin_x
+            dmaxrow, dmaxcol = (bottom - destwin._begin_y,
+                                right - destwin._begin_x)
+
+        nlines, ncols = dmaxrow - dminrow + 1, dmaxcol - dmincol + 1
+        self._check(sminrow, smincol)
+        self._check(sminrow + nlines - 1, smincol + ncols - 1)
+        destwin._check(dminrow, dmincol)
+        destwin._check(dmaxrow, dmaxcol)
+
+        src, dest = self._grid, destwin._grid
+        sx, dx = self._org_x + smincol, destwin._org_x + dmincol
+        for i in range(nlines):
+            sy = self._org_y + sminrow + i
+            dy = destwin._org_y + dminrow + i
+            chars = src.chars[sy][sx:sx + ncols]
+            attrs = src.attrs[sy][sx:sx + ncols]
+            if overlay:
+                for j, char in enumerate(chars):
+                    if char != " ":
+                        dest.chars[dy][dx + j] = char
+                        dest.attrs[dy][dx + j] = attrs[j]
+            else:
+                dest.chars[dy][dx:dx + ncols] = chars
+                dest.attrs[dy][dx:dx + ncols] = attrs
+        dest.touch(destwin._org_y + dminrow, nlines, dx, ncols)
+
+    def _copy_to_screen(self,
+                        y: int,
+                        x: int,
+                        screen_y: int,
+                        screen_x: int,
+                        nlines: int,
+                        ncols: int,
+                        only_touched: bool = True):
+        """Copy a region of the window to the virtual screen of the
+        backend.
+        """
+        grid, screen = self._grid, self._backend._newscr
+        gy, gx = self._org_y + y, self._org_x + x
+        # Clip the region to the screen.
+        nlines = min(nlines, screen.nlines - screen_y, grid.nlines - gy)
+        ncols = min(ncols, screen.ncols - screen_x, grid.ncols - gx)
+        last_gx = gx + ncols - 1
+
+        if only_touched:
+            rows = [row for row in grid.touched if gy <= row < gy + nlines]
+        else:
+            rows = range(gy, gy + nlines)
+
+        for row in rows:
+            lo, hi = gx, last_gx
+            span = grid.touched.get(row)
+            if only_touched:
+                lo, hi = max(span[0], gx), min(span[1], last_gx)
+                # Spans shared with other windows are kept touched.
+                if span[0] >= gx and span[1] <= last_gx:
+                    del grid.touched[row]
+                if lo > hi:
+                    continue
+
+            sy, sx = screen_y + row - gy, screen_x + lo - gx
+            screen.chars[sy][sx:sx + hi - lo + 1] = grid.chars[row][lo:hi + 1]
+            screen.attrs[sy][sx:sx + hi - lo + 1] = grid.attrs[row][lo:hi + 1]
+            screen.touch(sy, 1, sx, hi - lo + 1)
+
+    def _refresh_region(self, name: str, args: tuple):
+        """Copy the window, or the region of the pad given by ``args``,
+        to the virtual screen, checking arguments as ``curses`` does.
+        """
+        if not self._is_pad:
+            if args:
+                raise TypeError(f"{name}() takes no arguments "
+                                f"({len(args)} given)")
+            self._copy_to_screen(0, 0, self._begin_y, self._begin_x,
+                                 self._nlines, self._ncols)
+            return
+
+        if len(args) != 6:
+            raise curses.error(f"{name}() called for a pad requires "
+                               "6 arguments")
+        pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol = args
+        self._copy_to_screen(pminrow, pmincol, sminrow, smincol,
+                             smaxrow - sminrow + 1, smaxcol - smincol + 1,
+                             only_touched=False)
+
+    def _read(self, args: tuple) -> Optional[CursesKey]:
+        """Return the next scripted key, ``None`` if no key is available
+        before the window delay elapses.
+        """
+        if args:
+            self.move(*args)
+        backend = self._backend
+
+        # Like curses, reading a key refreshes a modified window.
+        if not self._is_pad and any(
+                self._org_y <= row < self._org_y + self._nlines
+                for row in self._grid.touched):
+            self._copy_to_screen(0, 0, self._begin_y, self._begin_x,
+                                 self._nlines, self._ncols)
+            backend.doupdate()
+
+        return backend._next_key(self._delay)
+
+
+class VirtualBackend(CursesBackend):
+    """A backend which displays text boxes on a virtual screen instead
+    of a terminal.
+
+    It allows to drive text boxes without terminal, to inspect what
+    they displayed and to measure how they did it::
+
+        backend = VirtualBackend(keys=" " * 3)
+        box = DialogBox(0, 0, 40, 6, backend=backend)
+        box.char_by_char("Hello world", backend.stdscr)
+        print("\\n".join(backend.display()))
+
+    Waiting is simulated by advancing :attr:`clock` so dialogs run as
+    fast as possible. Keys read by windows are taken from a script
+    filled with :meth:`push_keys`.
+
+    :param lines: Height of the virtual screen. This defaults to ``24``.
+
+    :param cols: Width of the virtual screen. This defaults to ``80``.
+
+    :param keys: Keys initially pushed in the input script. This
+        defaults to an empty tuple.
+
+    :ivar clock: :class:`VirtualClock` advanced by waiting and input
+        timeouts.
+
+    :ivar stdscr: :class:`VirtualWindow` covering the whole screen.
+
+    :ivar refresh_calls: Number of ``refresh`` calls on windows.
+
+    :ivar noutrefresh_calls: Number of ``noutrefresh`` calls on
+        windows.
+
+    :ivar doupdate_calls: Number of physical screen updates.
+
+    :ivar cells_updated: Number of screen cells transmitted by updates.
+
+    :ivar flash_calls: Number of screen flashes.
+    """
+    def __init__(self,
+                 lines: int = 24,
+                 cols: int = 80,
+                 keys: Tuple[CursesKey, ...] = ()):
+        """Initializes instance of :class:`VirtualBackend`."""
+        self.lines, self.cols = lines, cols
+        self.clock = VirtualClock()
+
+        self._newscr = _Grid(lines, cols)
+        self._curscr = _Grid(lines, cols)
+        self._clear_screen = False
+        self._input: Deque[Tuple[Optional[int], CursesKey]] = deque()
+        self.push_keys(*keys)
+
+        self.stdscr = self.newwin(lines, cols)
+
+        self.refresh_calls = 0
+        self.noutrefresh_calls = 0
+        self.doupdate_calls = 0
+        self.cells_updated = 0
+        self.flash_calls = 0
+
+    def color_pair(self, pair_number: int) -> CursesTextAttribute:
+        """Return the attribute value of a color pair, as ``curses``
+        does.
+        """
+        return (pair_number << 8) & curses.A_COLOR
+
+    def napms(self, ms: int):
+        """Advance the clock by ``ms`` milliseconds."""
+        self.clock.advance(ms)
+
+    def monotonic(self) -> int:
+        """Return the current time of :attr:`clock`."""
+        return self.clock.now
+
+    async def asleep(self, ms: int):
+        """Advance the clock by ``ms`` milliseconds and let other tasks
+        run.
+        """
+        self.clock.advance(ms)
+        await asyncio.sleep(0)
+
+    async def wait_input(self, timeout: Optional[int] = None):
+        """Advance the clock up to the time the next scripted key is
+        typed, or by ``timeout`` milliseconds if it is sooner.
+
+        :raises InputExhausted: If the input script is empty and no
+            ``timeout`` is given.
+        """
+        if self._input:
+            at, _ = self._input[0]
+            if at is not None:
+                if timeout is not None:
+                    at = min(at, self.clock.now + timeout)
+                self.clock.advance(at - self.clock.now)
+        elif timeout is None:
+            raise InputExhausted()
+        else:
+            self.clock.advance(timeout)
+        await asyncio.sleep(0)
+
+    def flash(self):
+        """Count the flash."""
+        self.flash_calls += 1
+
+    def flushinp(self):
+        """Discard keys scripted to be typed before now.
+
+        Keys pushed without time are never discarded.
+        """
+        now = self.clock.now
+        self._input = deque((at, key) for at, key in self._input
+                            if at is None or at > now)
+
+    def doupdate(self):
+        """Transmit cells changed since the last update to the
+        displayed screen.
+        """
+        self.doupdate_calls += 1
+        new, cur = self._newscr, self._curscr
+
+        if self._clear_screen:
+            self._clear_screen = False
+            new.touch(0, self.lines, 0, self.cols)
+            for row in cur.chars:
+                row[:] = [""] * self.cols
+
+        for y in sorted(new.touched):
+            lo, hi = new.touched[y]
+            new_chars, new_attrs = new.chars[y], new.attrs[y]
+            cur_chars, cur_attrs = cur.chars[y], cur.attrs[y]
+
+            x = lo
+            while x <= hi:
+                if (new_chars[x] == cur_chars[x]
+                        and new_attrs[x] == cur_attrs[x]):
+                    x += 1
+                    continue
+                start = x
+                while x <= hi and (new_chars[x] != cur_chars[x]
+                                   or new_attrs[x] != cur_attrs[x]):
+                    x += 1
+                cur_chars[start:x] = new_chars[start:x]
+                cur_attrs[start:x] = new_attrs[start:x]
+                self._transmit(y, start, new_chars[start:x],
+                               new_attrs[start:x])
+        new.touched.clear()
+
+    def rectangle(self,
+                  win: VirtualWindow,
+                  uly: int,
+                  ulx: int,
+                  lry: int,
+                  lrx: int):
+        """Draw a rectangle on ``win`` with box-drawing characters."""
+        win.vline(uly + 1, ulx, "│", lry - uly - 1)
+        win.hline(uly, ulx + 1, "─", lrx - ulx - 1)
+        win.hline(lry, ulx + 1, "─", lrx - ulx - 1)
+        win.vline(uly + 1, lrx, "│", lry - uly - 1)
+        win.addch(uly, ulx, "┌")
+        win.addch(uly, lrx, "┐")
+        win.addch(lry, lrx, "┘")
+        win.addch(lry, ulx, "└")
+
+    def newwin(self,
+               nlines: int,
+               ncols: int,
+               begin_y: int = 0,
+               begin_x: int = 0) -> VirtualWindow:
+        """Return a new window, see ``curses.newwin``."""
+        return VirtualWindow(self, _Grid(nlines, ncols),
+                             nlines, ncols,
+                             begin_y, begin_x)
+
+    def newpad(self, nlines: int, ncols: int) -> VirtualWindow:
+        """Return a new pad, see ``curses.newpad``."""
+        return VirtualWindow(self, _Grid(nlines, ncols),
+                             nlines, ncols,
+                             is_pad=True)
+
+    def push_keys(self, *keys: CursesKey, at: Optional[int] = None):
+        """Append keys to the input script.
+
+        :param keys: Keys returned one by one by window input methods.
+
+        :param at: Time of :attr:`clock` at which keys are typed. If
+            omitted, keys are available as soon as they are read.
+        """
+        self._input.extend((at, key) for key in keys)
+
+    def _next_key(self, delay: int) -> Optional[CursesKey]:
+        """Return the next scripted key, ``None`` if no key is typed
+        within ``delay`` milliseconds (blocking if negative).
+        """
+        clock, queue = self.clock, self._input
+
+        if queue:
+            at, key = queue[0]
+            if at is None or at <= clock.now:
+                queue.popleft()
+                return key
+            elif delay < 0 or (delay > 0 and at <= clock.now + delay):
+                # Wait for the key to be typed.
+                clock.advance(at - clock.now)
+                queue.popleft()
+                return key
+        elif delay < 0:
+            raise InputExhausted()
+
+        clock.advance(delay)
+        return None
+
+    def display(self) -> List[str]:
+        """Return the lines of the displayed screen."""
+        return ["".join(row) for row in self._curscr.chars]
+
+    def _transmit(self, y: int, x: int, chars: List[str], attrs: List[int]):
+        """Send changed cells to the terminal."""
+        self.cells_updated += len(chars)
@@ -0,0 +1,155 @@
+# width.py
+# 2020 Timéo Arnouts <tim.arnouts@protonmail.com>
+
+__all__ = ["WidthTextWrapper", "char_width", "fit", "graphemes",
+           "text_width"]
+
+import textwrap
+import unicodedata
+from typing import Dict, List, Sequence
+
+
+_ZERO_WIDTH_JOINER = "\u200d"
+
+# Number of terminal columns of characters, filled as they are met.
+_widths: Dict[str, int] = {chr(code): 1 if 0x20 <= code < 0x7f else 0
+                           for code in range(0x80)}
+
+
+def char_width(char: str) -> int:
+    """Return the number of terminal columns occupied by ``char``.
+
+    Combining, format and control characters occupy no column, wide and
+    fullwidth characters of East Asian scripts (and most emoji) occupy
+    two columns, other characters one column.
+    """
+    try:
+        return _widths[char]
+    except KeyError:
+        pass
+
+    if unicodedata.category(char) in ("Mn", "Me", "Cf", "Cc"):
+        width = 0
+    elif unicodedata.east_asian_width(char) in ("W", "F"):
+        width = 2
+    else:
+        width = 1
+
+    _widths[char] = width
+    return width
+
+
+def graphemes(text: str) -> Sequence[str]:
+    """Return the characters of ``text`` as displayed: each one along
+    with the following characters which occupy no column, and emoji
+    joined by zero width joiners together.
+    """
+    if text.isascii():
+        return text
+
+    clusters: List[str] = []
+    joined = False
+    for char in text:
+        if clusters and (joined or not char_width(char)):
+            clusters[-1] += char
+        else:
+            clusters.append(char)
+        joined = char == _ZERO_WIDTH_JOINER
+    return clusters
+
+
+def text_width(text: str) -> int:
+    """Return the number of terminal columns occupied by ``text``."""
+    if text.isascii():
+        return len(text)
+    return sum(char_width(cluster[0]) for cluster in graphemes(text))
+
+
+def fit(text: str, columns: int) -> int:
+    """Return the length of the longest start of ``text`` occupying at
+    most ``columns`` columns without cutting a displayed character.
+    """
+    end = width = 0
+    for cluster in graphemes(text):
+        width += char_width(cluster[0])
+        if width > columns:
+            break
+        end += len(cluster)
+    return end
+
+
+class WidthTextWrapper(textwrap.TextWrapper):
+    """A ``textwrap.TextWrapper`` measuring lines in terminal columns
+    rather than in characters.
+
+    Text made of ASCII characters only is wrapped by
+    ``textwrap.TextWrapper`` itself.
+
+    .. note::
+        ``max_lines`` is not supported for other text.
+    """
+    def _wrap_chunks(self, chunks: List[str]) -> List[str]:
+        """Like ``textwrap.TextWrapper._wrap_chunks`` with the width of
+        chunks given by :func:`text_width`.
+        """
+        if self.max_lines is not None or "".join(chunks).isascii():
+            return super()._wrap_chunks(chunks)
+
+        if self.width <= 0:
+            raise ValueError(f"invalid width {self.width!r} (must be > 0)")
+
+        lines = []
+        chunks.reverse()
+
+        while chunks:
+            cur_line = []
+            cur_len = 0
+
+            indent = self.subsequent_indent if lines else self.initial_indent
+            width = self.width - text_width(indent)
+
+            if self.drop_whitespace and chunks[-1].strip() == "" and lines:
+                del chunks[-1]
+
+            while chunks:
+                chunk_width = text_width(chunks[-1])
+                if cur_len + chunk_width > width:
+                    break
+                cur_line.append(chunks.pop())
+                cur_len += chunk_width
+
+            if chunks and text_width(chunks[-1]) > width:
+                self._handle_long_word(chunks, cur_line, cur_len, width)
+                cur_len = sum(map(text_width, cur_line))
+
+            if (self.drop_whitespace
+                    and cur_line
+                    and cur_line[-1].strip() == ""):
+                cur_len -= text_width(cur_line[-1])
+                del cur_line[-1]
+
+            if cur_line:
+                lines.append(indent + "".join(cur_line))
+
+        return lines
+
+    def _handle_long_word(self,
+                          reversed_chunks: List[str],
+                          cur_line: List[str],
+                          cur_len: int,
+                          width: int):
+        """Like ``textwrap.TextWrapper._handle_long_word`` without
+        cutting a displayed character.
+        """
+        chunk = reversed_chunks[-1]
+        if chunk.isascii() or not self.break_long_words:
+            super()._handle_long_word(reversed_chunks, cur_line,
+                                      cur_len, width)
+            return
+
+        end = fit(chunk, max(width - cur_len, 1))
+        if not end and not cur_line:
+            # A wide character does not fit in an empty line.
+            end = len(graphemes(chunk)[0])
+        cur_line.append(chunk[:end])
+        reversed_chunks[-1] = chunk[end:]